@@ -0,0 +1,140 @@
+import logging
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+from facets import CONTEST_TYPES, contest_types
+
+logger = logging.getLogger(__name__)
+
+# Tag frequencies are kept per bucket of this width; wider buckets are sums
+BASE_BUCKET_WIDTH = 50
+
+# An existing row changing in any of these forces a rebuild instead of an update
+TRACKED_COLUMNS = ['Problem Number', 'Problem Rating', 'Tags', 'Contest Name', 'Date']
+
+
+def group_ratings(keys, ratings):
+    """{key: sorted ratings} for parallel arrays of group keys and ratings, from one sort"""
+    codes, uniques = pd.factorize(np.asarray(keys))
+    order = np.lexsort((ratings, codes))
+    counts = np.bincount(codes, minlength=len(uniques))
+    return dict(zip(uniques.tolist(), np.split(ratings[order], np.cumsum(counts)[:-1])))
+
+
+def merge_groups(groups, additions):
+    """Copy of groups with each group's sorted ratings merged with the additions"""
+    merged = dict(groups)
+    for key, ratings in additions.items():
+        if key in merged:
+            ratings = np.sort(np.concatenate([merged[key], ratings]), kind='stable')
+        merged[key] = ratings
+    return merged
+
+
+def rating_stats(ratings):
+    return {
+        'count': len(ratings),
+        'median_rating': float(np.median(ratings)),
+        'mean_rating': round(float(ratings.mean()), 1),
+        'min_rating': int(ratings[0]),
+        'max_rating': int(ratings[-1]),
+    }
+
+
+def appended_rows(previous, problems):
+    """
+    Row ids of problems that aren't in the previous frame, or None unless the
+    change is a pure append (every previous row still present and unchanged)
+    """
+    is_new = ~np.isin(problems['Problem Number'].to_numpy(), previous['Problem Number'].to_numpy())
+    if len(is_new) - is_new.sum() != len(previous):
+        return None
+    for column in TRACKED_COLUMNS:
+        # By value, the categories of the two versions may differ
+        if not (problems[column].to_numpy()[~is_new] == previous[column].to_numpy()).all():
+            return None
+    return np.flatnonzero(is_new)
+
+
+class Analytics:
+    """
+    Aggregates over the catalog: tag frequency per rating bucket and rating
+    statistics per contest, per contest series and per month.
+
+    Everything is stored in a mergeable form (counts, and sorted rating
+    arrays so medians stay exact), so rows appended by the pipeline are
+    folded into a copy of the previous version's aggregates instead of
+    recomputing them. Reports are built once per bucket width and reused.
+    """
+
+    def __init__(self):
+        # (bucket start, tag) -> problems, at BASE_BUCKET_WIDTH
+        self.tag_counts = Counter()
+        self.contests = {}
+        self.series = {}
+        self.months = {}
+        self.undated = 0
+        self._reports = {}
+
+    @classmethod
+    def build(cls, problems, dates):
+        analytics = cls()
+        analytics._add(problems, dates)
+        return analytics
+
+    def extended(self, problems, dates, rows):
+        """New Analytics with the given rows of problems (and their dates) added"""
+        analytics = Analytics()
+        analytics.tag_counts = Counter(self.tag_counts)
+        analytics.contests = self.contests
+        analytics.series = self.series
+        analytics.months = self.months
+        analytics.undated = self.undated
+        analytics._add(problems.iloc[rows], dates[rows])
+        return analytics
+
+    def _add(self, problems, dates):
+        ratings = problems['Problem Rating'].to_numpy()
+
+        tags = pd.DataFrame({
+            'bucket': ratings // BASE_BUCKET_WIDTH * BASE_BUCKET_WIDTH,
+            'tag': problems['Tags'].str.lower().str.split(', ').to_numpy(),
+        }).explode('tag')
+        tags = tags[tags['tag'].notna() & (tags['tag'] != '')]
+        self.tag_counts.update(tags.groupby(['bucket', 'tag']).size().to_dict())
+
+        contest_names = problems['Contest Name'].to_numpy()
+        named = contest_names != ''
+        self.contests = merge_groups(self.contests, group_ratings(contest_names[named], ratings[named]))
+
+        series = np.array(CONTEST_TYPES)[contest_types(problems['Contest Name'])]
+        self.series = merge_groups(self.series, group_ratings(series, ratings))
+
+        # Relative dates ("today") have no month and are only counted
+        known = dates >= 0
+        months = dates[known].astype('datetime64[D]').astype('datetime64[M]').astype(str)
+        self.months = merge_groups(self.months, group_ratings(months, ratings[known]))
+        self.undated += int((~known).sum())
+
+    def report(self, width):
+        """JSON-ready analytics with tag frequencies per bucket of width (a multiple of BASE_BUCKET_WIDTH)"""
+        report = self._reports.get(width)
+        if report is None:
+            tags_by_bucket = {}
+            for (start, tag), count in self.tag_counts.items():
+                bucket_start = start // width * width
+                bucket = tags_by_bucket.setdefault(f"{bucket_start}_to_{bucket_start + width - 1}", Counter())
+                bucket[tag] += count
+            report = {
+                'tags_by_bucket': {
+                    bucket: dict(counts.most_common()) for bucket, counts in tags_by_bucket.items()
+                },
+                'contests': {name: rating_stats(ratings) for name, ratings in self.contests.items()},
+                'series': {name: rating_stats(ratings) for name, ratings in self.series.items()},
+                'trend': [{'month': month, **rating_stats(self.months[month])} for month in sorted(self.months)],
+                'undated': self.undated,
+            }
+            self._reports[width] = report
+        return report
@@ -1,14 +1,29 @@
 from flask import Flask, render_template, jsonify, request
 from flask_cors import CORS
-import pandas as pd
-import os
-import requests
 import numpy as np
 import math
 import json
+import hashlib
+from catalog import get_catalog, join_rows, BUCKET_WIDTHS, DEFAULT_BUCKET_WIDTH
+from http_cache import catalog_cached
+import metrics
+from metrics import Counter, stage
 
 app = Flask(__name__)
 CORS(app)
+metrics.init_app(app)
+
+# Upper bound for the limit parameter of paginated endpoints
+MAX_PAGE_SIZE = 500
+
+# Most usernames accepted by one batch profile request
+MAX_BATCH_USERS = 100
+
+# Most problem numbers accepted by one progress update
+MAX_PROGRESS_CHANGES = 5000
+
+BUCKET_REQUESTS = Counter('bucket_requests_total', "Uncached /problems requests by rating range", ['rating_range'])
+PROBLEMS_SERVED = Counter('problems_served_total', "Problems returned by uncached list endpoints", ['endpoint'])
 
 class CustomJSONEncoder(json.JSONEncoder):
     def default(self, obj):
@@ -24,82 +39,114 @@ class CustomJSONEncoder(json.JSONEncoder):
 
 app.json_encoder = CustomJSONEncoder
 
-def get_available_ratings():
-    ratings = []
-    rating_dir = 'rating_groups'
-    for file in os.listdir(rating_dir):
-        if file.startswith('rating_') and file.endswith('.csv'):
-            range_str = file.replace('rating_', '').replace('.csv', '')
-            ratings.append(range_str)
-    
-    # Sort ratings based on the starting number in the range
-    return sorted(ratings, key=lambda x: int(x.split('_to_')[0]))
+# Build the catalog once at startup so the first request doesn't pay for it
+get_catalog()
+
+def get_available_ratings(width=DEFAULT_BUCKET_WIDTH):
+    # Non-empty buckets in ascending order, derived from the rating index
+    return get_catalog().bucket_ranges(width)
+
+def get_width_arg():
+    """Bucket width query parameter, None if it isn't one of BUCKET_WIDTHS"""
+    width = request.args.get('width', DEFAULT_BUCKET_WIDTH, type=int)
+    return width if width in BUCKET_WIDTHS else None
+
+def finite_float(value):
+    """float(value), but nan and infinities raise ValueError like other bad numbers"""
+    number = float(value)
+    if not math.isfinite(number):
+        raise ValueError(f"{value!r} is not a finite number")
+    return number
+
+def json_bytes_response(fields, **raw_fields):
+    """
+    Build a JSON object response where raw_fields are already-encoded JSON
+    bytes spliced in as-is. Keys are sorted like jsonify does.
+    """
+    parts = []
+    for key in sorted([*fields, *raw_fields]):
+        if key in raw_fields:
+            value = raw_fields[key]
+        else:
+            value = json.dumps(fields[key], separators=(',', ':')).encode('utf-8')
+        parts.append(json.dumps(key).encode('utf-8') + b':' + value)
+    return app.response_class(b'{' + b','.join(parts) + b'}', mimetype='application/json')
+
+def get_page_args():
+    """
+    Read optional offset/limit query parameters. Without a limit the whole
+    (remaining) result is returned, as before pagination existed.
+    """
+    offset = max(request.args.get('offset', 0, type=int), 0)
+    limit = request.args.get('limit', type=int)
+    if limit is not None:
+        limit = min(max(limit, 0), MAX_PAGE_SIZE)
+    return offset, limit
 
 @app.route('/')
+@catalog_cached
 def index():
-    ratings = get_available_ratings()
-    return render_template('index.html', ratings=ratings)
+    width = get_width_arg() or DEFAULT_BUCKET_WIDTH
+    ratings = get_available_ratings(width)
+    return render_template('index.html', ratings=ratings, width=width, widths=BUCKET_WIDTHS)
 
 @app.route('/problems/<rating_range>')
+@catalog_cached
 def get_problems(rating_range):
     try:
         # Get sort parameters from request, default to Problem Number desc
         sort_by = request.args.get('sort', 'Problem Number')
         order = request.args.get('order', 'desc')
         search = request.args.get('search', '').lower()
+        offset, limit = get_page_args()
         
-        # Load the appropriate CSV file
-        file_path = os.path.join('rating_groups', f'rating_{rating_range}.csv')
-        df = pd.read_csv(file_path)
+        # Look up the already cleaned and typed bucket in the catalog
+        with stage('load'):
+            catalog = get_catalog()
+            df = catalog.get_bucket(rating_range)
+        if df is None:
+            raise ValueError(f"Invalid rating range {rating_range}, expected e.g. 1500_to_1599")
+        # Any range can be requested, only the fixed-width buckets get their own label
+        BUCKET_REQUESTS.inc(rating_range=rating_range if catalog.is_bucket(rating_range) else 'other')
         
-        # Debug information about the file
-        app.logger.info(f"Reading file for rating {rating_range}")
-        app.logger.info(f"File columns: {df.columns.tolist()}")
-        app.logger.info(f"File has {len(df)} rows")
-        app.logger.info(f"NaN values: {df.isna().sum().to_dict()}")
-        
-        # Fill NaN values properly for all types of columns
-        # For string columns, replace with empty string
-        str_cols = df.select_dtypes(include=['object']).columns
-        df[str_cols] = df[str_cols].fillna('')
-        
-        # For numeric columns, replace with 0
-        num_cols = df.select_dtypes(include=['number']).columns
-        df[num_cols] = df[num_cols].fillna(0)
-        
-        # Convert all columns to appropriate types to ensure consistency
-        for col in df.columns:
-            if col in ['Problem Number', 'Problem Rating']:
-                df[col] = df[col].astype(int)
-            elif col in ['Tags', 'Problem Name', 'Date', 'Contest Name', 'Problem Link']:
-                df[col] = df[col].astype(str)
+        # Take the precomputed sort permutation for this bucket, then apply the
+        # search filter and the requested page to it
+        ascending = order.lower() == 'asc'
+        sortable = sort_by in df.columns
+        with stage('sort'):
+            if sortable:
+                positions = catalog.sort_order(rating_range, sort_by, ascending)
+            else:
+                positions = np.arange(len(df))
         
         # Apply search filter if provided
         if search:
-            filter_mask = df['Problem Name'].str.lower().str.contains(search) | \
-                          df['Problem Number'].astype(str).str.contains(search) | \
-                          df['Tags'].str.lower().str.contains(search, na=False)
-            df = df[filter_mask]
-        
-        # Apply sorting
-        ascending = order.lower() == 'asc'
-        if sort_by in df.columns:
-            df = df.sort_values(by=sort_by, ascending=ascending)
+            with stage('filter'):
+                # The catalog's n-gram index over name, tags and number, limited to this range
+                filter_mask = np.isin(catalog.range_rows(rating_range), catalog.search_index.search(search))
+                positions = positions[filter_mask[positions]]
         
-        # Convert to dictionary and then validate to ensure no NaN values remain
-        problems_dict = df.to_dict('records')
+        total = len(positions)
+        end = None if limit is None else offset + limit
+        page = positions[offset:end]
+        PROBLEMS_SERVED.inc(len(page), endpoint='get_problems')
         
-        # Additional check to replace any remaining NaNs
-        for problem in problems_dict:
-            for key, value in problem.items():
-                if isinstance(value, float) and math.isnan(value):
-                    problem[key] = None if key in num_cols else ""
+        # Rows are already encoded as JSON, the whole sorted bucket is a single
+        # cached body and anything else is a join of the selected rows
+        with stage('serialize'):
+            if sortable and not search and len(page) == total:
+                problems_json = catalog.sorted_json(rating_range, sort_by, ascending)
+            else:
+                problems_json = join_rows(catalog.row_json(rating_range), page)
         
-        return jsonify({
-            'problems': problems_dict,
-            'count': len(problems_dict),
+        next_offset = offset + len(page)
+        return json_bytes_response({
+            'count': total,
+            'offset': offset,
+            'limit': limit,
+            'next_offset': next_offset if next_offset < total else None,
             'rating_range': rating_range
-        })
+        }, problems=problems_json)
     except Exception as e:
         app.logger.error(f"Error loading problems for rating {rating_range}: {str(e)}")
         import traceback
@@ -111,9 +158,161 @@ def get_problems(rating_range):
             'rating_range': rating_range
         })
 
+def get_facet_filters():
+    """
+    FacetIndex.query arguments from the request's tags, any_tags,
+    exclude_tags, min_rating, max_rating, contest_type, contest, date_from
+    and date_to parameters. Raises ValueError for invalid values.
+    """
+    from facets import CONTEST_TYPES, parse_day
+    
+    def csv_arg(name):
+        return [value for value in request.args.get(name, '').split(',') if value.strip()]
+    
+    def rating_arg(name):
+        value = request.args.get(name)
+        return finite_float(value) if value else None
+    
+    try:
+        filters = {
+            'all_tags': csv_arg('tags'),
+            'any_tags': csv_arg('any_tags'),
+            'not_tags': csv_arg('exclude_tags'),
+            'min_rating': rating_arg('min_rating'),
+            'max_rating': rating_arg('max_rating'),
+            'contest_types': [value.strip().lower() for value in csv_arg('contest_type')],
+            'contest': request.args.get('contest'),
+            'date_from': parse_day(request.args['date_from']) if request.args.get('date_from') else None,
+            'date_to': parse_day(request.args['date_to']) if request.args.get('date_to') else None,
+        }
+    except ValueError as e:
+        raise ValueError(f"Invalid parameter: {e}")
+    if filters['min_rating'] is not None and filters['max_rating'] is not None \
+            and filters['min_rating'] > filters['max_rating']:
+        raise ValueError("min_rating must not be greater than max_rating")
+    unknown_types = [value for value in filters['contest_types'] if value not in CONTEST_TYPES]
+    if unknown_types:
+        raise ValueError(f"Unknown contest_type {unknown_types[0]}, expected one of {CONTEST_TYPES}")
+    return filters
+
+@app.route('/api/problems/query')
+@catalog_cached
+def query_problems():
+    """
+    Faceted search over the whole catalog. Filters (all optional, combined
+    with AND): tags (all of), any_tags (at least one of), exclude_tags,
+    min_rating/max_rating, contest_type (weekly, biweekly, other, none),
+    contest (exact name), date_from/date_to (YYYY-MM-DD). Returns a page of
+    matches, newest first unless sort/order are given, with tag and contest
+    type counts over all matches.
+    """
+    try:
+        filters = get_facet_filters()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    sort_by = request.args.get('sort')
+    ascending = request.args.get('order', 'desc').lower() == 'asc'
+    offset, limit = get_page_args()
+    
+    catalog = get_catalog()
+    facets = catalog.facets
+    with stage('filter'):
+        matches = facets.query(**filters)
+        positions = facets.rows(matches)
+    with stage('sort'):
+        if sort_by in catalog.problems.columns:
+            # Stable, so ties stay newest first like the bucket sorts
+            values = catalog.problems[sort_by].iloc[positions].reset_index(drop=True)
+            positions = positions[values.sort_values(ascending=ascending, kind='stable').index.to_numpy()]
+    
+    total = len(positions)
+    end = None if limit is None else offset + limit
+    page = positions[offset:end]
+    with stage('serialize'):
+        problems_json = join_rows(catalog.problems_json, page)
+    
+    next_offset = offset + len(page)
+    return json_bytes_response({
+        'count': total,
+        'offset': offset,
+        'limit': limit,
+        'next_offset': next_offset if next_offset < total else None,
+        'facets': {
+            'tags': facets.tag_counts(matches),
+            'contest_types': facets.contest_type_counts(matches)
+        }
+    }, problems=problems_json)
+
+@app.route('/api/export')
+def export_problems():
+    """
+    Stream the catalog, or the rows matching the faceted query filters, as
+    NDJSON (default) or CSV, oldest problem first. since=<Problem Number>
+    returns only newer problems. The body is produced in chunks, gzipped on
+    the fly when the client accepts it; uncompressed NDJSON supports byte
+    Range requests (with If-Range) to resume a download.
+    """
+    from export import FORMATS, export_positions, gzip_chunks, iter_csv, iter_ndjson, ndjson_length
+    
+    export_format = request.args.get('format', 'ndjson')
+    if export_format not in FORMATS:
+        return jsonify({'error': f"format must be one of {list(FORMATS)}"}), 400
+    try:
+        filters = get_facet_filters()
+        since = request.args.get('since', type=int)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    catalog = get_catalog()
+    with stage('filter'):
+        positions = export_positions(catalog, catalog.facets.query(**filters), since)
+    PROBLEMS_SERVED.inc(len(positions), endpoint='export_problems')
+    
+    mimetype, filename = FORMATS[export_format]
+    headers = {
+        'Content-Disposition': f'attachment; filename={filename}',
+        'X-Catalog-Version': catalog.version,
+        'Vary': 'Accept-Encoding',
+    }
+    # One catalog version and query always produce the same bytes
+    etag = hashlib.sha1(f"{catalog.version}:{request.query_string.decode()}".encode()).hexdigest()[:16]
+    use_gzip = request.args.get('gzip', '1') != '0' and bool(request.accept_encodings['gzip'])
+    
+    status = 200
+    if export_format == 'ndjson' and not use_gzip:
+        row_json = catalog.problems_json
+        total = ndjson_length(row_json, positions)
+        start, stop = 0, total
+        headers['Accept-Ranges'] = 'bytes'
+        # A range only applies to the same bytes the client started with
+        if_range = request.if_range
+        if request.range and if_range.date is None and if_range.etag in (None, etag):
+            byte_range = request.range.range_for_length(total)
+            if byte_range is None:
+                return app.response_class(status=416, headers={'Content-Range': f'bytes */{total}'})
+            start, stop = byte_range
+            status = 206
+            headers['Content-Range'] = f'bytes {start}-{stop - 1}/{total}'
+        headers['Content-Length'] = str(stop - start)
+        body = iter_ndjson(row_json, positions, start, stop)
+    elif export_format == 'ndjson':
+        body = iter_ndjson(catalog.problems_json, positions)
+    else:
+        body = iter_csv(catalog.problems, positions)
+    if use_gzip:
+        body = gzip_chunks(body)
+        headers['Content-Encoding'] = 'gzip'
+        etag = f"{etag}-gzip"
+    
+    response = app.response_class(body, status=status, mimetype=mimetype, headers=headers)
+    response.set_etag(etag)
+    return response
+
 @app.route('/search')
 def global_search():
     search_term = request.args.get('q', '').lower()
+    if request.args.get('mode') == 'ranked':
+        return ranked_search(search_term)
     if not search_term or len(search_term) < 2:
         return jsonify({
             'problems': [],
@@ -121,41 +320,21 @@ def global_search():
             'message': 'Enter at least 2 characters to search'
         })
     
-    all_problems = []
-    rating_dir = 'rating_groups'
-    
     try:
-        # Search through all rating files
-        for file in os.listdir(rating_dir):
-            if file.startswith('rating_') and file.endswith('.csv'):
-                file_path = os.path.join(rating_dir, file)
-                df = pd.read_csv(file_path)
-                df = df.fillna('')
-                
-                # Filter by search term
-                filtered_df = df[
-                    df['Problem Name'].str.lower().str.contains(search_term) |
-                    df['Tags'].str.lower().str.contains(search_term) |
-                    df['Problem Number'].astype(str).str.contains(search_term)
-                ]
-                
-                if not filtered_df.empty:
-                    # Add rating range info to each problem
-                    rating_range = file.replace('rating_', '').replace('.csv', '')
-                    filtered_df['Rating Range'] = rating_range.replace('_to_', '-')
-                    all_problems.append(filtered_df)
+        # Posting-list lookup in the n-gram index, rows come back newest first
+        with stage('load'):
+            catalog = get_catalog()
+        with stage('filter'):
+            row_ids = catalog.search_index.search(search_term)
+        PROBLEMS_SERVED.inc(len(row_ids), endpoint='global_search')
         
-        if all_problems:
-            # Combine all results
-            result_df = pd.concat(all_problems)
-            # Sort by problem number (newest first)
-            result_df = result_df.sort_values('Problem Number', ascending=False)
-            
-            return jsonify({
-                'problems': result_df.to_dict('records'),
-                'count': len(result_df),
-                'message': f'Found {len(result_df)} problems matching "{search_term}"'
-            })
+        if row_ids:
+            with stage('serialize'):
+                problems_json = join_rows(catalog.problems_json, row_ids)
+            return json_bytes_response({
+                'count': len(row_ids),
+                'message': f'Found {len(row_ids)} problems matching "{search_term}"'
+            }, problems=problems_json)
         else:
             return jsonify({
                 'problems': [],
@@ -170,64 +349,47 @@ def global_search():
             'message': f'Error: {str(e)}'
         })
 
+def ranked_search(search_term):
+    """
+    Typo-tolerant search: the best `limit` problems by words matched, then
+    BM25 score, with each problem's score and the total number of matches
+    """
+    from ranked_search import DEFAULT_LIMIT, MAX_LIMIT
+    
+    limit = min(max(request.args.get('limit', DEFAULT_LIMIT, type=int), 1), MAX_LIMIT)
+    with stage('load'):
+        catalog = get_catalog()
+    with stage('filter'):
+        row_ids, scores, _, total = catalog.ranked_index.search(search_term, limit)
+    PROBLEMS_SERVED.inc(len(row_ids), endpoint='global_search')
+    with stage('serialize'):
+        problems_json = join_rows(catalog.problems_json, row_ids)
+    if total:
+        message = f'Showing the best {len(row_ids)} of {total} problems matching "{search_term}"'
+    else:
+        message = f'No problems found matching "{search_term}"'
+    return json_bytes_response({
+        'count': total,
+        'limit': limit,
+        'scores': [round(float(score), 4) for score in scores],
+        'message': message
+    }, problems=problems_json)
+
 @app.route('/api/leetcode/user/<username>')
 def leetcode_user_profile(username):
-    app.logger.info(f"Fetching LeetCode profile for username: {username}")
-    
-    query = """
-    query userPublicProfile($username: String!) {
-        matchedUser(username: $username) {
-            username
-            profile {
-                ranking
-                reputation
-                starRating
-                userAvatar
-            }
-            submitStats: submitStatsGlobal {
-                acSubmissionNum {
-                    difficulty
-                    count
-                }
-            }
-        }
-        userContestRanking(username: $username) {
-            rating
-            attendedContestsCount
-            globalRanking
-        }
-    }"""
+    # Only the LeetCode proxy needs requests and the client's connection pool,
+    # so they are imported on first use, inside the worker that uses them
+    import requests
+    from leetcode_client import get_user_profile, LeetCodeAPIError
     
     try:
-        app.logger.info("Sending request to LeetCode GraphQL API")
-        response = requests.post(
-            'https://leetcode.com/graphql',
-            json={
-                'query': query,
-                'variables': {'username': username}
-            },
-            headers={
-                'Content-Type': 'application/json',
-                'Referer': 'https://leetcode.com',
-                'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.114 Safari/537.36'
-            },
-            timeout=10  # Increased timeout
-        )
-        
-        app.logger.info(f"Response status: {response.status_code}")
-        
-        if response.status_code == 200:
-            data = response.json()
-            if 'errors' in data:
-                app.logger.error(f"LeetCode API returned error: {data['errors'][0]['message']}")
-                return jsonify({'error': data['errors'][0]['message']}), 404
-                
-            app.logger.info(f"Successfully retrieved data for {username}")
-            return jsonify(data['data'])
-        else:
-            app.logger.error(f"LeetCode API returned status {response.status_code}")
-            return jsonify({'error': f"LeetCode API returned status {response.status_code}"}), response.status_code
+        with stage('upstream'):
+            data = get_user_profile(username)
+        return jsonify(data)
             
+    except LeetCodeAPIError as e:
+        app.logger.error(f"LeetCode API returned error: {e}")
+        return jsonify({'error': str(e)}), e.status_code
     except requests.exceptions.Timeout:
         app.logger.error("Timeout when connecting to LeetCode API")
         return jsonify({'error': "Timeout when connecting to LeetCode API. Please try again later."}), 504
@@ -238,6 +400,32 @@ def leetcode_user_profile(username):
         app.logger.error(f"Unexpected error: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/leetcode/users', methods=['GET', 'POST'])
+def leetcode_user_profiles():
+    # Usernames come as a JSON body {"usernames": [...]} or ?usernames=a,b,c
+    if request.method == 'POST':
+        body = request.get_json(silent=True) or {}
+        usernames = body.get('usernames', [])
+    else:
+        usernames = request.args.get('usernames', '').split(',')
+    
+    if not isinstance(usernames, list) or not all(isinstance(u, str) for u in usernames):
+        return jsonify({'error': "usernames must be a list of strings"}), 400
+    usernames = [u.strip() for u in usernames if u.strip()]
+    if not usernames:
+        return jsonify({'error': "No usernames given"}), 400
+    if len(usernames) > MAX_BATCH_USERS:
+        return jsonify({'error': f"At most {MAX_BATCH_USERS} usernames per request"}), 400
+    
+    from leetcode_client import get_user_profiles
+    with stage('upstream'):
+        profiles, errors = get_user_profiles(usernames)
+    return jsonify({
+        'profiles': profiles,
+        'errors': errors,
+        'count': len(profiles)
+    })
+
 # @app.route('/api/leetcode/solved/<username>')
 # def leetcode_solved_problems(username):
 #     app.logger.info(f"Fetching solved problems for username: {username}")
@@ -327,33 +515,223 @@ def leetcode_user_profile(username):
 #         app.logger.error(f"Error generating problem mapping: {str(e)}")
 #         return jsonify({'error': str(e)}), 500
 
+def progress_response(progress):
+    catalog = get_catalog()
+    return jsonify({
+        'user': progress.user_id,
+        'solved': progress.numbers(),
+        'count': progress.count(),
+        'buckets': catalog.solved_counts(progress.solved),
+        'version': progress.version,
+        'updated_at': progress.updated_at
+    })
+
+@app.route('/api/progress/<user_id>', methods=['GET', 'POST'])
+def user_progress(user_id):
+    """
+    Solved problems for a user plus solved/total counts for every rating
+    bucket. POST {"solved": [...], "unsolved": [...], "toggle": [...],
+    "reset": false} applies a batch of changes and returns the new state;
+    it needs the user's write token in the X-Progress-Token header.
+    """
+    # SQLAlchemy is only needed here, so it is imported on first use
+    from progress_store import get_progress_store, MAX_PROBLEM_NUMBER, USER_ID_PATTERN, ProgressConflict
+    
+    if not USER_ID_PATTERN.match(user_id):
+        return jsonify({'error': "Invalid user id"}), 400
+    store = get_progress_store()
+    
+    if request.method == 'GET':
+        with stage('load'):
+            progress = store.get(user_id)
+        return progress_response(progress)
+    
+    with stage('auth'):
+        authorized = store.check_token(user_id, request.headers.get('X-Progress-Token'))
+    if not authorized:
+        return jsonify({'error': "Missing or invalid progress token, claim the user first"}), 401
+    
+    body = request.get_json(silent=True)
+    if not isinstance(body, dict):
+        return jsonify({'error': "Expected a JSON object"}), 400
+    changes = {}
+    for field in ('solved', 'unsolved', 'toggle'):
+        numbers = body.get(field, [])
+        if not isinstance(numbers, list) or not all(
+            isinstance(n, int) and not isinstance(n, bool) and 0 < n <= MAX_PROBLEM_NUMBER for n in numbers
+        ):
+            return jsonify({'error': f"{field} must be a list of problem numbers"}), 400
+        changes[field] = numbers
+    if sum(len(numbers) for numbers in changes.values()) > MAX_PROGRESS_CHANGES:
+        return jsonify({'error': f"At most {MAX_PROGRESS_CHANGES} changes per request"}), 400
+    reset = body.get('reset', False)
+    if not isinstance(reset, bool):
+        return jsonify({'error': "reset must be true or false"}), 400
+    
+    try:
+        with stage('store'):
+            progress = store.update(
+                user_id,
+                mark_solved=changes['solved'],
+                mark_unsolved=changes['unsolved'],
+                toggle=changes['toggle'],
+                reset=reset
+            )
+    except ProgressConflict as e:
+        return jsonify({'error': f"{e}, please retry"}), 409
+    return progress_response(progress)
+
+@app.route('/api/progress/<user_id>/claim', methods=['POST'])
+def claim_progress(user_id):
+    """
+    Claim an unclaimed user and get the token that authorizes writes to its
+    progress. The token is only returned once; 409 if the user is claimed.
+    """
+    from progress_store import get_progress_store, USER_ID_PATTERN
+    
+    if not USER_ID_PATTERN.match(user_id):
+        return jsonify({'error': "Invalid user id"}), 400
+    with stage('store'):
+        token = get_progress_store().claim(user_id)
+    if token is None:
+        return jsonify({'error': f"{user_id} is already claimed"}), 409
+    return jsonify({'user': user_id, 'token': token}), 201
+
+@app.route('/api/recommendations', methods=['GET', 'POST'])
+def recommendations():
+    """
+    Next problems to try: the top-k unsolved problems around a contest rating.
+    Takes either a username (rating from LeetCode, solved set from the
+    progress store) or a rating plus a solved list. Optional: k, tags,
+    recency (weight of newer contests), min_rating/max_rating.
+    """
+    import bitset
+    from recommend import recommend, solved_bitset, DEFAULT_COUNT, MAX_COUNT
+    from progress_store import MAX_PROBLEM_NUMBER
+    
+    if request.method == 'POST':
+        params = request.get_json(silent=True) or {}
+        if not isinstance(params, dict):
+            return jsonify({'error': "Expected a JSON object"}), 400
+    else:
+        params = request.args
+    
+    def number_list(value):
+        # Same limits as a progress update, the bitset is sized by the largest number
+        if isinstance(value, str):
+            value = [v for v in value.split(',') if v.strip()]
+        value = value or []
+        if not isinstance(value, list) or any(isinstance(v, bool) for v in value):
+            raise TypeError("solved must be a list of problem numbers")
+        if len(value) > MAX_PROGRESS_CHANGES:
+            raise ValueError(f"at most {MAX_PROGRESS_CHANGES} solved problems")
+        numbers = [int(v) for v in value]
+        if not all(0 < n <= MAX_PROBLEM_NUMBER for n in numbers):
+            raise ValueError(f"solved problem numbers must be between 1 and {MAX_PROBLEM_NUMBER}")
+        return numbers
+    
+    try:
+        username = params.get('username')
+        if username is not None and not isinstance(username, str):
+            raise TypeError("username must be a string")
+        rating = params.get('rating')
+        rating = finite_float(rating) if rating not in (None, '') else None
+        solved_numbers = number_list(params.get('solved'))
+        count = min(max(int(params.get('k', DEFAULT_COUNT)), 1), MAX_COUNT)
+        tags = params.get('tags') or []
+        if isinstance(tags, str):
+            tags = [t for t in tags.split(',') if t.strip()]
+        if not isinstance(tags, list) or not all(isinstance(t, str) for t in tags):
+            raise TypeError("tags must be a list of strings")
+        recency = finite_float(params.get('recency', 0))
+        min_rating = params.get('min_rating')
+        max_rating = params.get('max_rating')
+        min_rating = finite_float(min_rating) if min_rating not in (None, '') else None
+        max_rating = finite_float(max_rating) if max_rating not in (None, '') else None
+    except (TypeError, ValueError) as e:
+        return jsonify({'error': f"Invalid parameter: {e}"}), 400
+    if min_rating is not None and max_rating is not None and min_rating > max_rating:
+        return jsonify({'error': "min_rating must not be greater than max_rating"}), 400
+    
+    if username is None and rating is None:
+        return jsonify({'error': "Pass a username or a rating"}), 400
+    
+    solved = solved_bitset(solved_numbers)
+    if username is not None:
+        import requests
+        from leetcode_client import get_user_profile, LeetCodeAPIError
+        from progress_store import get_progress_store, USER_ID_PATTERN
+        
+        if not USER_ID_PATTERN.match(username):
+            return jsonify({'error': "Invalid username"}), 400
+        if rating is None:
+            try:
+                with stage('upstream'):
+                    profile = get_user_profile(username)
+            except LeetCodeAPIError as e:
+                return jsonify({'error': str(e)}), e.status_code
+            except requests.exceptions.RequestException:
+                return jsonify({'error': "Failed to connect to LeetCode API. Please try again later."}), 503
+            ranking = profile.get('userContestRanking') or {}
+            if ranking.get('rating') is None:
+                return jsonify({'error': f"{username} has no contest rating, pass one as rating"}), 404
+            rating = float(ranking['rating'])
+        with stage('load'):
+            stored = get_progress_store().get(username).solved
+        solved = bitset.union(solved, stored)
+    
+    with stage('filter'):
+        catalog = get_catalog()
+        rows, scores, (low, high), candidates = recommend(
+            catalog, rating, solved, count, min_rating, max_rating, tags, recency
+        )
+    with stage('serialize'):
+        problems_json = join_rows(catalog.problems_json, rows)
+    return json_bytes_response({
+        'rating': rating,
+        'band': [low, high],
+        'candidates': candidates,
+        'count': len(rows),
+        'scores': [round(float(score), 4) for score in scores]
+    }, problems=problems_json)
+
 @app.route('/api/problem-distribution')
+@catalog_cached
 def problem_distribution():
+    width = get_width_arg()
+    if width is None:
+        return jsonify({'error': f"width must be one of {list(BUCKET_WIDTHS)}"}), 400
     try:
         # Get the distribution of problems by rating range
-        rating_dir = 'rating_groups'
-        distribution = {}
-        
-        for file in os.listdir(rating_dir):
-            if file.startswith('rating_') and file.endswith('.csv'):
-                range_str = file.replace('rating_', '').replace('.csv', '')
-                file_path = os.path.join(rating_dir, file)
-                
-                try:
-                    df = pd.read_csv(file_path)
-                    count = len(df)
-                    distribution[range_str] = count
-                except Exception as e:
-                    app.logger.error(f"Error reading {file}: {str(e)}")
-                    distribution[range_str] = 0
+        distribution = dict(get_catalog().bucket_counts(width))
         
         return jsonify({
             'distribution': distribution,
-            'total': sum(distribution.values())
+            'total': sum(distribution.values()),
+            'width': width
         })
     except Exception as e:
         app.logger.error(f"Error generating problem distribution: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/analytics')
+@catalog_cached
+def analytics():
+    """
+    Tag frequency per rating bucket (width 50, 100 or 200), rating stats per
+    contest and per contest series, and the monthly difficulty trend, all
+    precomputed when the catalog loads
+    """
+    width = get_width_arg()
+    if width is None:
+        return jsonify({'error': f"width must be one of {list(BUCKET_WIDTHS)}"}), 400
+    report = get_catalog().analytics.report(width)
+    return jsonify({**report, 'width': width})
+
+@app.route('/metrics')
+def prometheus_metrics():
+    # Summed over every worker of this server, not just the one answering
+    return app.response_class(metrics.generate_latest(), mimetype='text/plain; version=0.0.4')
+
 if __name__ == '__main__':
     app.run(debug=False)
\ No newline at end of file
@@ -0,0 +1,411 @@
+"""
+Micro-benchmarks and load tests for the Flask endpoints and pipeline stages.
+
+For every scale (multiples of leetcode_contest_problems.csv) a synthetic
+catalog is generated in a temporary directory, then:
+
+  * pipeline stages (bucketing, catalog load, search index build) are timed,
+  * endpoints are driven through the Flask test client,
+  * endpoints are driven over HTTP against a real gunicorn process,
+
+with p50/p95/p99 latency, throughput and per-worker RSS written to a JSON
+file for comparison between commits. The LeetCode GraphQL API is replaced by
+a local stub server.
+
+    python benchmarks/run_benchmarks.py --scales 1,10 --out results.json
+    python benchmarks/run_benchmarks.py --compare old.json new.json
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+import pandas as pd
+import requests
+
+MASTER_CSV = os.path.join(REPO_ROOT, 'leetcode_contest_problems.csv')
+
+# Problem numbers of each synthetic copy are shifted by this much
+NUMBER_STRIDE = 10000
+
+SEARCH_TERMS = ['graph', 'dp', 'tree', 'dynamic programming', 'sum', '36', 'longest', 'xq']
+
+
+def endpoint_urls(ratings):
+    """The request mix used for both the test client and gunicorn runs"""
+    mid = ratings[len(ratings) // 2]
+    urls = {
+        'get_problems': [
+            f'/problems/{mid}',
+            f'/problems/{mid}?sort=Problem Rating&order=asc',
+            f'/problems/{ratings[0]}?sort=Date&order=desc',
+            f'/problems/{mid}?limit=50&offset=50',
+            f'/problems/{mid}?search=tree',
+        ],
+        'global_search': [f'/search?q={term}' for term in SEARCH_TERMS],
+        'problem_distribution': ['/api/problem-distribution'],
+        'index': ['/'],
+        'leetcode_user_profile': [f'/api/leetcode/user/bench_user_{i}' for i in range(20)],
+    }
+    return urls
+
+
+def summarize(latencies, wall_time=None):
+    latencies = sorted(latencies)
+    if not latencies:
+        return {}
+
+    def percentile(p):
+        index = min(len(latencies) - 1, int(round(p / 100 * (len(latencies) - 1))))
+        return round(latencies[index] * 1000, 3)
+
+    summary = {
+        'requests': len(latencies),
+        'p50_ms': percentile(50),
+        'p95_ms': percentile(95),
+        'p99_ms': percentile(99),
+        'mean_ms': round(sum(latencies) / len(latencies) * 1000, 3),
+    }
+    if wall_time:
+        summary['throughput_rps'] = round(len(latencies) / wall_time, 1)
+    return summary
+
+
+# --- synthetic data -------------------------------------------------------
+
+def generate_catalog(scale, work_dir):
+    """Write a master CSV scale times the size of the real one, plus its buckets"""
+    import rating_separator
+
+    base = pd.read_csv(MASTER_CSV)
+    copies = []
+    for k in range(scale):
+        copy = base.copy()
+        copy['Problem Number'] = copy['Problem Number'] + k * NUMBER_STRIDE
+        if k:
+            copy['Problem Name'] = copy['Problem Name'] + f' {k}'
+        copies.append(copy)
+    master = pd.concat(copies, ignore_index=True)
+    csv_path = os.path.join(work_dir, 'leetcode_contest_problems.csv')
+    master.to_csv(csv_path, index=False)
+
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        rating_separator.separate_by_exact_ratings(csv_path, os.path.join(work_dir, 'rating_groups'))
+    bucket_time = time.perf_counter() - started
+    return len(master), bucket_time
+
+
+# --- stub LeetCode API ----------------------------------------------------
+
+class StubGraphQLHandler(BaseHTTPRequestHandler):
+    latency = 0.05
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        time.sleep(self.latency)
+        data = {}
+        for key, username in body.get('variables', {}).items():
+            profile = {'username': username, 'profile': {'ranking': 1}, 'submitStats': {'acSubmissionNum': []}}
+            ranking = {'rating': 1500.0, 'attendedContestsCount': 10, 'globalRanking': 1000}
+            if key == 'username':
+                data = {'matchedUser': profile, 'userContestRanking': ranking}
+            else:
+                data[key] = profile
+                data[f'{key}_contest'] = ranking
+        payload = json.dumps({'data': data}).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+@contextlib.contextmanager
+def stub_graphql_server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubGraphQLHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f'http://127.0.0.1:{server.server_port}/graphql'
+    finally:
+        server.shutdown()
+
+
+# --- in-process benchmarks ------------------------------------------------
+
+def bench_stages(work_dir):
+    """Time loading the catalog and building the search index from the generated buckets"""
+    import catalog
+
+    results = {}
+    started = time.perf_counter()
+    loaded = catalog.Catalog.load(os.path.join(work_dir, 'rating_groups'))
+    results['catalog_load_s'] = round(time.perf_counter() - started, 4)
+
+    started = time.perf_counter()
+    index = loaded.search_index
+    results['search_index_build_s'] = round(time.perf_counter() - started, 4)
+
+    latencies = []
+    for _ in range(20):
+        for term in SEARCH_TERMS:
+            started = time.perf_counter()
+            index.search(term)
+            latencies.append(time.perf_counter() - started)
+    results['search_index_query'] = summarize(latencies)
+    return results, loaded.ratings
+
+
+def bench_test_client(work_dir, graphql_url, urls, iterations):
+    """Drive every endpoint sequentially through the Flask test client"""
+    os.environ['LEETCODE_GRAPHQL_URL'] = graphql_url
+    previous_dir = os.getcwd()
+    os.chdir(work_dir)
+    try:
+        import catalog
+        import leetcode_client
+        from app import app
+
+        leetcode_client.GRAPHQL_URL = graphql_url
+        # Drop whatever catalog this process loaded before so the new one is picked up
+        catalog._catalog = None
+        catalog.get_catalog()
+        app.logger.disabled = True
+
+        client = app.test_client()
+        results = {}
+        for name, endpoint_urls_ in urls.items():
+            latencies = []
+            started = time.perf_counter()
+            for i in range(iterations):
+                url = endpoint_urls_[i % len(endpoint_urls_)]
+                request_started = time.perf_counter()
+                response = client.get(url)
+                latencies.append(time.perf_counter() - request_started)
+                if response.status_code >= 500:
+                    raise RuntimeError(f"{url} returned {response.status_code}")
+            results[name] = summarize(latencies, time.perf_counter() - started)
+        return results
+    finally:
+        os.chdir(previous_dir)
+
+
+# --- gunicorn benchmarks --------------------------------------------------
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def read_memory(pid):
+    """RSS and PSS in MB of one process, Linux only. PSS splits shared pages between their users."""
+    memory = {}
+    try:
+        with open(f'/proc/{pid}/status') as f:
+            status = dict(line.split(':', 1) for line in f if ':' in line)
+        memory['rss_mb'] = round(int(status['VmRSS'].split()[0]) / 1024, 1)
+        with open(f'/proc/{pid}/smaps_rollup') as f:
+            for line in f:
+                if line.startswith('Pss:'):
+                    memory['pss_mb'] = round(int(line.split()[1]) / 1024, 1)
+    except (OSError, KeyError):
+        pass
+    return memory
+
+
+def gunicorn_memory(master_pid):
+    """Memory of the gunicorn master and of every worker (children of the master)"""
+    memory = {'master': read_memory(master_pid), 'workers': {}}
+    if not os.path.isdir('/proc'):
+        return memory
+    for pid in os.listdir('/proc'):
+        if not pid.isdigit():
+            continue
+        try:
+            with open(f'/proc/{pid}/status') as f:
+                status = dict(line.split(':', 1) for line in f if ':' in line)
+        except OSError:
+            continue
+        if int(status.get('PPid', '0').strip()) == master_pid:
+            memory['workers'][pid] = read_memory(pid)
+    workers = memory['workers'].values()
+    for key in ('rss_mb', 'pss_mb'):
+        memory[f'workers_total_{key}'] = round(sum(worker.get(key, 0) for worker in workers), 1)
+    return memory
+
+
+def bench_gunicorn(work_dir, graphql_url, urls, workers, threads, concurrency, requests_per_endpoint,
+                   preload=False):
+    """Start gunicorn on the generated catalog and load it over HTTP with a thread pool"""
+    if shutil.which('gunicorn') is None:
+        return {'skipped': 'gunicorn is not installed'}
+
+    port = free_port()
+    env = dict(os.environ, LEETCODE_GRAPHQL_URL=graphql_url, PRELOAD_APP='1' if preload else '0',
+               PYTHONPATH=REPO_ROOT + os.pathsep + os.environ.get('PYTHONPATH', ''))
+    started = time.perf_counter()
+    # The production config (hooks included), with the command line overriding its sizing
+    process = subprocess.Popen(
+        ['gunicorn', '--config', os.path.join(REPO_ROOT, 'gunicorn_config.py'),
+         '--workers', str(workers), '--threads', str(threads),
+         '--bind', f'127.0.0.1:{port}', '--log-level', 'warning', 'wsgi:app'],
+        cwd=work_dir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    base_url = f'http://127.0.0.1:{port}'
+    try:
+        while True:
+            try:
+                requests.get(base_url + '/api/problem-distribution', timeout=30)
+                break
+            except requests.exceptions.RequestException:
+                if process.poll() is not None or time.perf_counter() - started > 120:
+                    raise RuntimeError("gunicorn did not start")
+                time.sleep(0.1)
+        results = {'boot_s': round(time.perf_counter() - started, 3)}
+
+        session = requests.Session()
+        session.mount('http://', requests.adapters.HTTPAdapter(pool_maxsize=concurrency))
+
+        def timed_get(url):
+            request_started = time.perf_counter()
+            session.get(base_url + url, headers={'Accept-Encoding': 'gzip'}, timeout=60)
+            return time.perf_counter() - request_started
+
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            for name, endpoint_urls_ in urls.items():
+                # One untimed round so lazily built caches are not counted as latency
+                list(executor.map(timed_get, endpoint_urls_ * workers))
+                batch = [endpoint_urls_[i % len(endpoint_urls_)] for i in range(requests_per_endpoint)]
+                batch_started = time.perf_counter()
+                latencies = list(executor.map(timed_get, batch))
+                results[name] = summarize(latencies, time.perf_counter() - batch_started)
+
+        results['memory'] = gunicorn_memory(process.pid)
+        session.close()
+        return results
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+
+
+# --- driver ---------------------------------------------------------------
+
+def git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_ROOT, text=True).strip()
+    except Exception:
+        return None
+
+
+def run(scales, iterations, workers, threads, concurrency, requests_per_endpoint, skip_gunicorn, preload=False):
+    report = {
+        'commit': git_commit(),
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'python': platform.python_version(),
+        'scales': {},
+    }
+    with stub_graphql_server() as graphql_url:
+        for scale in scales:
+            work_dir = tempfile.mkdtemp(prefix=f'leetcode-bench-{scale}x-')
+            try:
+                print(f"[{scale}x] generating synthetic catalog...")
+                rows, bucket_time = generate_catalog(scale, work_dir)
+                result = {'rows': rows, 'separate_by_exact_ratings_s': round(bucket_time, 4)}
+
+                print(f"[{scale}x] {rows} problems, timing stages...")
+                stages, ratings = bench_stages(work_dir)
+                result.update(stages)
+
+                urls = endpoint_urls(ratings)
+                print(f"[{scale}x] driving the Flask test client...")
+                result['test_client'] = bench_test_client(work_dir, graphql_url, urls, iterations)
+
+                if not skip_gunicorn:
+                    print(f"[{scale}x] driving gunicorn...")
+                    result['gunicorn'] = bench_gunicorn(work_dir, graphql_url, urls, workers, threads,
+                                                        concurrency, requests_per_endpoint, preload)
+                report['scales'][f'{scale}x'] = result
+            finally:
+                shutil.rmtree(work_dir, ignore_errors=True)
+    return report
+
+
+def flatten(prefix, value, out):
+    if isinstance(value, dict):
+        for key, item in value.items():
+            flatten(f'{prefix}.{key}' if prefix else key, item, out)
+    elif isinstance(value, (int, float)):
+        out[prefix] = value
+    return out
+
+
+def compare(old_path, new_path):
+    """Print every numeric metric side by side with its relative change"""
+    with open(old_path) as f:
+        old = flatten('', json.load(f)['scales'], {})
+    with open(new_path) as f:
+        new = flatten('', json.load(f)['scales'], {})
+    for key in sorted(set(old) & set(new)):
+        before, after = old[key], new[key]
+        change = f'{(after - before) / before * 100:+.1f}%' if before else 'n/a'
+        print(f'{key:<60} {before:>12} {after:>12} {change:>9}')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark the LeetCode Ladder endpoints and pipeline stages')
+    parser.add_argument('--scales', default='1,10,100',
+                        help='comma separated catalog sizes as multiples of the real catalog')
+    parser.add_argument('--iterations', type=int, default=200,
+                        help='test client requests per endpoint')
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--threads', type=int, default=2)
+    parser.add_argument('--concurrency', type=int, default=16,
+                        help='concurrent HTTP clients against gunicorn')
+    parser.add_argument('--requests', type=int, default=400,
+                        help='gunicorn requests per endpoint')
+    parser.add_argument('--skip-gunicorn', action='store_true')
+    parser.add_argument('--preload', action='store_true',
+                        help='preload the app in the gunicorn master (catalog built once, shared by workers)')
+    parser.add_argument('--out', help='where to write the JSON results (default: benchmarks/results/<commit>.json)')
+    parser.add_argument('--compare', nargs=2, metavar=('OLD', 'NEW'),
+                        help='compare two result files instead of running')
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        sys.exit(0)
+
+    scales = [int(scale) for scale in args.scales.split(',')]
+    report = run(scales, args.iterations, args.workers, args.threads, args.concurrency,
+                 args.requests, args.skip_gunicorn, args.preload)
+
+    out = args.out or os.path.join(REPO_ROOT, 'benchmarks', 'results', f"{report['commit'] or 'local'}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(json.dumps(report, indent=2))
+    print(f"Results written to {out}")
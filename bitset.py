@@ -0,0 +1,65 @@
+import zlib
+
+import numpy as np
+
+# Set bits in every byte value, so a popcount is one table lookup per byte
+POPCOUNT = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+
+def pack_numbers(numbers, size):
+    """
+    Packed bitset (uint8 array, bit n = byte n // 8, bit n % 8) with the bits
+    of the given non-negative integers set. size is the number of bits.
+    """
+    bits = np.zeros(size, dtype=bool)
+    bits[np.asarray(numbers, dtype=np.int64)] = True
+    return np.packbits(bits, bitorder='little')
+
+
+def unpack_numbers(packed):
+    """The integers whose bits are set, ascending"""
+    return np.flatnonzero(np.unpackbits(packed, bitorder='little'))
+
+
+def contains(packed, numbers):
+    """Vectorized membership test: whether each number's bit is set"""
+    numbers = np.asarray(numbers, dtype=np.int64)
+    if len(packed) == 0:
+        return np.zeros(len(numbers), dtype=bool)
+    byte = numbers >> 3
+    in_range = byte < len(packed)
+    bits = np.zeros(len(numbers), dtype=np.uint8)
+    bits[in_range] = (packed[byte[in_range]] >> (numbers[in_range] & 7).astype(np.uint8)) & 1
+    return bits.astype(bool)
+
+
+def resize(packed, nbytes):
+    """Truncate or zero-pad a packed bitset to nbytes"""
+    if len(packed) >= nbytes:
+        return packed[:nbytes]
+    return np.concatenate([packed, np.zeros(nbytes - len(packed), dtype=np.uint8)])
+
+
+def union(a, b):
+    nbytes = max(len(a), len(b))
+    return resize(a, nbytes) | resize(b, nbytes)
+
+
+def popcount(packed, axis=None):
+    """Number of set bits, optionally per row of a 2-D stack of bitsets"""
+    if not hasattr(np, 'bitwise_count'):
+        # NumPy < 2.0
+        return POPCOUNT[packed].sum(axis=axis, dtype=np.int64)
+    if packed.shape[-1] % 8 == 0:
+        # Count 64 bits per operation when the rows allow it
+        packed = np.ascontiguousarray(packed).view(np.uint64)
+    return np.bitwise_count(packed).sum(axis=axis, dtype=np.int64)
+
+
+def compress(packed):
+    """Bytes for storage; solved sets are sparse so they deflate well"""
+    return zlib.compress(np.asarray(packed, dtype=np.uint8).tobytes())
+
+
+def decompress(blob):
+    return np.frombuffer(zlib.decompress(blob), dtype=np.uint8)
@@ -0,0 +1,546 @@
+import os
+import sys
+import json
+import hashlib
+import threading
+import time
+import logging
+from functools import cached_property
+import numpy as np
+import pandas as pd
+import bitset
+from analytics import Analytics, appended_rows
+from facets import FacetIndex
+from metrics import Counter, Gauge, Histogram
+from ranked_search import RankedIndex
+from search_index import SearchIndex
+from columnar import ColumnarTable, columnar_manifest_path, combine_buckets, CATEGORICAL_COLUMNS
+
+logger = logging.getLogger(__name__)
+
+RATING_DIR = 'rating_groups'
+
+# How often (in seconds) a request may trigger a check of the rating files' mtimes
+RELOAD_CHECK_INTERVAL = 2.0
+
+# Bucket widths the API can group by; 100 matches the rating_X_to_Y.csv files
+BUCKET_WIDTHS = (50, 100, 200)
+DEFAULT_BUCKET_WIDTH = 100
+
+CATALOG_LOADS = Counter('catalog_loads_total', "Catalog (re)loads from disk")
+CATALOG_LOAD_DURATION = Histogram('catalog_load_duration_seconds', "Time spent loading the catalog")
+CATALOG_PROBLEMS = Gauge('catalog_problems', "Rated problems in the catalog", aggregate='max')
+CATALOG_BUCKETS = Gauge('catalog_buckets', "Rating buckets in the catalog", aggregate='max')
+CATALOG_INFO = Gauge('catalog_info', "Workers serving each catalog version", ['version'])
+CATALOG_MEMORY = Gauge('catalog_memory_bytes', "Approximate memory of one worker's catalog by component",
+                       ['component'], aggregate='max')
+
+
+# First three letters of the month names the scraper produces ("Sept.", "June", ...)
+MONTH_NUMBERS = {
+    'jan': 1, 'feb': 2, 'mar': 3, 'apr': 4, 'may': 5, 'jun': 6,
+    'jul': 7, 'aug': 8, 'sep': 9, 'oct': 10, 'nov': 11, 'dec': 12,
+}
+
+
+def date_ordinals(dates):
+    """
+    Days since 1970-01-01 as int32 for dates like "Sept. 21, 2025", -1 where
+    the date can't be parsed (the scraper sometimes stores "today").
+    """
+    parts = dates.str.extract(r'^([A-Za-z]+)\.?\s+(\d{1,2}),\s*(\d{4})$')
+    parsed = pd.to_datetime(pd.DataFrame({
+        'year': pd.to_numeric(parts[2], errors='coerce'),
+        'month': parts[0].str[:3].str.lower().map(MONTH_NUMBERS),
+        'day': pd.to_numeric(parts[1], errors='coerce'),
+    }), errors='coerce')
+    days = (parsed - pd.Timestamp('1970-01-01')).dt.days
+    return days.fillna(-1).astype(np.int32).to_numpy()
+
+
+def json_default(obj):
+    if isinstance(obj, np.integer):
+        return int(obj)
+    if isinstance(obj, np.floating):
+        return float(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+class EncodedRows:
+    """
+    JSON-encoded rows stored back to back in one bytes buffer with an offsets
+    array. Indexing returns a zero-copy memoryview of one row. A few large
+    objects instead of one bytes object per row keeps the pages shared when
+    a preloaded catalog is forked into workers.
+
+    omitted optionally holds one (start, end) byte span per row, one field
+    that join(..., omit=True) leaves out, so the same buffer serves rows with
+    and without it.
+    """
+
+    def __init__(self, rows, omitted=None):
+        self.buffer = b''.join(rows)
+        self.offsets = np.zeros(len(rows) + 1, dtype=np.int64)
+        np.cumsum([len(row) for row in rows], out=self.offsets[1:])
+        self._view = memoryview(self.buffer)
+        if omitted is not None:
+            omitted = np.asarray(omitted, dtype=np.int64).reshape(-1, 2) + self.offsets[:-1, None]
+        self.omitted = omitted
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        return self._view[self.offsets[i]:self.offsets[i + 1]]
+
+    def join(self, positions, omit=False):
+        positions = np.asarray(positions, dtype=np.int64)
+        view = self._view
+        starts, ends = self.offsets[positions].tolist(), self.offsets[positions + 1].tolist()
+        if not omit:
+            return b'[' + b','.join([view[start:end] for start, end in zip(starts, ends)]) + b']'
+        pieces = []
+        for start, cut_start, cut_end, end in zip(starts, *self.omitted[positions].T.tolist(), ends):
+            pieces += (b',', view[start:cut_start], view[cut_end:end])
+        return b'[' + b''.join(pieces[1:]) + b']'
+
+    def join_lines(self, positions):
+        """The given rows as newline-terminated lines (NDJSON)"""
+        positions = np.asarray(positions, dtype=np.int64)
+        view = self._view
+        return b''.join([
+            view[start:end].tobytes() + b'\n'
+            for start, end in zip(self.offsets[positions].tolist(), self.offsets[positions + 1].tolist())
+        ])
+
+
+class RowSubset:
+    """Some rows of an EncodedRows by row id, joined without its omitted field if omit"""
+
+    def __init__(self, encoded, rows, omit=False):
+        self.encoded = encoded
+        self.rows = rows
+        self.omit = omit
+
+    def __len__(self):
+        return len(self.rows)
+
+    def join(self, positions):
+        return self.encoded.join(self.rows[np.asarray(positions, dtype=np.int64)], omit=self.omit)
+
+
+def encode_rows(df, omittable=None):
+    """
+    Encode every row of a frame as JSON, in row order, the same way jsonify
+    would (sorted keys, compact separators). With omittable, the span of
+    that field (never the first or last key) is recorded for join(omit=True).
+    """
+    rows, omitted = [], []
+    marker = f',{json.dumps(omittable)}:'.encode('utf-8')
+    for record in df.to_dict('records'):
+        row = json.dumps(record, sort_keys=True, separators=(',', ':'), default=json_default).encode('utf-8')
+        rows.append(row)
+        if omittable is not None:
+            # A quote inside a string value is escaped, so the marker can only be the key
+            start = row.index(marker)
+            value = json.dumps(record[omittable], separators=(',', ':'), default=json_default)
+            omitted.append((start, start + len(marker) + len(value.encode('utf-8'))))
+    return EncodedRows(rows, omitted if omittable is not None else None)
+
+
+def join_rows(row_json, positions):
+    """JSON array bytes for the given rows"""
+    return row_json.join(positions)
+
+
+def range_from_filename(filename):
+    """'rating_1500_to_1599.csv' -> '1500_to_1599', None for any other file"""
+    if filename.startswith('rating_') and filename.endswith('.csv'):
+        return filename[len('rating_'):-len('.csv')]
+    return None
+
+
+def deep_size(obj, seen):
+    """
+    Approximate bytes held by obj: numpy buffers, pandas columns and the
+    Python objects and containers around them. Anything already in seen
+    ({id: object}, which also keeps temporaries alive so their ids aren't
+    reused) counts once, so structures sharing strings, categories or
+    arrays aren't double counted.
+    """
+    if id(obj) in seen:
+        return 0
+    seen[id(obj)] = obj
+    if isinstance(obj, np.ndarray):
+        if obj.base is not None:
+            return deep_size(obj.base, seen)
+        if obj.dtype == object:
+            return obj.nbytes + sum(deep_size(item, seen) for item in obj)
+        return obj.nbytes
+    if isinstance(obj, pd.DataFrame):
+        return sum(deep_size(obj[column], seen) for column in obj.columns)
+    if isinstance(obj, pd.Series):
+        if isinstance(obj.dtype, pd.CategoricalDtype):
+            categories = obj.cat.categories
+            size = obj.cat.codes.nbytes
+            if id(categories) not in seen:
+                seen[id(categories)] = categories
+                size += int(categories.memory_usage(deep=True))
+            return size
+        return deep_size(obj.to_numpy(), seen)
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(deep_size(key, seen) + deep_size(value, seen) for key, value in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(deep_size(item, seen) for item in obj)
+    elif hasattr(obj, '__dict__') and not isinstance(obj, type):
+        size += deep_size(vars(obj), seen)
+    return size
+
+
+def parse_rating_range(rating_range):
+    """'1450_to_1549' -> (1450, 1549), None if it isn't a range"""
+    low, separator, high = rating_range.partition('_to_')
+    if not separator or not low.isdigit() or not high.isdigit() or int(low) > int(high):
+        return None
+    return int(low), int(high)
+
+
+def scan_rating_files(rating_dir=RATING_DIR):
+    """
+    Return a signature of the rating files on disk as a sorted tuple of
+    (filename, mtime_ns, size). Any change to a file changes the signature.
+    """
+    if not os.path.isdir(rating_dir):
+        return ()
+    entries = []
+    for entry in os.scandir(rating_dir):
+        if range_from_filename(entry.name) is None:
+            continue
+        stat = entry.stat()
+        entries.append((entry.name, stat.st_mtime_ns, stat.st_size))
+
+    # A rewritten columnar artifact must trigger a reload too
+    manifest_path = columnar_manifest_path(rating_dir)
+    if os.path.exists(manifest_path):
+        stat = os.stat(manifest_path)
+        entries.append((os.path.relpath(manifest_path, rating_dir), stat.st_mtime_ns, stat.st_size))
+    return tuple(sorted(entries))
+
+
+class Catalog:
+    """
+    Cleaned, typed view over every rating bucket in rating_groups/.
+
+    The files are combined into one frame with a rating-sorted index, and
+    every rating range, whether or not a file exists for it, is answered
+    from that index. Built once per process and shared by all requests;
+    treat the DataFrames as read-only.
+    """
+
+    def __init__(self, problems, signature):
+        self.signature = signature
+        self.version = hashlib.sha1(repr(signature).encode()).hexdigest()[:16]
+        # Newest file mtime, whole seconds to match HTTP date precision
+        self.last_modified = max((mtime_ns for _, mtime_ns, _ in signature), default=0) // 10**9
+        self.problems = problems
+        self.total = len(self.problems)
+        self._bucket_counts = {}
+        self.ratings = self.bucket_ranges()
+        self.distribution = self.bucket_counts()
+        self._frames = {}
+        self._sort_orders = {}
+        self._row_json = {}
+        self._sorted_json = {}
+
+    @cached_property
+    def problems_json(self):
+        """
+        Pre-encoded JSON for each row of the combined frame. Bucket responses
+        use the same rows without their Rating Range.
+        """
+        return encode_rows(self.problems, omittable='Rating Range')
+
+    @cached_property
+    def search_index(self):
+        # Built on first use so worker boot doesn't pay for it
+        return SearchIndex(self.problems)
+
+    @cached_property
+    def ranked_index(self):
+        """BM25 word index with typo tolerance for ranked search"""
+        return RankedIndex(self.problems)
+
+    @cached_property
+    def rating_order(self):
+        """Row ids of self.problems sorted by rating (stable, so newest first among equals)"""
+        return np.argsort(self.problems['Problem Rating'].to_numpy(), kind='stable')
+
+    @cached_property
+    def sorted_ratings(self):
+        return self.problems['Problem Rating'].to_numpy()[self.rating_order]
+
+    def rows_in_rating_range(self, low, high):
+        """Row ids with low <= rating <= high, by binary search over the sorted ratings"""
+        start = np.searchsorted(self.sorted_ratings, low, side='left')
+        end = np.searchsorted(self.sorted_ratings, high, side='right')
+        return self.rating_order[start:end]
+
+    def range_rows(self, rating_range):
+        """Row ids for a 'low_to_high' range in catalog (newest first) order, None if it isn't a range"""
+        bounds = parse_rating_range(rating_range)
+        if bounds is None:
+            return None
+        return np.sort(self.rows_in_rating_range(*bounds))
+
+    def bucket_counts(self, width=DEFAULT_BUCKET_WIDTH):
+        """
+        {'1500_to_1599': count} for every non-empty bucket of the given width,
+        ascending. Bucket edges are located by binary search in the sorted
+        ratings, so this doesn't depend on which files exist.
+        """
+        counts = self._bucket_counts.get(width)
+        if counts is None:
+            ratings = self.sorted_ratings
+            counts = {}
+            if len(ratings):
+                starts = np.arange(ratings[0] // width * width, ratings[-1] + 1, width)
+                edges = np.searchsorted(ratings, np.append(starts, starts[-1] + width), side='left')
+                for start, count in zip(starts.tolist(), np.diff(edges).tolist()):
+                    if count:
+                        counts[f"{start}_to_{start + width - 1}"] = count
+            self._bucket_counts[width] = counts
+        return counts
+
+    def bucket_ranges(self, width=DEFAULT_BUCKET_WIDTH):
+        return list(self.bucket_counts(width))
+
+    def is_bucket(self, rating_range):
+        """
+        Whether a range is a non-empty bucket of one of the BUCKET_WIDTHS.
+        Only those are cached, so arbitrary ranges can't grow the caches.
+        """
+        return any(rating_range in self.bucket_counts(width) for width in BUCKET_WIDTHS)
+
+    @cached_property
+    def dates(self):
+        """Date of each row as days since the epoch, -1 if unknown"""
+        return date_ordinals(self.problems['Date'])
+
+    @cached_property
+    def facets(self):
+        """Tag, contest and date bitmap indexes for faceted queries"""
+        return FacetIndex(self.problems, self.rating_order, self.dates)
+
+    @cached_property
+    def analytics(self):
+        """Tag, contest, series and monthly aggregates"""
+        return Analytics.build(self.problems, self.dates)
+
+    def carry_over(self, previous):
+        """
+        Reuse the previous version's analytics when the new catalog only
+        appends problems to it, adding just the new rows
+        """
+        if 'analytics' not in previous.__dict__:
+            return
+        rows = appended_rows(previous.problems, self.problems)
+        if rows is None:
+            logger.info("Existing problems changed, analytics will be rebuilt")
+            return
+        self.analytics = previous.analytics.extended(self.problems, self.dates, rows)
+        logger.info(f"Added {len(rows)} new problems to the previous analytics")
+
+    @cached_property
+    def bucket_masks(self):
+        """Packed bitset of the Problem Numbers in each bucket, one row per range in self.ratings"""
+        size = int(self.problems['Problem Number'].max()) + 1 if self.total else 0
+        if not self.ratings:
+            return np.zeros((0, 0), dtype=np.uint8)
+        numbers = self.problems['Problem Number'].to_numpy()
+        return np.vstack([
+            bitset.pack_numbers(numbers[self.range_rows(rating_range)], size)
+            for rating_range in self.ratings
+        ])
+
+    def solved_counts(self, solved):
+        """
+        {rating_range: {'solved': n, 'total': m}} for a packed bitset of solved
+        Problem Numbers, from one AND and popcount over all bucket masks.
+        """
+        masks = self.bucket_masks
+        solved_per_bucket = bitset.popcount(masks & bitset.resize(solved, masks.shape[1]), axis=1)
+        return {
+            rating_range: {'solved': int(count), 'total': self.distribution[rating_range]}
+            for rating_range, count in zip(self.ratings, solved_per_bucket)
+        }
+
+    @classmethod
+    def load(cls, rating_dir=RATING_DIR):
+        signature = scan_rating_files(rating_dir)
+        manifest_path = columnar_manifest_path(rating_dir)
+        if os.path.exists(manifest_path):
+            try:
+                # The table is already in catalog order with categorical codes,
+                # its memory-mapped arrays become the frame's columns as they are
+                table = ColumnarTable.open(os.path.dirname(manifest_path))
+                if table.is_fresh(rating_dir):
+                    logger.info(f"Loaded catalog with {table.rows} problems from columnar artifact")
+                    return cls(table.to_frame(), signature)
+                logger.info("Columnar artifact doesn't match the rating files, reading the CSVs")
+            except Exception as e:
+                logger.error(f"Error reading columnar artifact, falling back to CSV: {e}")
+
+        buckets = []
+        for filename, _, _ in signature:
+            range_str = range_from_filename(filename)
+            if range_str is None:
+                continue
+            try:
+                buckets.append((range_str, pd.read_csv(os.path.join(rating_dir, filename))))
+            except Exception as e:
+                logger.error(f"Error reading {filename}: {e}")
+        logger.info(f"Loaded catalog with {len(buckets)} rating buckets from {rating_dir}")
+        problems = combine_buckets(buckets).astype({column: 'category' for column in CATEGORICAL_COLUMNS})
+        return cls(problems, signature)
+
+    def memory_usage(self):
+        """
+        {component: approximate bytes} for the structures built so far. Each
+        component only counts what the ones before it don't already hold.
+        """
+        built = self.__dict__
+        components = {
+            'problems': [self.problems],
+            'rating_index': [built.get(name) for name in ('rating_order', 'sorted_ratings', 'dates')],
+            'bucket_frames': [self._frames, self._sort_orders],
+            'facets': [built.get('facets'), built.get('bucket_masks')],
+            'search_index': [built.get('search_index')],
+            'ranked_index': [built.get('ranked_index')],
+            'analytics': [built.get('analytics')],
+            'encoded_rows': [built.get('problems_json'), self._row_json],
+            'response_bodies': [self._sorted_json],
+        }
+        seen = {}
+        return {
+            component: sum(deep_size(obj, seen) for obj in objects if obj is not None)
+            for component, objects in components.items()
+        }
+
+    def report_memory(self):
+        """Publish memory_usage() as the catalog_memory_bytes gauge and log the total"""
+        usage = self.memory_usage()
+        for component, size in usage.items():
+            CATALOG_MEMORY.set(size, component=component)
+        logger.info(f"Catalog {self.version} holds about {sum(usage.values()) / 2**20:.1f} MiB")
+        return usage
+
+    def warm(self):
+        """
+        Build the lazily computed structures up front: the search indexes, the
+        encoded rows, the bucket masks, the rating, date and facet indexes, the
+        analytics and each bucket's default (newest first) body. Called in the
+        gunicorn master when preloading, so workers inherit them instead of
+        each building a private copy.
+        """
+        self.search_index
+        self.ranked_index
+        self.problems_json
+        self.bucket_masks
+        self.sorted_ratings
+        self.dates
+        self.facets
+        self.analytics
+        for rating_range in self.ratings:
+            self.sorted_json(rating_range, 'Problem Number', False)
+        self.report_memory()
+        return self
+
+    def get_bucket(self, rating_range):
+        """
+        DataFrame of the problems in a rating range like '1450_to_1549' (any
+        bounds, possibly empty), newest first, or None if it isn't a range
+        """
+        df = self._frames.get(rating_range)
+        if df is None:
+            rows = self.range_rows(rating_range)
+            if rows is None:
+                return None
+            df = self.problems.iloc[rows].drop(columns='Rating Range').reset_index(drop=True)
+            if self.is_bucket(rating_range):
+                self._frames[rating_range] = df
+        return df
+
+    def sort_order(self, rating_range, column, ascending):
+        """
+        Row positions of a bucket sorted by one column. Computed once per
+        catalog version and reused, so a sorted page is just a slice. The sort
+        is stable, ties keep the bucket's newest-first order.
+        """
+        key = (rating_range, column, ascending)
+        positions = self._sort_orders.get(key)
+        if positions is None:
+            values = self.get_bucket(rating_range)[column]
+            positions = values.sort_values(ascending=ascending, kind='stable').index.to_numpy()
+            if self.is_bucket(rating_range):
+                self._sort_orders[key] = positions
+        return positions
+
+    def row_json(self, rating_range):
+        """
+        Pre-encoded JSON for each row of a bucket, in bucket order: the
+        combined frame's rows (get_bucket's row i is range_rows[i]) without
+        their Rating Range, so no row is encoded twice
+        """
+        rows = self._row_json.get(rating_range)
+        if rows is None:
+            rows = RowSubset(self.problems_json, self.range_rows(rating_range), omit=True)
+            if self.is_bucket(rating_range):
+                self._row_json[rating_range] = rows
+        return rows
+
+    def sorted_json(self, rating_range, column, ascending):
+        """The whole bucket as a JSON array in one sort order, encoded once"""
+        key = (rating_range, column, ascending)
+        body = self._sorted_json.get(key)
+        if body is None:
+            body = join_rows(self.row_json(rating_range), self.sort_order(rating_range, column, ascending))
+            if self.is_bucket(rating_range):
+                self._sorted_json[key] = body
+        return body
+
+
+_catalog = None
+_catalog_lock = threading.Lock()
+_last_check = 0.0
+
+
+def get_catalog(rating_dir=RATING_DIR):
+    """
+    Return the process-wide catalog, rebuilding it when the rating files on
+    disk have changed (e.g. after the weekly pipeline commit).
+    """
+    global _catalog, _last_check
+
+    now = time.monotonic()
+    if _catalog is not None and now - _last_check < RELOAD_CHECK_INTERVAL:
+        return _catalog
+
+    with _catalog_lock:
+        if _catalog is not None and now - _last_check < RELOAD_CHECK_INTERVAL:
+            return _catalog
+        _last_check = now
+        signature = scan_rating_files(rating_dir)
+        if _catalog is None or signature != _catalog.signature:
+            previous = _catalog
+            with CATALOG_LOAD_DURATION.time():
+                _catalog = Catalog.load(rating_dir)
+                if previous is not None:
+                    _catalog.carry_over(previous)
+            CATALOG_LOADS.inc()
+            CATALOG_PROBLEMS.set(_catalog.total)
+            CATALOG_BUCKETS.set(len(_catalog.ratings))
+            CATALOG_INFO.clear()
+            CATALOG_INFO.set(1, version=_catalog.version)
+            _catalog.report_memory()
+    return _catalog
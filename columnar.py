@@ -0,0 +1,185 @@
+import os
+import json
+import hashlib
+import numpy as np
+import pandas as pd
+
+# Written inside the rating groups directory next to the CSVs
+COLUMNAR_DIR = 'columnar'
+MANIFEST_FILE = 'manifest.json'
+FORMAT_VERSION = 2
+
+COLUMNS_ORDER = ['Date', 'Problem Number', 'Problem Name', 'Problem Rating',
+                 'Problem Link', 'Contest Name', 'Tags', 'Rating Range']
+INT_COLUMNS = ['Problem Number', 'Problem Rating']
+STR_COLUMNS = ['Date', 'Problem Name', 'Problem Link', 'Contest Name', 'Tags']
+
+# Columns whose values repeat across rows are kept as categoricals: one string
+# per distinct value and small integer codes instead of a string per row
+CATEGORICAL_COLUMNS = ['Date', 'Contest Name', 'Tags', 'Rating Range']
+
+
+def column_filename(column, suffix):
+    return column.lower().replace(' ', '_') + suffix
+
+
+def clean_problems(df):
+    """Fill missing values and cast columns to the types the API serves"""
+    df = df.copy()
+    for col in df.columns:
+        if col in INT_COLUMNS:
+            df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0).astype(int)
+        elif col in STR_COLUMNS:
+            df[col] = df[col].fillna('').astype(str)
+    return df
+
+
+def combine_buckets(buckets):
+    """
+    All rated problems of [(range_str, DataFrame)] in one cleaned frame,
+    newest first, tagged with their range. This is the catalog's row order.
+    """
+    frames = [
+        df.assign(**{'Rating Range': range_str.replace('_to_', '-')})
+        for range_str, df in buckets
+    ]
+    if not frames:
+        return pd.DataFrame(columns=INT_COLUMNS + STR_COLUMNS + ['Rating Range'])
+    combined = clean_problems(pd.concat(frames, ignore_index=True))
+    return combined.sort_values('Problem Number', ascending=False, kind='stable').reset_index(drop=True)
+
+
+def source_digests(rating_dir):
+    """{filename: sha256} of the bucket CSVs in rating_dir, what a columnar table is built from"""
+    digests = {}
+    for filename in sorted(os.listdir(rating_dir)):
+        if filename.startswith('rating_') and filename.endswith('.csv'):
+            with open(os.path.join(rating_dir, filename), 'rb') as f:
+                digests[filename] = hashlib.sha256(f.read()).hexdigest()
+    return digests
+
+
+def _atomic_save(path, array):
+    # Replace rather than overwrite so readers that have the old file mapped keep a valid view
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        np.save(f, array)
+    os.replace(tmp_path, path)
+
+
+def _atomic_write(path, data):
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def _write_strings(columnar_dir, name, values):
+    offsets = np.zeros(len(values) + 1, dtype=np.int64)
+    np.cumsum([len(value) for value in values], out=offsets[1:])
+    _atomic_save(os.path.join(columnar_dir, column_filename(name, '.offsets.npy')), offsets)
+    _atomic_write(os.path.join(columnar_dir, column_filename(name, '.utf8')), ''.join(values).encode('utf-8'))
+
+
+def write_columnar(buckets, output_dir):
+    """
+    Write rating buckets as one columnar table, rows already in the catalog's
+    order (newest first) so the app can use the arrays as they are.
+
+    buckets is a list of (range_str, DataFrame). Integer columns are int32
+    .npy arrays. Categorical columns are a .npy array of codes plus their
+    categories as a string table; other string columns are a string table:
+    a UTF-8 blob plus an int64 .npy array of character offsets into the
+    decoded text. The manifest records the sha256 of each bucket CSV in
+    output_dir so a reader can tell whether the table still matches them.
+    """
+    columnar_dir = os.path.join(output_dir, COLUMNAR_DIR)
+    os.makedirs(columnar_dir, exist_ok=True)
+
+    combined = combine_buckets(buckets)
+
+    for column in INT_COLUMNS:
+        values = combined[column].to_numpy(dtype=np.int32)
+        _atomic_save(os.path.join(columnar_dir, column_filename(column, '.npy')), values)
+
+    for column in COLUMNS_ORDER:
+        if column in INT_COLUMNS:
+            continue
+        values = combined[column].astype(str).tolist()
+        if column in CATEGORICAL_COLUMNS:
+            categorical = pd.Categorical(values)
+            _atomic_save(os.path.join(columnar_dir, column_filename(column, '.codes.npy')), categorical.codes)
+            _write_strings(columnar_dir, column + ' categories', list(categorical.categories))
+        else:
+            _write_strings(columnar_dir, column, values)
+
+    manifest = {
+        'format_version': FORMAT_VERSION,
+        'rows': len(combined),
+        'int_columns': INT_COLUMNS,
+        'categorical_columns': CATEGORICAL_COLUMNS,
+        'str_columns': [column for column in STR_COLUMNS if column not in CATEGORICAL_COLUMNS],
+        'ranges': [range_str for range_str, _ in buckets],
+        'sources': source_digests(output_dir),
+    }
+    # The manifest goes last, a reader never sees it before the columns it describes
+    _atomic_write(os.path.join(columnar_dir, MANIFEST_FILE), json.dumps(manifest, indent=2).encode('utf-8'))
+    return os.path.join(columnar_dir, MANIFEST_FILE)
+
+
+class ColumnarTable:
+    """
+    Read-only view over a table written by write_columnar.
+
+    Integer columns and categorical codes are memory-mapped and used as the
+    frame's columns without copying, so every process that opens the table
+    shares the same page-cache pages. Only the string tables are decoded.
+    """
+
+    def __init__(self, columnar_dir, manifest):
+        self.columnar_dir = columnar_dir
+        self.manifest = manifest
+        self.rows = manifest['rows']
+
+    @classmethod
+    def open(cls, columnar_dir):
+        with open(os.path.join(columnar_dir, MANIFEST_FILE), 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        if manifest.get('format_version') != FORMAT_VERSION:
+            raise ValueError(f"Unsupported columnar format version {manifest.get('format_version')}")
+        return cls(columnar_dir, manifest)
+
+    def is_fresh(self, rating_dir):
+        """True if the table was written from exactly the bucket CSVs now in rating_dir"""
+        return self.manifest['sources'] == source_digests(rating_dir)
+
+    def _load(self, name, suffix):
+        return np.load(os.path.join(self.columnar_dir, column_filename(name, suffix)), mmap_mode='r')
+
+    def int_column(self, column):
+        """Memory-mapped int32 array, no copy is made"""
+        return self._load(column, '.npy')
+
+    def str_column(self, column):
+        """List of Python strings, decoded with a single pass over the blob"""
+        offsets = self._load(column, '.offsets.npy')
+        with open(os.path.join(self.columnar_dir, column_filename(column, '.utf8')), 'rb') as f:
+            text = f.read().decode('utf-8')
+        bounds = offsets.tolist()
+        return [text[start:stop] for start, stop in zip(bounds[:-1], bounds[1:])]
+
+    def categorical_column(self, column):
+        """Categorical over the memory-mapped codes"""
+        categories = pd.Index(self.str_column(column + ' categories'))
+        return pd.Categorical.from_codes(self._load(column, '.codes.npy'), categories=categories)
+
+    def to_frame(self):
+        """The whole table as one DataFrame in stored (catalog) order"""
+        columns = {column: self.int_column(column) for column in self.manifest['int_columns']}
+        columns.update({column: self.categorical_column(column) for column in self.manifest['categorical_columns']})
+        columns.update({column: np.array(self.str_column(column), dtype=object) for column in self.manifest['str_columns']})
+        return pd.DataFrame({column: columns[column] for column in COLUMNS_ORDER}, copy=False)
+
+
+def columnar_manifest_path(rating_dir):
+    return os.path.join(rating_dir, COLUMNAR_DIR, MANIFEST_FILE)
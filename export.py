@@ -0,0 +1,70 @@
+import zlib
+
+import numpy as np
+
+# Rows encoded per chunk of a streamed export
+CHUNK_ROWS = 1000
+
+GZIP_LEVEL = 6
+
+FORMATS = {
+    'ndjson': ('application/x-ndjson', 'problems.ndjson'),
+    'csv': ('text/csv', 'problems.csv'),
+}
+
+
+def export_positions(catalog, bitmap, since=None):
+    """
+    Catalog rows to export, oldest first (ascending Problem Number), so new
+    problems land at the end and earlier byte offsets stay valid for resuming.
+    since keeps only problems numbered above it, for pulling deltas.
+    """
+    positions = catalog.facets.rows(bitmap)[::-1]
+    if since is not None:
+        numbers = catalog.problems['Problem Number'].to_numpy()
+        positions = positions[numbers[positions] > since]
+    return positions
+
+
+def ndjson_length(row_json, positions):
+    """Total bytes of the NDJSON body, one row per line"""
+    offsets = row_json.offsets
+    return int((offsets[positions + 1] - offsets[positions]).sum()) + len(positions)
+
+
+def iter_ndjson(row_json, positions, start=0, stop=None):
+    """
+    NDJSON body bytes [start, stop) in chunks of CHUNK_ROWS rows. Chunks
+    before start are skipped using the row lengths, without encoding them.
+    """
+    offsets = row_json.offsets
+    line_ends = np.cumsum(offsets[positions + 1] - offsets[positions] + 1)
+    total = int(line_ends[-1]) if len(line_ends) else 0
+    stop = total if stop is None else min(stop, total)
+    first = int(np.searchsorted(line_ends, start, side='right'))
+    first -= first % CHUNK_ROWS
+    position = int(line_ends[first - 1]) if first else 0
+    for chunk_start in range(first, len(positions), CHUNK_ROWS):
+        if position >= stop:
+            break
+        chunk = row_json.join_lines(positions[chunk_start:chunk_start + CHUNK_ROWS])
+        yield chunk[max(start - position, 0):stop - position]
+        position += len(chunk)
+
+
+def iter_csv(problems, positions):
+    """CSV body in chunks of CHUNK_ROWS rows, header first"""
+    yield problems.iloc[:0].to_csv(index=False).encode('utf-8')
+    for chunk_start in range(0, len(positions), CHUNK_ROWS):
+        chunk = problems.iloc[positions[chunk_start:chunk_start + CHUNK_ROWS]]
+        yield chunk.to_csv(index=False, header=False).encode('utf-8')
+
+
+def gzip_chunks(chunks):
+    """Compress a stream of chunks into one gzip member as it goes"""
+    compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
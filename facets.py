@@ -0,0 +1,146 @@
+from datetime import date
+
+import numpy as np
+
+import bitset
+
+# Contest Name prefixes that identify a contest series, everything else with a
+# name is 'other' and problems without one are 'none'
+CONTEST_TYPES = ['weekly', 'biweekly', 'other', 'none']
+
+EPOCH = date(1970, 1, 1)
+
+
+def parse_day(value):
+    """'2024-03-01' -> days since 1970-01-01"""
+    return (date.fromisoformat(value) - EPOCH).days
+
+
+def contest_types(contest_names):
+    """CONTEST_TYPES index for each Contest Name"""
+    lowered = contest_names.str.lower()
+    types = np.full(len(contest_names), CONTEST_TYPES.index('other'), dtype=np.int8)
+    types[lowered.str.startswith('weekly').to_numpy()] = CONTEST_TYPES.index('weekly')
+    types[lowered.str.startswith('biweekly').to_numpy()] = CONTEST_TYPES.index('biweekly')
+    types[(lowered == '').to_numpy()] = CONTEST_TYPES.index('none')
+    return types
+
+
+class FacetIndex:
+    """
+    Bitmap indexes over the rows of the combined catalog frame.
+
+    Every tag and contest type has a packed bitset of the rows carrying it
+    (the tag vocabulary's per-row bitmasks), so tag AND/OR/NOT and
+    contest-type filters are a few bitwise operations over n/8 bytes. Rating and date bounds come from sorted columns by binary
+    search. Facet counts for all tags are one AND plus popcount over the
+    stacked tag bitmaps.
+    """
+
+    def __init__(self, problems, rating_order, dates):
+        self.size = len(problems)
+        # Whole 64-bit words, so popcounts can run on uint64 views
+        self.nbytes = (self.size + 63) // 64 * 8
+
+        # Tag vocabulary and one bitmap row per tag
+        tag_lists = problems['Tags'].str.lower().str.split(', ')
+        exploded = tag_lists.explode()
+        exploded = exploded[exploded.notna() & (exploded != '')]
+        codes, vocabulary = exploded.factorize(sort=True)
+        self.tags = list(vocabulary)
+        self.tag_ids = {tag: i for i, tag in enumerate(self.tags)}
+        bits = np.zeros((len(self.tags), self.nbytes * 8), dtype=bool)
+        bits[codes, exploded.index.to_numpy()] = True
+        self.tag_bitmaps = np.packbits(bits, axis=1, bitorder='little')
+
+        types = contest_types(problems['Contest Name'])
+        self.contest_bitmaps = np.vstack([
+            bitset.pack_numbers(np.flatnonzero(types == i), self.nbytes * 8)
+            for i in range(len(CONTEST_TYPES))
+        ])
+
+        # Exact contest names as categorical codes
+        contest_codes, contest_names = problems['Contest Name'].str.lower().factorize()
+        self.contest_codes = contest_codes.astype(np.int32)
+        self.contest_ids = {name: i for i, name in enumerate(contest_names) if name}
+
+        ratings = problems['Problem Rating'].to_numpy()
+        self.rating_order = rating_order
+        self.sorted_ratings = ratings[rating_order]
+
+        # Unknown dates are relative ones like "today", i.e. the newest
+        known = dates[dates >= 0]
+        dates = np.where(dates >= 0, dates, known.max() if len(known) else 0)
+        self.date_order = np.argsort(dates, kind='stable')
+        self.sorted_dates = dates[self.date_order]
+
+        self.all_rows = bitset.pack_numbers(np.arange(self.size), self.nbytes * 8)
+
+    def _rows_bitmap(self, rows):
+        return bitset.pack_numbers(rows, self.nbytes * 8)
+
+    def _range_bitmap(self, order, sorted_values, low, high):
+        start = 0 if low is None else np.searchsorted(sorted_values, low, side='left')
+        end = len(sorted_values) if high is None else np.searchsorted(sorted_values, high, side='right')
+        return self._rows_bitmap(order[start:end])
+
+    def _tag_bitmap(self, tag):
+        tag_id = self.tag_ids.get(tag.strip().lower())
+        if tag_id is None:
+            return np.zeros(self.nbytes, dtype=np.uint8)
+        return self.tag_bitmaps[tag_id]
+
+    def has_tag(self, tag, rows):
+        """Whether each of the given rows carries the tag"""
+        return bitset.contains(self._tag_bitmap(tag), rows)
+
+    def query(self, all_tags=(), any_tags=(), not_tags=(), min_rating=None, max_rating=None,
+              contest_types=(), contest=None, date_from=None, date_to=None):
+        """
+        Bitmap of the rows matching every given filter. Unknown tags match
+        nothing; dates are days since the epoch.
+        """
+        result = self.all_rows.copy()
+        for tag in all_tags:
+            result &= self._tag_bitmap(tag)
+        if any_tags:
+            any_bitmap = np.zeros(self.nbytes, dtype=np.uint8)
+            for tag in any_tags:
+                any_bitmap |= self._tag_bitmap(tag)
+            result &= any_bitmap
+        for tag in not_tags:
+            result &= ~self._tag_bitmap(tag)
+        if contest_types:
+            type_bitmap = np.zeros(self.nbytes, dtype=np.uint8)
+            for contest_type in contest_types:
+                type_bitmap |= self.contest_bitmaps[CONTEST_TYPES.index(contest_type)]
+            result &= type_bitmap
+        if contest is not None:
+            code = self.contest_ids.get(contest.strip().lower())
+            if code is None:
+                return np.zeros(self.nbytes, dtype=np.uint8)
+            result &= self._rows_bitmap(np.flatnonzero(self.contest_codes == code))
+        if min_rating is not None or max_rating is not None:
+            result &= self._range_bitmap(self.rating_order, self.sorted_ratings, min_rating, max_rating)
+        if date_from is not None or date_to is not None:
+            result &= self._range_bitmap(self.date_order, self.sorted_dates, date_from, date_to)
+        return result
+
+    def rows(self, bitmap):
+        """Row ids set in a bitmap, ascending (the catalog's newest-first order)"""
+        rows = bitset.unpack_numbers(bitmap)
+        return rows[rows < self.size]
+
+    def tag_counts(self, bitmap):
+        """{tag: matching rows carrying it} for every tag present in the result"""
+        nonzero = np.flatnonzero(bitmap)
+        if len(nonzero) < self.nbytes // 4:
+            # Sparse result: only bytes with a matching row can contribute
+            counts = bitset.popcount(self.tag_bitmaps[:, nonzero] & bitmap[nonzero], axis=1)
+        else:
+            counts = bitset.popcount(self.tag_bitmaps & bitmap, axis=1)
+        return {self.tags[i]: int(counts[i]) for i in np.flatnonzero(counts)}
+
+    def contest_type_counts(self, bitmap):
+        counts = bitset.popcount(self.contest_bitmaps & bitmap, axis=1)
+        return {contest_type: int(count) for contest_type, count in zip(CONTEST_TYPES, counts)}
@@ -1,29 +1,127 @@
 import os
+import gzip
+import hashlib
+import shutil
 import pandas as pd
 import json
 
-def generate_static_files():
+try:
+    import brotli
+except ImportError:  # .br siblings are only written when brotli is installed
+    brotli = None
+
+# Per-range shards, the search shard and their manifest live here inside docs/.
+# The site's pages.js reads the manifest and then only the shard it shows.
+DATA_DIR = 'data'
+MANIFEST_FILE = 'manifest.json'
+
+# Files from static/ the Pages site uses; script.js needs the Flask API
+SITE_ASSETS = ('style.css', 'pages.js')
+
+def write_if_changed(path, data):
+    """Write bytes to path unless the file already holds them. Returns True if written."""
+    if os.path.exists(path):
+        with open(path, 'rb') as f:
+            if f.read() == data:
+                return False
+    with open(path, 'wb') as f:
+        f.write(data)
+    return True
+
+def write_compressed(path, data):
+    """Write path plus .gz and (if available) .br siblings for static hosts that serve them"""
+    write_if_changed(path, data)
+    write_if_changed(path + '.gz', gzip.compress(data, compresslevel=9, mtime=0))
+    if brotli is not None:
+        write_if_changed(path + '.br', brotli.compress(data, quality=11))
+
+def write_shard(data_dir, prefix, payload, written):
+    """
+    Write a JSON shard under a content-hashed name so it can be cached forever.
+    An existing file with the same name already has this content and is left alone.
+    """
+    data = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+    digest = hashlib.sha256(data).hexdigest()[:12]
+    filename = f'{prefix}.{digest}.json'
+    path = os.path.join(data_dir, filename)
+    if not os.path.exists(path):
+        write_compressed(path, data)
+    written.update({filename, filename + '.gz', filename + '.br'})
+    return filename, digest
+
+def build_search_index(buckets):
+    """Compact rows for client-side search: number, lowercased name and tags, range"""
+    rows = []
+    for rating_range, df in buckets:
+        for number, name, tags in zip(df['Problem Number'], df['Problem Name'].fillna(''), df['Tags'].fillna('')):
+            rows.append([int(number), str(name).lower(), str(tags).lower(), rating_range])
+    rows.sort(key=lambda row: -row[0])
+    return {'fields': ['number', 'name', 'tags', 'range'], 'rows': rows}
+
+def generate_shards(static_dir, buckets):
+    """
+    Write one content-hashed shard per rating range, a search shard and a small
+    manifest pointing at them, then remove shards nothing points at anymore.
+    Returns the manifest.
+    """
+    data_dir = os.path.join(static_dir, DATA_DIR)
+    os.makedirs(data_dir, exist_ok=True)
+
+    written = set()
+    manifest = {'ranges': {}, 'search': None}
+    for rating_range, df in buckets:
+        records = df.fillna('').to_dict('records')
+        filename, digest = write_shard(data_dir, f'problems.{rating_range}', records, written)
+        manifest['ranges'][rating_range] = {'file': filename, 'count': len(records), 'hash': digest}
+
+    filename, digest = write_shard(data_dir, 'search', build_search_index(buckets), written)
+    manifest['search'] = {'file': filename, 'hash': digest}
+
+    # The manifest keeps a fixed name; it's the one file clients revalidate
+    manifest['version'] = hashlib.sha256(json.dumps(manifest, sort_keys=True).encode('utf-8')).hexdigest()[:12]
+    write_compressed(os.path.join(data_dir, MANIFEST_FILE), json.dumps(manifest, indent=1, sort_keys=True).encode('utf-8'))
+    written.update({MANIFEST_FILE, MANIFEST_FILE + '.gz', MANIFEST_FILE + '.br'})
+
+    for filename in os.listdir(data_dir):
+        if filename not in written:
+            os.remove(os.path.join(data_dir, filename))
+    return manifest
+
+def generate_static_files(buckets=None):
+    """
+    Build the GitHub Pages site in docs/. buckets is an optional list of
+    (range_str, DataFrame) already in memory; otherwise rating_groups/ is read.
+    """
     # Create static directory
     static_dir = 'docs'  # GitHub Pages uses 'docs' or 'root'
     if not os.path.exists(static_dir):
         os.makedirs(static_dir)
     
     # Copy static assets
-    os.system('cp -r static/* docs/')
+    for asset in SITE_ASSETS:
+        shutil.copy2(os.path.join('static', asset), os.path.join(static_dir, asset))
     
     # Generate problems JSON
     problems_data = {}
     rating_dir = 'rating_groups'
     
-    for file in os.listdir(rating_dir):
-        if file.startswith('rating_') and file.endswith('.csv'):
-            rating_range = file.replace('rating_', '').replace('.csv', '')
-            df = pd.read_csv(os.path.join(rating_dir, file))
-            problems_data[rating_range] = df.fillna('').to_dict('records')
+    if buckets is None:
+        buckets = []
+        for file in os.listdir(rating_dir):
+            if file.startswith('rating_') and file.endswith('.csv'):
+                rating_range = file.replace('rating_', '').replace('.csv', '')
+                buckets.append((rating_range, pd.read_csv(os.path.join(rating_dir, file))))
     
-    # Save as JSON
-    with open('docs/problems.json', 'w') as f:
-        json.dump(problems_data, f)
+    buckets = sorted(buckets, key=lambda bucket: int(bucket[0].split('_to_')[0]))
+    
+    # Per-range shards: first paint needs only the manifest and one shard
+    manifest = generate_shards(static_dir, buckets)
+    print(f"Wrote manifest {manifest['version']} with {len(manifest['ranges'])} range shards")
+    
+    # The monolithic file is kept for existing consumers
+    for rating_range, df in buckets:
+        problems_data[rating_range] = df.fillna('').to_dict('records')
+    write_if_changed(os.path.join(static_dir, 'problems.json'), json.dumps(problems_data).encode('utf-8'))
 
     # Create index.html
     html_content = '''
@@ -43,6 +141,9 @@ def generate_static_files():
                         <option value="">Select Rating Range</option>
                     </select>
                 </div>
+                <div class="col-md-4">
+                    <input id="searchInput" type="search" class="form-control" placeholder="Search all problems">
+                </div>
             </div>
             <div id="loading" class="d-none">
                 <div class="spinner-border text-primary" role="status">
@@ -52,13 +153,12 @@ def generate_static_files():
             <div id="problemStats"></div>
             <div id="problemTable"></div>
         </div>
-        <script src="script.js"></script>
+        <script src="pages.js"></script>
     </body>
     </html>
     '''
     
-    with open('docs/index.html', 'w') as f:
-        f.write(html_content)
+    write_if_changed(os.path.join(static_dir, 'index.html'), html_content.encode('utf-8'))
 
 if __name__ == '__main__':
     generate_static_files()
\ No newline at end of file
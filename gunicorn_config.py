@@ -1,5 +1,23 @@
-# filepath: /Users/nileshkumar/Desktop/Leetcode-Ladder/gunicorn_config.py
-bind = "0.0.0.0:$PORT"
-workers = 4
+import gc
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '10000')}"
+workers = int(os.environ.get('WEB_CONCURRENCY', 4))
 threads = 2
-timeout = 120
\ No newline at end of file
+timeout = 120
+
+# Import the app, and with it the catalog, once in the master. Forked workers
+# share those pages copy-on-write instead of each loading their own copy.
+preload_app = os.environ.get('PRELOAD_APP', '1') != '0'
+
+def when_ready(server):
+    # With preloading, build the lazily computed indexes in the master too
+    if server.cfg.preload_app:
+        from catalog import get_catalog
+        get_catalog().warm()
+        server.log.info("Catalog warmed in master")
+
+def pre_fork(server, worker):
+    # Move everything allocated so far out of the collector's reach: a GC pass
+    # in a worker would otherwise write to every shared object and un-share it
+    gc.freeze()
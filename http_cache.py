@@ -0,0 +1,184 @@
+import gzip
+import hashlib
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+from functools import wraps
+
+from flask import current_app, request
+
+from catalog import get_catalog
+from metrics import Counter
+
+try:
+    import brotli
+except ImportError:  # brotli is optional, gzip is always available
+    brotli = None
+
+# Bodies smaller than this are not worth compressing
+MIN_COMPRESS_SIZE = 512
+
+# Bytes of response bodies, compressed variants included, kept in memory per process
+MAX_CACHE_BYTES = 32 * 1024 * 1024
+
+# Variants are compressed on the request that first needs them, so favour speed
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+# Requests with any of these parameters set aren't cached: free-text searches
+# and page offsets make nearly every URL unique and would only churn the cache.
+# An empty value (the UI's ?search=) is the same as leaving it out.
+UNCACHED_ARGS = ('search', 'q', 'offset')
+
+RESPONSE_CACHE = Counter('response_cache_total', "Catalog-cached responses by outcome (hit, miss, not_modified, uncached)",
+                         ['endpoint', 'result'])
+
+
+def compress(data, encoding):
+    if encoding == 'gzip':
+        return gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+    return brotli.compress(data, quality=BROTLI_QUALITY)
+
+
+class CachedBody:
+    """
+    One response body with its validators and the compressed variants
+    requested so far. A variant is only compressed once a client accepting
+    that encoding asks for it.
+    """
+
+    def __init__(self, key, data, mimetype, etag, last_modified):
+        self.key = key
+        self.mimetype = mimetype
+        self.etag = etag
+        self.last_modified = last_modified
+        self.variants = {'identity': data}
+        self.encodings = ['identity']
+        if len(data) >= MIN_COMPRESS_SIZE:
+            self.encodings.append('gzip')
+            if brotli is not None:
+                self.encodings.append('br')
+        self.size = len(data)
+
+    def variant(self, encoding):
+        data = self.variants.get(encoding)
+        if data is None:
+            data = compress(self.variants['identity'], encoding)
+            _add_variant(self, encoding, data)
+        return data
+
+    def variant_etag(self, encoding):
+        # Each encoding is a different representation, so it needs its own strong ETag
+        return self.etag if encoding == 'identity' else f"{self.etag}-{encoding}"
+
+    def etags(self):
+        return [self.variant_etag(encoding) for encoding in self.encodings]
+
+
+_cache = OrderedDict()
+_cache_bytes = 0
+_cache_lock = threading.Lock()
+
+
+def _evict():
+    global _cache_bytes
+    while _cache_bytes > MAX_CACHE_BYTES:
+        _, entry = _cache.popitem(last=False)
+        _cache_bytes -= entry.size
+
+
+def _get_cached(key):
+    with _cache_lock:
+        entry = _cache.get(key)
+        if entry is not None:
+            _cache.move_to_end(key)
+        return entry
+
+
+def _put_cached(key, entry):
+    global _cache_bytes
+    if entry.size > MAX_CACHE_BYTES:
+        return
+    with _cache_lock:
+        previous = _cache.pop(key, None)
+        if previous is not None:
+            _cache_bytes -= previous.size
+        _cache[key] = entry
+        _cache_bytes += entry.size
+        _evict()
+
+
+def _add_variant(entry, encoding, data):
+    global _cache_bytes
+    with _cache_lock:
+        # Another thread may have compressed the same variant meanwhile
+        if encoding in entry.variants:
+            return
+        entry.variants[encoding] = data
+        entry.size += len(data)
+        # Only count it if the entry is still cached, evicted entries just finish their request
+        if _cache.get(entry.key) is entry:
+            _cache_bytes += len(data)
+            _evict()
+
+
+def choose_encoding(entry):
+    """Pick the best encoding the client accepts"""
+    accepted = request.accept_encodings
+    for encoding in ('br', 'gzip'):
+        if encoding in entry.encodings and accepted[encoding]:
+            return encoding
+    return 'identity'
+
+
+def not_modified(entry):
+    if request.if_none_match:
+        return any(request.if_none_match.contains(etag) for etag in entry.etags())
+    if request.if_modified_since:
+        return entry.last_modified <= request.if_modified_since
+    return False
+
+
+def catalog_cached(view):
+    """
+    Serve a view that depends only on the catalog and the request URL from a
+    byte-bounded in-memory LRU cache of bodies, with ETag/Last-Modified
+    revalidation. The view runs at most once per catalog version and URL
+    while it stays cached. Searches and offset pages bypass the cache.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if any(request.args.get(name, '').strip() for name in UNCACHED_ARGS):
+            RESPONSE_CACHE.inc(endpoint=request.endpoint, result='uncached')
+            return view(*args, **kwargs)
+        catalog = get_catalog()
+        key = (catalog.version, request.full_path)
+        entry = _get_cached(key)
+        RESPONSE_CACHE.inc(endpoint=request.endpoint, result='miss' if entry is None else 'hit')
+
+        if entry is None:
+            response = current_app.make_response(view(*args, **kwargs))
+            if response.status_code != 200 or response.direct_passthrough:
+                return response
+            etag = hashlib.sha1(f"{catalog.version}:{request.full_path}".encode()).hexdigest()
+            last_modified = datetime.fromtimestamp(catalog.last_modified, tz=timezone.utc)
+            entry = CachedBody(key, response.get_data(), response.mimetype, etag, last_modified)
+            _put_cached(key, entry)
+
+        encoding = choose_encoding(entry)
+        if not_modified(entry):
+            RESPONSE_CACHE.inc(endpoint=request.endpoint, result='not_modified')
+            response = current_app.response_class(status=304)
+        else:
+            response = current_app.response_class(entry.variant(encoding), mimetype=entry.mimetype)
+            if encoding != 'identity':
+                response.headers['Content-Encoding'] = encoding
+
+        response.set_etag(entry.variant_etag(encoding))
+        response.last_modified = entry.last_modified
+        response.vary.add('Accept-Encoding')
+        # Let browsers and the CDN keep a copy but revalidate it on every use
+        response.cache_control.no_cache = True
+        return response
+
+    return wrapper
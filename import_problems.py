@@ -3,8 +3,12 @@ from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException
+from concurrent.futures import ThreadPoolExecutor
 import pandas as pd
+import requests
+from requests.adapters import HTTPAdapter
 from bs4 import BeautifulSoup
+import argparse
 import time
 import logging
 import csv
@@ -16,6 +20,25 @@ logger = logging.getLogger(__name__)
 
 OUTPUT_FILE = "leetcode_contest_problems.csv"
 LAST_RUN_INFO_FILE = "last_scrape_info.txt"
+STORE_URL = "sqlite:///leetcode_problems.db"
+
+# lxml is much faster for the many small row fragments; fall back if it's missing
+try:
+    import lxml  # noqa: F401
+    ROW_PARSER = "lxml"
+except ImportError:
+    ROW_PARSER = "html.parser"
+
+PROBLEMS_URL = "https://clist.by/problems/"
+PROBLEMS_SEARCH = "resource:Leetcode"
+
+# HTTP backend: pages fetched at once, and a hard stop for a full backfill
+HTTP_CONCURRENCY = 4
+HTTP_MAX_PAGES = 200
+HTTP_TIMEOUT = 30
+HTTP_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.114 Safari/537.36'
+}
 
 def setup_driver():
     try:
@@ -89,8 +112,42 @@ def load_existing_data():
             logger.error(f"Error loading existing data: {e}")
     return pd.DataFrame()
 
+class IncrementalRowExtractor:
+    """
+    Pull problem rows out of the live page without re-parsing it. The browser
+    returns only the rows past our high-water mark, so each row is parsed and
+    passed to extract_problem_data exactly once however long the page grows.
+    """
+
+    NEW_ROWS_SCRIPT = """
+        return Array.from(document.querySelectorAll('tr.show-hidden-activity-on-hover'))
+            .slice(arguments[0])
+            .map(function (row) { return row.outerHTML; });
+    """
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.seen = 0
+
+    def new_rows(self):
+        """Extracted data for the rows added since the previous call"""
+        row_html = self.driver.execute_script(self.NEW_ROWS_SCRIPT, self.seen)
+        if not row_html:
+            return []
+        self.seen += len(row_html)
+
+        # One parse for the whole batch; rows need a table around them to parse as rows
+        soup = BeautifulSoup('<table>' + ''.join(row_html) + '</table>', ROW_PARSER)
+        rows = soup.find_all('tr', class_='show-hidden-activity-on-hover')
+        return [row_data for row_data in map(extract_problem_data, rows) if row_data]
+
 def scroll_page(driver, last_problem_number=None):
-    """Scroll the page, but stop if we reach problems with numbers less than last_problem_number"""
+    """
+    Scroll the page, but stop if we reach problems with numbers less than last_problem_number.
+    Returns the extracted rows, collected incrementally while scrolling.
+    """
+    extractor = IncrementalRowExtractor(driver)
+    scraped_rows = []
     try:
         last_height = driver.execute_script("return document.body.scrollHeight")
         found_old_data = False
@@ -105,36 +162,24 @@ def scroll_page(driver, last_problem_number=None):
             time.sleep(3)
             scroll_count += 1
 
+            # Only the rows loaded by this scroll are parsed
+            new_rows = extractor.new_rows()
+            scraped_rows.extend(new_rows)
+
             # Check if we've reached data we already have
             if last_problem_number:
-                soup = BeautifulSoup(driver.page_source, "html.parser")
-                problem_rows = soup.find_all('tr', class_='show-hidden-activity-on-hover')
-
-                # Check the last few visible rows
-                for row in problem_rows[-10:] if len(problem_rows) > 10 else problem_rows:
-                    problem_cell = row.find('td', class_='problem-name-column')
-                    if problem_cell:
-                        problem_links = problem_cell.find_all('a')
-                        for link in problem_links:
-                            if 'leetcode.com/problems/' in link.get('href', ''):
-                                full_text = ' '.join(link.text.strip().split())
-                                try:
-                                    number_part = full_text.split()[0]
-                                    if number_part.isdigit() and int(number_part) <= last_problem_number:
-                                        consecutive_old_problems += 1
-                                        logger.info(f"Found problem #{number_part} which is <= last problem #{last_problem_number}, count: {consecutive_old_problems}/{required_old_problems}")
-
-                                        if consecutive_old_problems >= required_old_problems:
-                                            logger.info(f"Found {consecutive_old_problems} consecutive old problems. Stopping scroll.")
-                                            found_old_data = True
-                                            break
-                                    else:
-                                        consecutive_old_problems = 0  # Reset counter if we find a newer problem
-                                except:
-                                    pass
-
-                        if found_old_data:
+                for row_data in new_rows:
+                    number_part = row_data['Problem Number']
+                    if number_part and number_part.isdigit() and int(number_part) <= last_problem_number:
+                        consecutive_old_problems += 1
+                        logger.info(f"Found problem #{number_part} which is <= last problem #{last_problem_number}, count: {consecutive_old_problems}/{required_old_problems}")
+
+                        if consecutive_old_problems >= required_old_problems:
+                            logger.info(f"Found {consecutive_old_problems} consecutive old problems. Stopping scroll.")
+                            found_old_data = True
                             break
+                    else:
+                        consecutive_old_problems = 0  # Reset counter if we find a newer problem
 
             # Calculate new scroll height and compare with last scroll height
             new_height = driver.execute_script("return document.body.scrollHeight")
@@ -147,16 +192,18 @@ def scroll_page(driver, last_problem_number=None):
                     logger.info("Reached end of page, no more content to load.")
                     break
             last_height = new_height
-            logger.info(f"Scrolled to height: {new_height}")
+            logger.info(f"Scrolled to height: {new_height}, {extractor.seen} rows so far")
 
         # Final scroll to ensure everything is loaded
         driver.execute_script("window.scrollTo(0, 0);")
         time.sleep(1)
         driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
         time.sleep(2)
+        scraped_rows.extend(extractor.new_rows())
 
     except Exception as e:
         logger.error(f"Error while scrolling: {e}")
+    return scraped_rows
 
 def clean_text(text):
     """Clean text by removing extra whitespace and newlines"""
@@ -227,14 +274,140 @@ def extract_problem_data(row):
         logger.error(f"Error extracting data from row: {str(e)}")
         return None
 
-def main():
+def create_http_session():
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=HTTP_CONCURRENCY)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    session.headers.update(HTTP_HEADERS)
+    return session
+
+def fetch_problem_page(session, page, base_url=PROBLEMS_URL):
+    """Fetch one page of the problem list and return its extracted rows"""
+    response = session.get(base_url, params={'search': PROBLEMS_SEARCH, 'page': page}, timeout=HTTP_TIMEOUT)
+    if response.status_code == 404:
+        return []
+    response.raise_for_status()
+
+    soup = BeautifulSoup(response.text, ROW_PARSER)
+    rows = soup.find_all('tr', class_='show-hidden-activity-on-hover')
+    return [row_data for row_data in map(extract_problem_data, rows) if row_data]
+
+def page_reaches(page_rows, last_problem_number):
+    """True if a page contains a problem we already have"""
+    for row_data in page_rows:
+        number = row_data['Problem Number']
+        if number and str(number).isdigit() and int(number) <= last_problem_number:
+            return True
+    return False
+
+def scrape_problems_http(last_problem_number=None, base_url=None,
+                         concurrency=HTTP_CONCURRENCY, max_pages=HTTP_MAX_PAGES):
+    """
+    Fetch the problem list page by page over pooled HTTP instead of scrolling
+    a browser. Pages are requested concurrency at a time; we stop after the
+    batch that reaches last_problem_number, or at the first empty page.
+    Yields extracted rows in page order (newest first). base_url defaults to
+    PROBLEMS_URL, looked up at call time so tests can point it at a fixture
+    server.
+    """
+    base_url = base_url or PROBLEMS_URL
+    session = create_http_session()
+    page = 1
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        while page <= max_pages:
+            pages = list(range(page, min(page + concurrency, max_pages + 1)))
+            logger.info(f"Fetching pages {pages[0]}-{pages[-1]}...")
+            results = list(executor.map(lambda p: fetch_problem_page(session, p, base_url), pages))
+
+            done = False
+            for page_rows in results:
+                if not page_rows:
+                    logger.info("Reached an empty page, no more content to load.")
+                    done = True
+                    break
+                yield from page_rows
+                if last_problem_number and page_reaches(page_rows, last_problem_number):
+                    logger.info(f"Reached problem #{last_problem_number}. Stopping.")
+                    done = True
+                    break
+            if done:
+                return
+            page += concurrency
+        logger.warning(f"Stopped after {max_pages} pages")
+
+def scrape_problems_selenium(driver, last_problem_number=None):
+    """Load the problem list in a browser, scroll it and return the extracted rows"""
+    url = "https://clist.by/problems/?search=resource%3ALeetcode"
+
+    logger.info("Opening webpage...")
+    driver.get(url)
+
+    # Wait for table to load
+    WebDriverWait(driver, 10).until(
+        EC.presence_of_element_located((By.CLASS_NAME, "table-float-head"))
+    )
+
+    logger.info("Scrolling through page...")
+    scraped_rows = scroll_page(driver, last_problem_number)
+    logger.info(f"Found {len(scraped_rows)} problems on the page")
+    return scraped_rows
+
+def open_store(store_url):
+    """Open the SQLite store, seeding it from the master CSV on first use"""
+    from problem_store import ProblemStore
+
+    store = ProblemStore(store_url)
+    if store.count() == 0 and os.path.exists(OUTPUT_FILE):
+        existing_df = load_existing_data()
+        if not existing_df.empty:
+            existing_df = existing_df.dropna(subset=['Problem Number'])
+            store.upsert(existing_df, get_last_problem_number())
+            logger.info(f"Seeded problem store with {len(existing_df)} problems from {OUTPUT_FILE}")
+    return store
+
+def save_to_store(store, new_df, highest_problem_number):
+    """
+    Upsert the new problems and record the highest problem number in one
+    transaction. Only the new rows are written; the CSV export is a separate
+    step (export_store).
+    """
+    logger.info(f"Highest problem number found during this scrape: {highest_problem_number}")
+    upserted = store.upsert(new_df, highest_problem_number if highest_problem_number > 0 else None)
+    logger.info(f"Upserted {upserted} of {len(new_df)} problems into the problem store")
+
+    logger.info("\nData Summary:")
+    logger.info(f"New problems added: {len(new_df)}")
+    logger.info(f"Total rows in store: {store.count()}")
+    logger.info(f"Highest problem number: {highest_problem_number}")
+
+def export_store(store_url):
+    """Rewrite the master CSV and last_scrape_info.txt from the SQLite store"""
+    from problem_store import ProblemStore
+
+    store = ProblemStore(store_url)
+    store.export_csv(OUTPUT_FILE)
+    last_problem_number = store.get_last_problem_number()
+    if last_problem_number:
+        with open(LAST_RUN_INFO_FILE, 'w') as f:
+            f.write(str(last_problem_number))
+
+def main(backend='selenium', store_url=None):
+    """Scrape new problems into the master table and return them as a DataFrame (None if there were none)"""
     driver = None
+    store = None
     try:
-        # Load existing data
-        existing_df = load_existing_data()
+        if store_url:
+            # The SQLite store is the master table; no need to load the whole CSV
+            store = open_store(store_url)
+            existing_df = pd.DataFrame()
+            last_problem_number = store.get_last_problem_number()
+        else:
+            # Load existing data
+            existing_df = load_existing_data()
 
-        # Get the highest problem number from the previous scrape
-        last_problem_number = get_last_problem_number()
+            # Get the highest problem number from the previous scrape
+            last_problem_number = get_last_problem_number()
 
         # If no last problem number is stored but we have existing data, get it from there
         if last_problem_number is None and not existing_df.empty and 'Problem Number' in existing_df.columns:
@@ -251,33 +424,17 @@ def main():
         else:
             logger.info("No previous scrape information found. Will scrape all available data.")
 
-        driver = setup_driver()
-        url = "https://clist.by/problems/?search=resource%3ALeetcode"
-
-        logger.info("Opening webpage...")
-        driver.get(url)
-
-        # Wait for table to load
-        WebDriverWait(driver, 10).until(
-            EC.presence_of_element_located((By.CLASS_NAME, "table-float-head"))
-        )
-
-        logger.info("Scrolling through page...")
-        scroll_page(driver, last_problem_number)
-
-        logger.info("Extracting data...")
-        soup = BeautifulSoup(driver.page_source, "html.parser")
-
-        # Find all problem rows
-        rows = soup.find_all('tr', class_='show-hidden-activity-on-hover')
-        logger.info(f"Found {len(rows)} problems on the page")
+        if backend == 'http':
+            scraped_rows = scrape_problems_http(last_problem_number)
+        else:
+            driver = setup_driver()
+            scraped_rows = scrape_problems_selenium(driver, last_problem_number)
 
         rows_data = []
         highest_problem_number = last_problem_number if last_problem_number else 0
         skipped_count = 0
 
-        for row in rows:
-            row_data = extract_problem_data(row)
+        for row_data in scraped_rows:
             if row_data and row_data['Problem Number']:
                 try:
                     problem_number = int(row_data['Problem Number'])
@@ -303,7 +460,7 @@ def main():
 
         if not rows_data:
             logger.info("No new problems found since last scrape.")
-            return
+            return None
 
         # Create DataFrame with new data
         new_df = pd.DataFrame(rows_data)
@@ -336,6 +493,10 @@ def main():
                         'Problem Link', 'Contest Name', 'Tags']
         new_df = new_df[columns_order]
 
+        if store:
+            save_to_store(store, new_df, highest_problem_number)
+            return new_df
+
         # Combine with existing data
         if not existing_df.empty:
             # Ensure Problem Number is numeric in existing data too
@@ -385,15 +546,27 @@ def main():
         logger.info(f"Highest problem number: {highest_problem_number}")
         logger.info("\nFirst few rows of extracted data:")
         print(new_df.head().to_string())
+        return new_df
 
     except Exception as e:
         logger.error(f"An error occurred: {e}")
+        return None
     finally:
         if driver:
             driver.quit()
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description='Scrape new LeetCode contest problems from clist.by')
+    parser.add_argument('--backend', choices=['selenium', 'http'], default='selenium',
+                        help='scroll the page in headless Chrome, or fetch the paginated list over HTTP')
+    parser.add_argument('--store', metavar='URL', nargs='?', const=STORE_URL,
+                        help='keep the master table in a SQLite store (upserts)')
+    parser.add_argument('--export-csv', action='store_true',
+                        help=f'with --store, then rewrite {OUTPUT_FILE} and {LAST_RUN_INFO_FILE} from the store')
+    args = parser.parse_args()
+    main(backend=args.backend, store_url=args.store)
+    if args.store and args.export_csv:
+        export_store(args.store)
 
 # Created/Modified files during execution:
 # - leetcode_contest_problems.csv
@@ -0,0 +1,305 @@
+import os
+import threading
+import time
+import logging
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from metrics import Counter, Histogram
+
+logger = logging.getLogger(__name__)
+
+# Overridable so benchmarks and tests can point at a local stub server
+GRAPHQL_URL = os.environ.get('LEETCODE_GRAPHQL_URL', 'https://leetcode.com/graphql')
+REQUEST_TIMEOUT = 10
+
+HEADERS = {
+    'Content-Type': 'application/json',
+    'Referer': 'https://leetcode.com',
+    'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.114 Safari/537.36'
+}
+
+# Keep-alive connections kept open to leetcode.com per process
+POOL_SIZE = 10
+
+# Connection errors and these statuses are transient: the request is retried
+# up to MAX_RETRIES times, waiting RETRY_BACKOFF seconds, then twice as long...
+# Timeouts (connect or read) aren't retried, a worker thread already waited
+# REQUEST_TIMEOUT and an unreachable LeetCode would hold it several times over.
+MAX_RETRIES = 2
+RETRY_BACKOFF = 0.25
+RETRY_STATUSES = (429, 502, 503, 504)
+
+# Profile responses are cached for this many seconds, at most PROFILE_CACHE_SIZE users
+PROFILE_CACHE_TTL = 300
+PROFILE_CACHE_SIZE = 1024
+
+# Batch lookups pack this many users into one aliased GraphQL query and run
+# at most BATCH_MAX_WORKERS of those queries at once per process
+BATCH_CHUNK_SIZE = 10
+BATCH_MAX_WORKERS = 4
+
+MATCHED_USER_FIELDS = """
+        username
+        profile {
+            ranking
+            reputation
+            starRating
+            userAvatar
+        }
+        submitStats: submitStatsGlobal {
+            acSubmissionNum {
+                difficulty
+                count
+            }
+        }"""
+
+CONTEST_RANKING_FIELDS = """
+        rating
+        attendedContestsCount
+        globalRanking"""
+
+USER_PROFILE_QUERY = f"""
+query userPublicProfile($username: String!) {{
+    matchedUser(username: $username) {{{MATCHED_USER_FIELDS}
+    }}
+    userContestRanking(username: $username) {{{CONTEST_RANKING_FIELDS}
+    }}
+}}"""
+
+UPSTREAM_DURATION = Histogram('upstream_request_duration_seconds', "LeetCode GraphQL request latency", ['operation'])
+UPSTREAM_RESPONSES = Counter('upstream_responses_total', "LeetCode GraphQL responses by status", ['operation', 'status'])
+PROFILE_CACHE = Counter('profile_cache_total', "Profile cache lookups by result (hit, miss)", ['result'])
+
+
+def build_batch_profile_query(count):
+    """
+    Aliased query fetching count users at once. User i is bound to $u{i} and
+    answered under the aliases u{i} and u{i}_contest.
+    """
+    params = ', '.join(f'$u{i}: String!' for i in range(count))
+    fields = ''.join(
+        f"""
+    u{i}: matchedUser(username: $u{i}) {{{MATCHED_USER_FIELDS}
+    }}
+    u{i}_contest: userContestRanking(username: $u{i}) {{{CONTEST_RANKING_FIELDS}
+    }}"""
+        for i in range(count)
+    )
+    return f"""
+query batchUserPublicProfiles({params}) {{{fields}
+}}"""
+
+
+class LeetCodeAPIError(Exception):
+    """The LeetCode API answered, but not with usable data"""
+
+    def __init__(self, message, status_code):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries also expire after ttl seconds"""
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls for the same key: the first caller runs the
+    function, everyone who arrives while it is running waits for its result.
+    """
+
+    def __init__(self):
+        self._in_flight = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, fn):
+        with self._lock:
+            future = self._in_flight.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._in_flight[key] = future
+
+        if not owner:
+            return future.result()
+
+        try:
+            future.set_result(fn())
+        except BaseException as e:
+            future.set_exception(e)
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+        return future.result()
+
+
+def create_session():
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=POOL_SIZE)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    session.headers.update(HEADERS)
+    return session
+
+
+_session = create_session()
+_profile_cache = TTLCache(PROFILE_CACHE_SIZE, PROFILE_CACHE_TTL)
+_profile_flight = SingleFlight()
+_batch_executor = ThreadPoolExecutor(max_workers=BATCH_MAX_WORKERS, thread_name_prefix='leetcode-batch')
+
+
+def graphql_request(query, variables, operation='profile'):
+    """
+    POST a query to the LeetCode GraphQL API over the pooled session and return
+    the decoded body. Transient failures are retried with exponential backoff.
+    Raises LeetCodeAPIError for non-200 responses; requests exceptions
+    (timeouts, connection errors) propagate.
+    """
+    for attempt in range(MAX_RETRIES + 1):
+        if attempt:
+            time.sleep(RETRY_BACKOFF * 2 ** (attempt - 1))
+        try:
+            with UPSTREAM_DURATION.time(operation=operation):
+                response = _session.post(
+                    GRAPHQL_URL,
+                    json={'query': query, 'variables': variables},
+                    timeout=REQUEST_TIMEOUT
+                )
+        except requests.exceptions.RequestException as e:
+            UPSTREAM_RESPONSES.inc(operation=operation, status=type(e).__name__)
+            # ConnectTimeout is also a ConnectionError, so timeouts are excluded by name
+            retryable = isinstance(e, requests.exceptions.ConnectionError) and not isinstance(e, requests.exceptions.Timeout)
+            if retryable and attempt < MAX_RETRIES:
+                logger.warning(f"LeetCode API connection failed, retrying: {e}")
+                continue
+            raise
+        UPSTREAM_RESPONSES.inc(operation=operation, status=response.status_code)
+        if response.status_code in RETRY_STATUSES and attempt < MAX_RETRIES:
+            logger.warning(f"LeetCode API returned status {response.status_code}, retrying")
+            continue
+        if response.status_code != 200:
+            raise LeetCodeAPIError(f"LeetCode API returned status {response.status_code}", response.status_code)
+        return response.json()
+
+
+def _fetch_user_profile(username):
+    # Another caller may have filled the cache between our miss and getting here
+    profile = _profile_cache.get(username)
+    if profile is not None:
+        return profile
+
+    data = graphql_request(USER_PROFILE_QUERY, {'username': username})
+    if 'errors' in data:
+        raise LeetCodeAPIError(data['errors'][0]['message'], 404)
+    _profile_cache.set(username, data['data'])
+    return data['data']
+
+
+def get_user_profile(username):
+    """
+    Return the public profile and contest ranking for a user, served from the
+    TTL cache when possible. Concurrent misses for the same username share a
+    single upstream call.
+    """
+    profile = _profile_cache.get(username)
+    PROFILE_CACHE.inc(result='miss' if profile is None else 'hit')
+    if profile is not None:
+        return profile
+    return _profile_flight.do(username, lambda: _fetch_user_profile(username))
+
+
+def _fetch_profile_chunk(usernames):
+    """
+    Fetch one chunk of users with a single aliased query. Returns
+    ({username: profile}, {username: error message}).
+    """
+    variables = {f'u{i}': username for i, username in enumerate(usernames)}
+    try:
+        data = graphql_request(build_batch_profile_query(len(usernames)), variables, operation='batch_profile')
+    except LeetCodeAPIError as e:
+        return {}, {username: str(e) for username in usernames}
+    except requests.exceptions.Timeout:
+        return {}, {username: "Timeout when connecting to LeetCode API" for username in usernames}
+    except requests.exceptions.RequestException as e:
+        return {}, {username: f"Failed to connect to LeetCode API: {e}" for username in usernames}
+
+    # GraphQL reports per-alias failures with the alias as the first path element
+    messages = {}
+    for error in data.get('errors') or []:
+        path = error.get('path') or []
+        if path:
+            messages.setdefault(path[0], error.get('message', 'Unknown error'))
+
+    results = data.get('data') or {}
+    profiles, errors = {}, {}
+    for i, username in enumerate(usernames):
+        alias = f'u{i}'
+        if results.get(alias) is None:
+            errors[username] = messages.get(alias, "That user does not exist.")
+            continue
+        profile = {
+            'matchedUser': results[alias],
+            'userContestRanking': results.get(f'{alias}_contest')
+        }
+        _profile_cache.set(username, profile)
+        profiles[username] = profile
+    return profiles, errors
+
+
+def get_user_profiles(usernames):
+    """
+    Look up many users at once. Cached profiles are served directly; the rest
+    are fetched in chunks of BATCH_CHUNK_SIZE aliased lookups, run
+    concurrently on a bounded pool. A failure only affects the users in the
+    failing chunk or alias.
+
+    Returns ({username: profile}, {username: error message}).
+    """
+    profiles, errors = {}, {}
+    missing = []
+    for username in dict.fromkeys(usernames):
+        profile = _profile_cache.get(username)
+        PROFILE_CACHE.inc(result='miss' if profile is None else 'hit')
+        if profile is not None:
+            profiles[username] = profile
+        else:
+            missing.append(username)
+
+    chunks = [missing[i:i + BATCH_CHUNK_SIZE] for i in range(0, len(missing), BATCH_CHUNK_SIZE)]
+    for chunk_profiles, chunk_errors in _batch_executor.map(_fetch_profile_chunk, chunks):
+        profiles.update(chunk_profiles)
+        errors.update(chunk_errors)
+    return profiles, errors
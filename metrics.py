@@ -0,0 +1,412 @@
+import glob
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+from flask import g, has_request_context, request
+
+try:
+    import fcntl
+except ImportError:  # Windows: a single development server, nothing to coordinate
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+PREFIX = 'leetcode_ladder_'
+
+# Seconds, from a cached body (sub-millisecond) to a slow upstream call
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Every worker writes its metrics to a file in this directory at most once per
+# FLUSH_INTERVAL seconds; /metrics sums the files of all live workers and the
+# archive of exited ones. By default the directory is keyed by the parent pid,
+# i.e. the gunicorn master.
+METRICS_DIR = os.environ.get('METRICS_DIR')
+FLUSH_INTERVAL = 1.0
+
+# Counters and histograms of workers that have exited, kept in the metrics
+# directory so the totals summed over workers never go down
+ARCHIVE_FILE = 'archived.json'
+LOCK_FILE = 'collect.lock'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value))
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+class Metric:
+    """A named family of samples keyed by label values"""
+
+    type = None
+
+    def __init__(self, name, documentation, labelnames=(), registry=None):
+        self.name = PREFIX + name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._samples = {}
+        self._lock = threading.Lock()
+        (registry or REGISTRY).register(self)
+
+    def _key(self, labels):
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def clear(self):
+        with self._lock:
+            self._samples.clear()
+
+    def snapshot(self):
+        with self._lock:
+            samples = [[list(key), value] for key, value in self._samples.items()]
+        return {
+            'type': self.type,
+            'help': self.documentation,
+            'labelnames': list(self.labelnames),
+            'aggregate': getattr(self, 'aggregate', 'sum'),
+            'samples': samples,
+        }
+
+
+class Counter(Metric):
+    type = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._samples[key] = self._samples.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    """
+    A value that can go up and down. aggregate says how the values of several
+    workers combine: 'sum' or 'max'.
+    """
+
+    type = 'gauge'
+
+    def __init__(self, name, documentation, labelnames=(), aggregate='sum', registry=None):
+        super().__init__(name, documentation, labelnames, registry)
+        self.aggregate = aggregate
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._samples[key] = value
+
+
+class Histogram(Metric):
+    type = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS, registry=None):
+        super().__init__(name, documentation, labelnames, registry)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            sample = self._samples.get(key)
+            if sample is None:
+                # Per-bucket (not cumulative) counts plus one overflow slot, sum, count
+                sample = self._samples[key] = {'counts': [0] * (len(self.buckets) + 1), 'sum': 0.0, 'count': 0}
+            sample['counts'][index] += 1
+            sample['sum'] += value
+            sample['count'] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def snapshot(self):
+        with self._lock:
+            samples = [
+                [list(key), {'counts': list(sample['counts']), 'sum': sample['sum'], 'count': sample['count']}]
+                for key, sample in self._samples.items()
+            ]
+        return {
+            'type': self.type,
+            'help': self.documentation,
+            'labelnames': list(self.labelnames),
+            'buckets': list(self.buckets),
+            'aggregate': 'sum',
+            'samples': samples,
+        }
+
+
+class Registry:
+    """All metrics of this process, plus reading and writing per-worker snapshots"""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+        self._last_flush = 0.0
+        self._directory = None
+        self._timer = None
+
+    def register(self, metric):
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric {metric.name} is already registered")
+            self._metrics[metric.name] = metric
+
+    def snapshot(self):
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return {metric.name: metric.snapshot() for metric in metrics}
+
+    def reset_after_fork(self):
+        """
+        A forked worker must not report the parent's counts as its own, or
+        they would be counted once per worker. Gauges describe state and stay.
+        """
+        with self._lock:
+            metrics = list(self._metrics.values())
+            self._last_flush = 0.0
+            self._directory = None
+            self._timer = None
+        for metric in metrics:
+            if metric.type != 'gauge':
+                metric.clear()
+
+    def directory(self):
+        if self._directory is None:
+            self._directory = METRICS_DIR or os.path.join(
+                tempfile.gettempdir(), f'leetcode-ladder-metrics-{os.getppid()}'
+            )
+        return self._directory
+
+    def flush(self, force=False):
+        """
+        Write this process's snapshot for other workers to aggregate. Calls
+        within FLUSH_INTERVAL of the last write are deferred to a timer, so an
+        idle worker's last requests are still published.
+        """
+        with self._lock:
+            now = time.monotonic()
+            if not force and now - self._last_flush < FLUSH_INTERVAL:
+                if self._timer is None:
+                    self._timer = threading.Timer(FLUSH_INTERVAL - (now - self._last_flush), self.flush, [True])
+                    self._timer.daemon = True
+                    self._timer.start()
+                return
+            self._last_flush = now
+            if self._timer is not None and force:
+                self._timer.cancel()
+                self._timer = None
+        directory = self.directory()
+        path = os.path.join(directory, f'{os.getpid()}.json')
+        tmp_path = f'{path}.{threading.get_ident()}.tmp'
+        try:
+            os.makedirs(directory, exist_ok=True)
+            with open(tmp_path, 'w') as f:
+                json.dump(self.snapshot(), f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.error(f"Error writing metrics snapshot to {path}: {e}")
+
+    def collect(self):
+        """
+        Snapshots of every live worker sharing the metrics directory, this one
+        included, plus the archived totals of workers that have exited. A dead
+        worker's counters and histograms are folded into the archive before
+        its file is removed, so summed counters stay monotonic across worker
+        restarts (as in prometheus_client's multiprocess mode); its gauges
+        are dropped with it.
+        """
+        self.flush(force=True)
+        own_pid = os.getpid()
+        directory = self.directory()
+        snapshots = [self.snapshot()]
+        # One collector at a time, so a dead worker is archived exactly once
+        # and never counted both from its file and from the archive
+        with _locked(os.path.join(directory, LOCK_FILE)):
+            dead = []
+            for path in glob.glob(os.path.join(directory, '*.json')):
+                try:
+                    pid = int(os.path.basename(path)[:-len('.json')])
+                except ValueError:
+                    continue
+                if pid == own_pid:
+                    continue
+                snapshot = _read_snapshot(path)
+                if _pid_alive(pid):
+                    if snapshot is not None:
+                        snapshots.append(snapshot)
+                else:
+                    dead.append((path, snapshot))
+
+            archive_path = os.path.join(directory, ARCHIVE_FILE)
+            archive = _read_snapshot(archive_path) or {}
+            if dead:
+                archive = _archive(archive, [snapshot for _, snapshot in dead if snapshot is not None])
+                try:
+                    _write_json(archive_path, archive)
+                except OSError as e:
+                    logger.error(f"Error writing metrics archive to {archive_path}: {e}")
+                else:
+                    for path, _ in dead:
+                        try:
+                            os.remove(path)
+                        except OSError:
+                            pass
+            snapshots.append(archive)
+        return snapshots
+
+
+@contextmanager
+def _locked(path):
+    if fcntl is None:
+        yield
+        return
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'a') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def _read_snapshot(path):
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_json(path, data):
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
+
+
+def _archive(archive, snapshots):
+    """The archive snapshot with the counters and histograms of snapshots added to it"""
+    kept = [
+        {name: family for name, family in snapshot.items() if family['type'] != 'gauge'}
+        for snapshot in [archive, *snapshots]
+    ]
+    return {
+        name: {**family, 'samples': [[list(key), value] for key, value in family['samples'].items()]}
+        for name, family in merge_snapshots(kept).items()
+    }
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def merge_snapshots(snapshots):
+    """Combine per-worker snapshots into one {name: family} dict"""
+    merged = {}
+    for snapshot in snapshots:
+        for name, family in snapshot.items():
+            target = merged.setdefault(name, {**family, 'samples': {}})
+            for labelvalues, value in family['samples']:
+                key = tuple(labelvalues)
+                current = target['samples'].get(key)
+                if current is None:
+                    target['samples'][key] = value if family['type'] != 'histogram' else {
+                        'counts': list(value['counts']), 'sum': value['sum'], 'count': value['count']
+                    }
+                elif family['type'] == 'histogram':
+                    current['counts'] = [a + b for a, b in zip(current['counts'], value['counts'])]
+                    current['sum'] += value['sum']
+                    current['count'] += value['count']
+                elif family['aggregate'] == 'max':
+                    target['samples'][key] = max(current, value)
+                else:
+                    target['samples'][key] = current + value
+    return merged
+
+
+def render_prometheus(merged):
+    """Prometheus text exposition format (version 0.0.4)"""
+    lines = []
+    for name in sorted(merged):
+        family = merged[name]
+        labelnames = family['labelnames']
+        lines.append(f"# HELP {name} {family['help']}")
+        lines.append(f"# TYPE {name} {family['type']}")
+        for key in sorted(family['samples']):
+            value = family['samples'][key]
+            if family['type'] != 'histogram':
+                lines.append(f"{name}{_format_labels(labelnames, key)} {_format_value(value)}")
+                continue
+            cumulative = 0
+            for bound, count in zip(list(family['buckets']) + [float('inf')], value['counts']):
+                cumulative += count
+                le = (('le', _format_value(bound)),)
+                lines.append(f"{name}_bucket{_format_labels(labelnames, key, le)} {_format_value(cumulative)}")
+            lines.append(f"{name}_sum{_format_labels(labelnames, key)} {_format_value(value['sum'])}")
+            lines.append(f"{name}_count{_format_labels(labelnames, key)} {_format_value(value['count'])}")
+    return '\n'.join(lines) + '\n'
+
+
+def generate_latest():
+    """The /metrics body, aggregated across all workers"""
+    return render_prometheus(merge_snapshots(REGISTRY.collect()))
+
+
+REGISTRY = Registry()
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=REGISTRY.reset_after_fork)
+
+REQUEST_DURATION = Histogram('request_duration_seconds', "Time spent handling a request", ['endpoint'])
+REQUESTS = Counter('requests_total', "Requests handled", ['endpoint', 'status'])
+STAGE_DURATION = Histogram('stage_duration_seconds', "Time spent in one stage of a handler", ['endpoint', 'stage'])
+
+
+@contextmanager
+def stage(name):
+    """Time a block of a request handler as one stage of the current endpoint"""
+    endpoint = (request.endpoint or 'unmatched') if has_request_context() else 'none'
+    with STAGE_DURATION.time(endpoint=endpoint, stage=name):
+        yield
+
+
+def init_app(app):
+    """Time every request and periodically publish this worker's snapshot"""
+
+    @app.before_request
+    def start_timer():
+        g.metrics_started = time.perf_counter()
+
+    @app.after_request
+    def record_request(response):
+        started = g.pop('metrics_started', None)
+        if started is not None:
+            endpoint = request.endpoint or 'unmatched'
+            REQUEST_DURATION.observe(time.perf_counter() - started, endpoint=endpoint)
+            REQUESTS.inc(endpoint=endpoint, status=response.status_code)
+        REGISTRY.flush()
+        return response
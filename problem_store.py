@@ -0,0 +1,141 @@
+import csv
+import logging
+import pandas as pd
+from sqlalchemy import (
+    Column, Float, Index, Integer, MetaData, String, Table, create_engine, func, select
+)
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_STORE_URL = 'sqlite:///leetcode_problems.db'
+
+# CSV column -> database column
+COLUMN_MAP = {
+    'Date': 'date',
+    'Problem Number': 'number',
+    'Problem Name': 'name',
+    'Problem Rating': 'rating',
+    'Problem Link': 'link',
+    'Contest Name': 'contest',
+    'Tags': 'tags',
+}
+CSV_COLUMNS = list(COLUMN_MAP)
+
+LAST_PROBLEM_NUMBER_KEY = 'last_problem_number'
+
+metadata = MetaData()
+
+problems_table = Table(
+    'problems', metadata,
+    Column('number', Integer, primary_key=True),
+    Column('date', String),
+    Column('name', String, nullable=False),
+    Column('rating', Float),
+    Column('link', String),
+    Column('contest', String),
+    Column('tags', String),
+    Index('ix_problems_rating', 'rating'),
+    Index('ix_problems_contest', 'contest'),
+    Index('ix_problems_date', 'date'),
+)
+
+# Replaces last_scrape_info.txt: small key/value facts about the scrape
+scrape_metadata_table = Table(
+    'scrape_metadata', metadata,
+    Column('key', String, primary_key=True),
+    Column('value', String, nullable=False),
+)
+
+
+def _none_if_missing(value):
+    return None if pd.isna(value) or value == '' else value
+
+
+class ProblemStore:
+    """
+    SQLite-backed master problem table. Problem Number is the primary key, so
+    adding a week's problems is an upsert of just those rows; the master CSV
+    is a derived export, written only when asked for (export_csv).
+    """
+
+    def __init__(self, url=DEFAULT_STORE_URL):
+        self.engine = create_engine(url)
+        metadata.create_all(self.engine)
+
+    def count(self):
+        with self.engine.connect() as conn:
+            return conn.execute(select(func.count()).select_from(problems_table)).scalar_one()
+
+    def upsert(self, df, last_problem_number=None):
+        """
+        Insert or update the given problems (a DataFrame with the CSV columns)
+        and optionally record the highest scraped problem number, all in one
+        transaction. Rows without a numeric Problem Number have no key to be
+        stored under; they are skipped with a warning. Returns the rows written.
+        """
+        records = []
+        skipped = []
+        for row in df[CSV_COLUMNS].itertuples(index=False, name=None):
+            record = {COLUMN_MAP[col]: _none_if_missing(value) for col, value in zip(CSV_COLUMNS, row)}
+            try:
+                record['number'] = int(float(record['number']))
+            except (TypeError, ValueError):
+                skipped.append(record['name'])
+                continue
+            if record['rating'] is not None:
+                record['rating'] = float(record['rating'])
+            records.append(record)
+        if skipped:
+            logger.warning(f"Skipped {len(skipped)} problems without a numeric Problem Number: {skipped}")
+
+        with self.engine.begin() as conn:
+            if records:
+                stmt = sqlite_insert(problems_table)
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=['number'],
+                    set_={col: stmt.excluded[col] for col in COLUMN_MAP.values() if col != 'number'}
+                )
+                conn.execute(stmt, records)
+            if last_problem_number is not None:
+                self._set_metadata(conn, LAST_PROBLEM_NUMBER_KEY, str(last_problem_number))
+        return len(records)
+
+    def _set_metadata(self, conn, key, value):
+        stmt = sqlite_insert(scrape_metadata_table).values(key=key, value=value)
+        conn.execute(stmt.on_conflict_do_update(index_elements=['key'], set_={'value': value}))
+
+    def get_last_problem_number(self):
+        """The recorded last scraped number, else the highest number stored"""
+        with self.engine.connect() as conn:
+            value = conn.execute(
+                select(scrape_metadata_table.c.value).where(scrape_metadata_table.c.key == LAST_PROBLEM_NUMBER_KEY)
+            ).scalar_one_or_none()
+            if value is not None:
+                return int(value)
+            return conn.execute(select(func.max(problems_table.c.number))).scalar_one_or_none()
+
+    def read_frame(self, min_rating=None, max_rating=None):
+        """Problems as a DataFrame with the CSV columns, newest first"""
+        query = select(*[problems_table.c[col].label(name) for name, col in COLUMN_MAP.items()])
+        if min_rating is not None:
+            query = query.where(problems_table.c.rating >= min_rating)
+        if max_rating is not None:
+            query = query.where(problems_table.c.rating <= max_rating)
+        query = query.order_by(problems_table.c.number.desc())
+        with self.engine.connect() as conn:
+            return pd.DataFrame(conn.execute(query).fetchall(), columns=CSV_COLUMNS)
+
+    def export_csv(self, path):
+        """Write the master CSV in the same format import_problems.py always has"""
+        df = self.read_frame()
+        # Stored as REAL, written as whole numbers like the scraper does (blank if unrated)
+        df['Problem Rating'] = df['Problem Rating'].round().astype('Int64')
+        df.to_csv(path,
+                  index=False,
+                  encoding='utf-8',
+                  quoting=csv.QUOTE_MINIMAL,
+                  escapechar='\\',
+                  na_rep='')
+        logger.info(f"Exported {len(df)} problems to {path}")
+        return len(df)
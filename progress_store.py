@@ -0,0 +1,211 @@
+import os
+import re
+import hmac
+import hashlib
+import secrets
+import threading
+import time
+import logging
+import numpy as np
+from sqlalchemy import Column, Float, Integer, LargeBinary, MetaData, String, Table, create_engine, inspect, select, text
+from sqlalchemy.exc import IntegrityError
+
+import bitset
+
+logger = logging.getLogger(__name__)
+
+# The sqlite default lives on the app's own disk, which hosts like Render wipe on
+# every deploy; production must point PROGRESS_STORE_URL at a persistent database
+LOCAL_PROGRESS_URL = 'sqlite:///progress.db'
+DEFAULT_PROGRESS_URL = os.environ.get('PROGRESS_STORE_URL', LOCAL_PROGRESS_URL)
+# Render hands out postgres:// URLs, a scheme SQLAlchemy no longer accepts
+if DEFAULT_PROGRESS_URL.startswith('postgres://'):
+    DEFAULT_PROGRESS_URL = 'postgresql://' + DEFAULT_PROGRESS_URL[len('postgres://'):]
+
+# Progress keys are LeetCode usernames or similar handles
+USER_ID_PATTERN = re.compile(r'^[A-Za-z0-9_.-]{1,64}$')
+
+# Problem Numbers are bit positions, anything larger is rejected
+MAX_PROBLEM_NUMBER = 65535
+
+# Optimistic updates retry this often when another worker wrote the same user
+MAX_UPDATE_RETRIES = 10
+
+metadata = MetaData()
+
+progress_table = Table(
+    'progress', metadata,
+    Column('user_id', String, primary_key=True),
+    # zlib-compressed packed bitset indexed by Problem Number
+    Column('solved', LargeBinary, nullable=False),
+    # Bumped on every write, the update only applies if it is unchanged
+    Column('version', Integer, nullable=False),
+    Column('updated_at', Float, nullable=False),
+    # sha256 of the write token handed out when the user was claimed
+    Column('token_hash', String, nullable=True),
+)
+
+
+class ProgressConflict(Exception):
+    """The row kept changing under us for MAX_UPDATE_RETRIES attempts"""
+
+
+def hash_token(token):
+    return hashlib.sha256(token.encode('utf-8')).hexdigest()
+
+
+class Progress:
+    """One user's solved set as a packed bitset"""
+
+    def __init__(self, user_id, solved=None, version=0, updated_at=None):
+        self.user_id = user_id
+        self.solved = solved if solved is not None else np.zeros(0, dtype=np.uint8)
+        self.version = version
+        self.updated_at = updated_at
+
+    def numbers(self):
+        return bitset.unpack_numbers(self.solved).tolist()
+
+    def count(self):
+        return int(bitset.popcount(self.solved))
+
+
+def apply_changes(solved, mark_solved=(), mark_unsolved=(), toggle=(), reset=False):
+    """
+    New packed bitset after a batch of changes: reset first, then solved,
+    unsolved and toggled numbers in that order.
+    """
+    numbers = [n for group in (mark_solved, mark_unsolved, toggle) for n in group]
+    nbytes = max(len(solved), (max(numbers) // 8 + 1) if numbers else 0)
+    bits = np.unpackbits(bitset.resize(solved, nbytes), bitorder='little').astype(bool)
+    if reset:
+        bits[:] = False
+    bits[list(mark_solved)] = True
+    bits[list(mark_unsolved)] = False
+    for number in toggle:
+        bits[number] = not bits[number]
+    packed = np.packbits(bits, bitorder='little')
+    # Drop trailing zero bytes so the stored form doesn't grow with old toggles
+    nonzero = np.flatnonzero(packed)
+    return packed[:nonzero[-1] + 1] if len(nonzero) else packed[:0]
+
+
+class ProgressStore:
+    """
+    Solved problems per user, one compressed bitset row each. Every gunicorn
+    worker opens the same database; concurrent writes to one user are resolved
+    with a version check and retry instead of locks.
+    """
+
+    def __init__(self, url=DEFAULT_PROGRESS_URL):
+        self.engine = create_engine(url)
+        metadata.create_all(self.engine)
+        self._add_token_column()
+
+    def _add_token_column(self):
+        # Databases created before writes needed a token lack the column
+        columns = {column['name'] for column in inspect(self.engine).get_columns('progress')}
+        if 'token_hash' not in columns:
+            with self.engine.begin() as conn:
+                conn.execute(text('ALTER TABLE progress ADD COLUMN token_hash VARCHAR'))
+
+    def get(self, user_id):
+        with self.engine.connect() as conn:
+            row = conn.execute(
+                select(progress_table).where(progress_table.c.user_id == user_id)
+            ).mappings().first()
+        if row is None:
+            return Progress(user_id)
+        return Progress(user_id, bitset.decompress(row['solved']), row['version'], row['updated_at'])
+
+    def claim(self, user_id):
+        """
+        A new write token for user_id, or None if the user is already claimed.
+        Only the token's hash is stored, the caller has to keep the token.
+        """
+        token = secrets.token_urlsafe(32)
+        values = {'token_hash': hash_token(token)}
+        for _ in range(2):
+            try:
+                with self.engine.begin() as conn:
+                    result = conn.execute(
+                        progress_table.update()
+                        .where(progress_table.c.user_id == user_id)
+                        .where(progress_table.c.token_hash.is_(None))
+                        .values(**values)
+                    )
+                    if result.rowcount:
+                        return token
+                    exists = conn.execute(
+                        select(progress_table.c.user_id).where(progress_table.c.user_id == user_id)
+                    ).first()
+                    if exists:
+                        return None
+                    conn.execute(progress_table.insert().values(
+                        user_id=user_id, solved=bitset.compress(np.zeros(0, dtype=np.uint8)),
+                        version=1, updated_at=time.time(), **values
+                    ))
+                return token
+            except IntegrityError:
+                # Another worker created the row first, claim it if it has no token
+                continue
+        return None
+
+    def check_token(self, user_id, token):
+        """True if token is the write token of a claimed user_id"""
+        if not token:
+            return False
+        with self.engine.connect() as conn:
+            stored = conn.execute(
+                select(progress_table.c.token_hash).where(progress_table.c.user_id == user_id)
+            ).scalar()
+        return stored is not None and hmac.compare_digest(stored, hash_token(token))
+
+    def update(self, user_id, mark_solved=(), mark_unsolved=(), toggle=(), reset=False):
+        """Apply a batch of changes atomically and return the new Progress"""
+        for _ in range(MAX_UPDATE_RETRIES):
+            current = self.get(user_id)
+            solved = apply_changes(current.solved, mark_solved, mark_unsolved, toggle, reset)
+            now = time.time()
+            values = {'solved': bitset.compress(solved), 'version': current.version + 1, 'updated_at': now}
+            if current.version == 0:
+                try:
+                    with self.engine.begin() as conn:
+                        conn.execute(progress_table.insert().values(user_id=user_id, **values))
+                except IntegrityError:
+                    # Another worker created the row first
+                    continue
+            else:
+                with self.engine.begin() as conn:
+                    result = conn.execute(
+                        progress_table.update()
+                        .where(progress_table.c.user_id == user_id)
+                        .where(progress_table.c.version == current.version)
+                        .values(**values)
+                    )
+                if result.rowcount == 0:
+                    continue
+            return Progress(user_id, solved, current.version + 1, now)
+        raise ProgressConflict(f"Too many concurrent updates for {user_id}")
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_progress_store():
+    """
+    The process-wide store, opened on first use so each forked worker gets
+    its own connection pool.
+    """
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = ProgressStore()
+                if DEFAULT_PROGRESS_URL == LOCAL_PROGRESS_URL:
+                    logger.warning("PROGRESS_STORE_URL is not set, synced progress is kept in a local "
+                                   "sqlite file that is lost whenever the disk is replaced")
+                else:
+                    logger.info("Opened progress store from PROGRESS_STORE_URL")
+    return _store
@@ -0,0 +1,253 @@
+import re
+from bisect import bisect_left
+from collections import defaultdict
+
+import numpy as np
+
+from search_index import id_dtype
+
+TOKEN_PATTERN = re.compile(r'[a-z0-9]+')
+
+# BM25 term frequency saturation and length normalization
+K1 = 1.2
+B = 0.75
+
+# A word in the problem name counts this many times, a word in the tags once
+NAME_WEIGHT = 2.0
+
+# Typos tolerated per query word: (minimum word length, edits), longest first
+FUZZY_EDITS = ((8, 2), (4, 1))
+MAX_EDITS = max(edits for _, edits in FUZZY_EDITS)
+
+# Vocabulary words shorter than this get no deletion entries
+MIN_FUZZY_LENGTH = min(length for length, _ in FUZZY_EDITS)
+
+# The last query word is also matched as a prefix (search-as-you-type), at
+# this weight, against at most this many of the shortest completions
+PREFIX_WEIGHT = 0.8
+MAX_PREFIX_EXPANSIONS = 32
+
+# Query word expansions remembered per process; search-as-you-type sends the
+# same leading words with every keystroke
+MAX_CACHED_EXPANSIONS = 4096
+
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 200
+
+
+def tokenize(text):
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+def deletes(word, edits):
+    """word and every string obtained from it by deleting up to edits characters"""
+    result = {word}
+    frontier = {word}
+    for _ in range(edits):
+        frontier = {variant[:i] + variant[i + 1:] for variant in frontier for i in range(len(variant))}
+        result |= frontier
+    return result
+
+
+def variant_hash(variant):
+    # Python's string hash, so only comparable within one process (and its forks)
+    return hash(variant) & 0xFFFFFFFF
+
+
+def edit_distance(a, b, limit):
+    """
+    Levenshtein distance counting adjacent transpositions as one edit
+    (optimal string alignment), or limit + 1 once it must exceed limit
+    """
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous2 = None
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = a[i - 1] != b[j - 1]
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], previous2[j - 2] + 1)
+        if min(current) > limit:
+            return limit + 1
+        previous2, previous = previous, current
+    return previous[-1]
+
+
+class RankedIndex:
+    """
+    BM25 index over the words of each problem's name, tags and number.
+
+    Postings are stored CSR style: one array of row ids and one of
+    precomputed BM25 contributions, both sorted by term, with per-term
+    offsets. Scoring a query is concatenating a few slices and summing per
+    row. Misspelled words are resolved to vocabulary words through a
+    SymSpell-style dictionary of deletions, and the last word of the query
+    also matches as a prefix so partially typed words find results. A query
+    that is exactly a problem's name ranks that problem first.
+    """
+
+    def __init__(self, df):
+        self.size = len(df)
+        term_ids = {}
+        rows, terms, frequencies = [], [], []
+        lengths = np.zeros(self.size, dtype=np.float64)
+        # Row ids by the words of their name, for exact title matches
+        self.titles = defaultdict(list)
+        documents = zip(df['Problem Name'], df['Tags'], df['Problem Number'].astype(str))
+        for row_id, (name, tags, number) in enumerate(documents):
+            counts = defaultdict(float)
+            name_tokens = tokenize(name)
+            self.titles[' '.join(name_tokens)].append(row_id)
+            for token in name_tokens:
+                counts[token] += NAME_WEIGHT
+            for token in tokenize(tags):
+                counts[token] += 1.0
+            counts[number] += NAME_WEIGHT
+            lengths[row_id] = sum(counts.values())
+            for token, frequency in counts.items():
+                rows.append(row_id)
+                terms.append(term_ids.setdefault(token, len(term_ids)))
+                frequencies.append(frequency)
+
+        terms = np.array(terms, dtype=np.int32)
+        rows = np.array(rows, dtype=id_dtype(self.size))
+        frequencies = np.array(frequencies, dtype=np.float64)
+        order = np.lexsort((rows, terms))
+        terms, rows, frequencies = terms[order], rows[order], frequencies[order]
+
+        document_counts = np.bincount(terms, minlength=len(term_ids))
+        idf = np.log(1 + (self.size - document_counts + 0.5) / (document_counts + 0.5))
+        average_length = lengths.mean() if self.size else 1.0
+        norms = K1 * (1 - B + B * lengths[rows] / average_length)
+        self.scores = (idf[terms] * frequencies * (K1 + 1) / (frequencies + norms)).astype(np.float32)
+        self.rows = rows
+        self.offsets = np.zeros(len(term_ids) + 1, dtype=np.int64)
+        np.cumsum(document_counts, out=self.offsets[1:])
+
+        self.term_ids = term_ids
+        # Words by term id, and sorted for prefix lookups
+        self.terms = list(term_ids)
+        self.vocabulary = sorted(term_ids)
+
+        # The deletion dictionary as (32-bit hash of variant, term id) pairs
+        # sorted by hash: two arrays instead of tens of thousands of strings
+        # and tuples. A hash collision only adds a candidate the edit distance
+        # check rejects.
+        variant_hashes, variant_terms = [], []
+        for term, term_id in term_ids.items():
+            if len(term) >= MIN_FUZZY_LENGTH - MAX_EDITS and not term.isdigit():
+                for variant in deletes(term, MAX_EDITS):
+                    variant_hashes.append(variant_hash(variant))
+                    variant_terms.append(term_id)
+        variant_hashes = np.array(variant_hashes, dtype=np.uint32)
+        order = np.argsort(variant_hashes, kind='stable')
+        self.deletion_hashes = variant_hashes[order]
+        self.deletion_terms = np.array(variant_terms, dtype=id_dtype(len(term_ids)))[order]
+        self._expansions = {}
+
+    def _fuzzy_terms(self, word):
+        """{term: edits} for vocabulary words within the edits allowed for word"""
+        edits = next((edits for length, edits in FUZZY_EDITS if len(word) >= length), 0)
+        if not edits or word.isdigit():
+            return {}
+        matches = {}
+        hashes = np.array([variant_hash(variant) for variant in deletes(word, edits)], dtype=np.uint32)
+        starts = np.searchsorted(self.deletion_hashes, hashes, side='left')
+        ends = np.searchsorted(self.deletion_hashes, hashes, side='right')
+        candidates = set()
+        for start, end in zip(starts.tolist(), ends.tolist()):
+            candidates.update(self.deletion_terms[start:end].tolist())
+        for term_id in candidates:
+            term = self.terms[term_id]
+            distance = edit_distance(word, term, edits)
+            if distance <= edits:
+                matches[term] = distance
+        return matches
+
+    def _prefix_terms(self, word):
+        start = bisect_left(self.vocabulary, word)
+        end = bisect_left(self.vocabulary, word + '\uffff', start)
+        return sorted(self.vocabulary[start:end], key=len)[:MAX_PREFIX_EXPANSIONS]
+
+    def expand(self, word, prefix=False):
+        """
+        {term id: weight} of the vocabulary words a query word stands for:
+        itself if it is one, otherwise its close misspellings, plus its
+        completions if it is the word being typed
+        """
+        key = (word, prefix)
+        weights = self._expansions.get(key)
+        if weights is not None:
+            return weights
+        weights = {}
+        if word in self.term_ids:
+            weights[self.term_ids[word]] = 1.0
+        else:
+            for term, distance in self._fuzzy_terms(word).items():
+                weights[self.term_ids[term]] = 1.0 / (1 + distance)
+        # A word that is already a term is taken as typed: its rarer
+        # completions would otherwise outscore the exact hit
+        if prefix and word not in self.term_ids:
+            for term in self._prefix_terms(word):
+                term_id = self.term_ids[term]
+                weights[term_id] = max(weights.get(term_id, 0.0), PREFIX_WEIGHT)
+        if len(self._expansions) >= MAX_CACHED_EXPANSIONS:
+            self._expansions.clear()
+        self._expansions[key] = weights
+        return weights
+
+    def _word_scores(self, weights):
+        """Row ids and score of one query word, the best expansion per row"""
+        rows = np.concatenate([self.rows[self.offsets[t]:self.offsets[t + 1]] for t in weights])
+        scores = np.concatenate([
+            self.scores[self.offsets[t]:self.offsets[t + 1]] * np.float32(weight)
+            for t, weight in weights.items()
+        ])
+        if len(weights) == 1:
+            return rows, scores
+        order = np.lexsort((-scores, rows))
+        rows, scores = rows[order], scores[order]
+        first = np.concatenate(([True], rows[1:] != rows[:-1]))
+        return rows[first], scores[first]
+
+    def search(self, query, limit=DEFAULT_LIMIT):
+        """
+        The best limit rows for a query as (row ids, scores, words matched,
+        total matching rows), best first. An exact title match comes first,
+        then rows matching more of the query's words, then by BM25 score,
+        then newest first.
+        """
+        words = tokenize(query)
+        matched_rows, matched_scores = [], []
+        for i, word in enumerate(words):
+            weights = self.expand(word, prefix=i == len(words) - 1)
+            if weights:
+                rows, scores = self._word_scores(weights)
+                matched_rows.append(rows)
+                matched_scores.append(scores)
+        if not matched_rows:
+            empty = np.zeros(0, dtype=np.int32)
+            return empty, np.zeros(0, dtype=np.float32), empty, 0
+
+        rows, inverse = np.unique(np.concatenate(matched_rows), return_inverse=True)
+        scores = np.bincount(inverse, weights=np.concatenate(matched_scores), minlength=len(rows))
+        words_matched = np.bincount(inverse, minlength=len(rows))
+        # Word coverage dominates, the score only breaks ties within it
+        keys = words_matched + scores / (scores.max() + 1)
+        # The problem named exactly like the query goes above everything else
+        title_rows = self.titles.get(' '.join(words))
+        if title_rows:
+            keys[np.isin(rows, title_rows)] += len(words) + 1
+
+        k = min(limit, len(rows))
+        if k < len(rows):
+            # Everything keyed at least the k-th best, ties included, then order those
+            threshold = np.partition(keys, len(rows) - k)[len(rows) - k]
+            top = np.flatnonzero(keys >= threshold)
+        else:
+            top = np.arange(len(rows))
+        top = top[np.lexsort((rows[top], -keys[top]))][:k]
+        return rows[top], scores[top], words_matched[top], len(rows)
@@ -1,53 +1,166 @@
+import argparse
+import hashlib
+import json
 import pandas as pd
 import os
+from columnar import write_columnar
 
-def separate_by_exact_ratings(csv_file='leetcode_contest_problems.csv', output_dir='rating_groups'):
-    # Create output directory
-    if not os.path.exists(output_dir):
-        os.makedirs(output_dir)
-    
+UNRATED_FILE = 'unrated_problems.csv'
+
+# Content hash of every bucket file we wrote, so unchanged buckets are left
+# alone, and the file each Problem Number is in, so an update can move a
+# problem out of its old bucket without reading every other one
+BUCKET_MANIFEST_FILE = 'bucket_manifest.json'
+
+def bucket_range(start):
+    return f'{start}_to_{start + 99}'
+
+def sort_bucket(problems):
+    return problems.sort_values(['Problem Number', 'Problem Rating'],
+                                ascending=[False, True])
+
+def sort_unrated(problems):
+    return problems.sort_values('Problem Number', ascending=False)
+
+def group_by_rating(df):
+    """
+    Split problems into 100-point buckets with a single groupby on
+    rating // 100. Returns ({start: rated problems}, unrated problems).
+    """
+    rated = df[df['Problem Rating'].notna()]
+    starts = (rated['Problem Rating'] // 100 * 100).astype(int)
+    buckets = {int(start): problems for start, problems in rated.groupby(starts, sort=True)}
+    return buckets, df[df['Problem Rating'].isna()]
+
+def load_bucket_manifest(output_dir):
+    """{'files': {filename: sha256}, 'numbers': {Problem Number: filename}}"""
+    path = os.path.join(output_dir, BUCKET_MANIFEST_FILE)
+    if not os.path.exists(path):
+        return {'files': {}, 'numbers': {}}
+    with open(path, 'r') as f:
+        manifest = json.load(f)
+    if 'files' not in manifest:
+        # Written before the number map existed: only file hashes
+        manifest = {'files': manifest, 'numbers': {}}
+    return manifest
+
+def save_bucket_manifest(output_dir, manifest):
+    if manifest == load_bucket_manifest(output_dir):
+        return
+    path = os.path.join(output_dir, BUCKET_MANIFEST_FILE)
+    with open(path + '.tmp', 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(path + '.tmp', path)
+
+def write_if_changed(problems, output_dir, filename, manifest):
+    """
+    Write a bucket CSV unless its content is identical to what is on disk, so
+    untouched files keep their mtime (and the app's ETags stay valid).
+    Returns True if the file was written.
+    """
+    content = problems.to_csv(index=False).encode('utf-8')
+    digest = hashlib.sha256(content).hexdigest()
+    output_file = os.path.join(output_dir, filename)
+
+    if os.path.exists(output_file):
+        existing = manifest['files'].get(filename)
+        if existing is None:
+            with open(output_file, 'rb') as f:
+                existing = hashlib.sha256(f.read()).hexdigest()
+        if existing == digest:
+            manifest['files'][filename] = digest
+            return False
+
+    with open(output_file, 'wb') as f:
+        f.write(content)
+    manifest['files'][filename] = digest
+    return True
+
+def number_keys(problems):
+    numbers = pd.to_numeric(problems['Problem Number'], errors='coerce').dropna()
+    return [str(int(number)) for number in numbers]
+
+def record_numbers(manifest, filename, problems):
+    for number in number_keys(problems):
+        manifest['numbers'][number] = filename
+
+def bucket_files(output_dir):
+    return [filename for filename in os.listdir(output_dir)
+            if filename == UNRATED_FILE or (filename.startswith('rating_') and filename.endswith('.csv'))]
+
+def index_numbers(output_dir, manifest):
+    """Fill the number map from the bucket files on disk (once, for manifests written without it)"""
+    for filename in bucket_files(output_dir):
+        record_numbers(manifest, filename, pd.read_csv(os.path.join(output_dir, filename)))
+
+def write_columnar_from_disk(output_dir):
+    """Rebuild the columnar table from the bucket CSVs currently on disk"""
+    buckets = []
+    for filename in os.listdir(output_dir):
+        if filename.startswith('rating_') and filename.endswith('.csv'):
+            range_str = filename[len('rating_'):-len('.csv')]
+            buckets.append((range_str, pd.read_csv(os.path.join(output_dir, filename))))
+    buckets.sort(key=lambda bucket: int(bucket[0].split('_to_')[0]))
+    return write_columnar(buckets, output_dir)
+
+def separate_by_exact_ratings(csv_file='leetcode_contest_problems.csv', output_dir='rating_groups', columnar=False):
     # Read CSV
     df = pd.read_csv(csv_file)
-    total_problems = len(df)
-    
+
     # Convert ratings to numeric
     df['Problem Rating'] = pd.to_numeric(df['Problem Rating'], errors='coerce')
-    
-    # Find min and max ratings
-    min_rating = int(df['Problem Rating'].min() // 100 * 100)
-    max_rating = int((df['Problem Rating'].max() // 100 + 1) * 100)
-    
+
+    return write_buckets(df, output_dir, columnar)
+
+def write_buckets(df, output_dir='rating_groups', columnar=False):
+    """
+    Write the bucket files for an already loaded master table (with numeric
+    ratings). Returns the rated buckets as a list of (range_str, DataFrame).
+    """
+    # Create output directory
+    if not os.path.exists(output_dir):
+        os.makedirs(output_dir)
+
+    total_problems = len(df)
     problems_distributed = 0
+    written_buckets = []
+    manifest = load_bucket_manifest(output_dir)
+    # Every problem is written below, so the number map is rebuilt from scratch
+    manifest['numbers'] = {}
 
     # Create groups in 100-point intervals
-    for start in range(min_rating, max_rating, 100):
+    buckets, unrated = group_by_rating(df)
+    for start, problems in buckets.items():
         end = start + 99
-        
-        # Filter problems in current range
-        problems = df[(df['Problem Rating'] >= start) & 
-                     (df['Problem Rating'] <= end)]
-        
-        if not problems.empty:
-            # Sort by rating
-            problems = problems.sort_values(['Problem Number', 'Problem Rating'], 
-                                      ascending=[False, True])
-            
-            # Create filename with rating range
-            filename = f'rating_{start}_to_{end}.csv'
-            output_file = os.path.join(output_dir, filename)
-            
-            # Save to CSV
-            problems.to_csv(output_file, index=False)
-            problems_distributed += len(problems)
-            print(f"Rating {start}-{end}: {len(problems)} problems saved to {filename}")
-    
+
+        # Sort by problem number, newest first
+        problems = sort_bucket(problems)
+
+        # Create filename with rating range
+        filename = f'rating_{start}_to_{end}.csv'
+
+        # Save to CSV
+        changed = write_if_changed(problems, output_dir, filename, manifest)
+        record_numbers(manifest, filename, problems)
+        written_buckets.append((bucket_range(start), problems))
+        problems_distributed += len(problems)
+        status = "saved to" if changed else "unchanged in"
+        print(f"Rating {start}-{end}: {len(problems)} problems {status} {filename}")
+
     # Handle unrated problems separately
-    unrated = df[df['Problem Rating'].isna()]
     if not unrated.empty:
-        unrated = unrated.sort_values('Problem Number', ascending=False)
-        unrated.to_csv(os.path.join(output_dir, 'unrated_problems.csv'), index=False)
+        unrated = sort_unrated(unrated)
+        write_if_changed(unrated, output_dir, UNRATED_FILE, manifest)
+        record_numbers(manifest, UNRATED_FILE, unrated)
         problems_distributed += len(unrated)
-        print(f"Unrated problems: {len(unrated)} saved to unrated_problems.csv")
+        print(f"Unrated problems: {len(unrated)} saved to {UNRATED_FILE}")
+
+    save_bucket_manifest(output_dir, manifest)
+
+    # Optionally also write the rated buckets as a memory-mappable columnar table
+    if columnar:
+        manifest_path = write_columnar(written_buckets, output_dir)
+        print(f"Columnar catalog written to {os.path.dirname(manifest_path)}")
 
     print("\nSummary:")
     print(f"Total problems in original file: {total_problems}")
@@ -58,6 +171,86 @@ def separate_by_exact_ratings(csv_file='leetcode_contest_problems.csv', output_d
         ratings_distribution = df['Problem Rating'].value_counts().sort_index()
         print("\nRatings distribution:")
         print(ratings_distribution)
+    return written_buckets
+
+def update_buckets(new_rows, output_dir='rating_groups', columnar=False):
+    """
+    Merge newly scraped problems into the existing bucket files. Only buckets
+    that receive new rows, or lose a problem whose rating moved it elsewhere,
+    are read and rewritten, so the cost follows the size of the weekly delta
+    rather than the catalog. Returns the filenames written.
+    """
+    if not os.path.exists(output_dir):
+        os.makedirs(output_dir)
+
+    new_rows = new_rows.copy()
+    new_rows['Problem Rating'] = pd.to_numeric(new_rows['Problem Rating'], errors='coerce')
+    manifest = load_bucket_manifest(output_dir)
+    if not manifest['numbers']:
+        index_numbers(output_dir, manifest)
+    changed_files = []
+
+    buckets, unrated = group_by_rating(new_rows)
+    targets = {f'rating_{bucket_range(start)}.csv': problems for start, problems in buckets.items()}
+    if not unrated.empty:
+        targets[UNRATED_FILE] = unrated
+
+    # Problems whose new rating puts them in another file than the one they are in
+    moved_out = {}
+    for filename, problems in targets.items():
+        for number in number_keys(problems):
+            previous = manifest['numbers'].get(number)
+            if previous is not None and previous != filename:
+                moved_out.setdefault(previous, set()).add(number)
+
+    affected = list(targets) + [filename for filename in moved_out if filename not in targets]
+    for filename in affected:
+        sort = sort_unrated if filename == UNRATED_FILE else sort_bucket
+        output_file = os.path.join(output_dir, filename)
+        problems = targets.get(filename)
+        if os.path.exists(output_file):
+            existing = pd.read_csv(output_file)
+            removed = moved_out.get(filename, set())
+            if removed:
+                keys = pd.to_numeric(existing['Problem Number'], errors='coerce')
+                existing = existing[~keys.isin([int(number) for number in removed])]
+                for number in removed:
+                    if manifest['numbers'].get(number) == filename:
+                        del manifest['numbers'][number]
+            # New rows win over an older copy of the same problem
+            problems = existing if problems is None else pd.concat([problems, existing])
+            problems = problems.drop_duplicates(subset=['Problem Number'], keep='first')
+        if problems is None:
+            continue
+        record_numbers(manifest, filename, problems)
+        if problems.empty:
+            # Every problem in this bucket moved elsewhere
+            os.remove(output_file)
+            manifest['files'].pop(filename, None)
+            changed_files.append(filename)
+            print(f"{filename}: removed, no problems left")
+            continue
+        problems = sort(problems)
+        if write_if_changed(problems, output_dir, filename, manifest):
+            changed_files.append(filename)
+            print(f"{filename}: now {len(problems)} problems")
+
+    save_bucket_manifest(output_dir, manifest)
+    print(f"Updated {len(changed_files)} of {len(affected)} affected bucket files")
+
+    if columnar and changed_files:
+        manifest_path = write_columnar_from_disk(output_dir)
+        print(f"Columnar catalog written to {os.path.dirname(manifest_path)}")
+    return changed_files
 
 if __name__ == "__main__":
-    separate_by_exact_ratings()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description='Split the master problem CSV into rating buckets')
+    parser.add_argument('--columnar', action='store_true',
+                        help='also write a memory-mappable columnar catalog for the app')
+    parser.add_argument('--new-rows', metavar='CSV',
+                        help='only merge the problems in this CSV into the affected buckets')
+    args = parser.parse_args()
+    if args.new_rows:
+        update_buckets(pd.read_csv(args.new_rows), columnar=args.columnar)
+    else:
+        separate_by_exact_ratings(columnar=args.columnar)
@@ -0,0 +1,86 @@
+import numpy as np
+
+import bitset
+
+# The ladder suggests problems a little above the user's contest rating
+TARGET_OFFSET = 200
+
+# Problems within this many points of the target are candidates
+BAND_WIDTH = 150
+
+DEFAULT_COUNT = 10
+MAX_COUNT = 100
+
+# Score weight of matching every requested tag (closeness to the target is at most 1)
+TAG_WEIGHT = 1.0
+
+
+def recommend(catalog, rating, solved=None, count=DEFAULT_COUNT, min_rating=None, max_rating=None,
+              tags=(), recency=0.0):
+    """
+    Top-count unsolved problems for a user with the given contest rating.
+
+    Candidates are the problems rated within BAND_WIDTH of rating +
+    TARGET_OFFSET (or in [min_rating, max_rating] if given), found by binary
+    search over the catalog's rating-sorted index. Each is scored by
+    closeness to the target, plus TAG_WEIGHT times the fraction of the
+    requested tags it has, plus recency times how recent its contest is
+    (0 for the oldest problem, 1 for the newest).
+
+    Returns (row ids into catalog.problems, scores, band, candidate count),
+    best first.
+    """
+    target = rating + TARGET_OFFSET
+    low = target - BAND_WIDTH if min_rating is None else min_rating
+    high = target + BAND_WIDTH if max_rating is None else max_rating
+    rows = catalog.rows_in_rating_range(low, high)
+
+    problems = catalog.problems
+    numbers = problems['Problem Number'].to_numpy()[rows]
+    if solved is not None:
+        unsolved = ~bitset.contains(solved, numbers)
+        rows = rows[unsolved]
+        numbers = numbers[unsolved]
+    if len(rows) == 0:
+        return rows, np.zeros(0), (low, high), 0
+
+    # Closeness to the target, 1 at the target and 0 at the edge of the band
+    ratings = problems['Problem Rating'].to_numpy()[rows].astype(np.float64)
+    half_width = max(target - low, high - target, 1)
+    scores = 1.0 - np.abs(ratings - target) / half_width
+
+    if tags:
+        # Bit tests in the per-tag row bitmaps rather than scans of the Tags strings
+        facets = catalog.facets
+        matched = np.zeros(len(rows), dtype=np.float64)
+        for tag in tags:
+            matched += facets.has_tag(tag, rows)
+        scores += TAG_WEIGHT * matched / len(tags)
+
+    if recency:
+        dates = catalog.dates
+        known = dates[dates >= 0]
+        if len(known):
+            oldest, newest = known.min(), known.max()
+            # Unparseable dates are relative ones like "today", i.e. the newest
+            row_dates = np.where(dates[rows] >= 0, dates[rows], newest).astype(np.float64)
+            scores += recency * (row_dates - oldest) / max(newest - oldest, 1)
+
+    # Highest score first, newer problem first on ties
+    k = min(count, len(rows))
+    if k < len(rows):
+        # Everything scoring at least the k-th best, ties included, then order those
+        threshold = np.partition(scores, len(rows) - k)[len(rows) - k]
+        top = np.flatnonzero(scores >= threshold)
+    else:
+        top = np.arange(len(rows))
+    top = top[np.lexsort((-numbers[top], -scores[top]))][:k]
+    return rows[top], scores[top], (low, high), len(rows)
+
+
+def solved_bitset(numbers):
+    """Packed bitset for a list of Problem Numbers"""
+    numbers = [n for n in numbers if n >= 0]
+    if not numbers:
+        return np.zeros(0, dtype=np.uint8)
+    return bitset.pack_numbers(numbers, max(numbers) + 1)
@@ -1,34 +1,204 @@
+import argparse
+import hashlib
+import json
 import logging
-import subprocess
-import sys
+import os
+import time
+import tracemalloc
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def run_pipeline():
-    # Run import_problems.py
-    logger.info("Running import_problems.py...")
-    result = subprocess.run([sys.executable, 'import_problems.py'], capture_output=False)  # Changed to False
-    
-    if result.returncode == 0:
-        logger.info("import_problems.py completed successfully.")
-    else:
-        logger.error("import_problems.py failed with exit code %d", result.returncode)
-        return False
-    
-    # Run rating_separator.py
-    logger.info("Running rating_separator.py...")
-    result = subprocess.run([sys.executable, 'rating_separator.py'], capture_output=False)  # Changed to False
-    
-    if result.returncode == 0:
-        logger.info("rating_separator.py completed successfully.")
-    else:
-        logger.error("rating_separator.py failed with exit code %d", result.returncode)
+MASTER_CSV = 'leetcode_contest_problems.csv'
+RATING_DIR = 'rating_groups'
+STATIC_ASSETS_DIR = 'static'
+
+# Input hash of every stage's last successful run
+PIPELINE_STATE_FILE = '.pipeline_state.json'
+
+def hash_files(paths):
+    """sha256 over the contents of the given files (missing files hash as empty)"""
+    digest = hashlib.sha256()
+    for path in paths:
+        digest.update(path.encode('utf-8'))
+        if os.path.exists(path):
+            with open(path, 'rb') as f:
+                digest.update(f.read())
+    return digest.hexdigest()
+
+def hash_dir(path):
+    if not os.path.isdir(path):
+        return hash_files([])
+    return hash_files(sorted(os.path.join(path, name) for name in os.listdir(path)))
+
+def load_state():
+    if not os.path.exists(PIPELINE_STATE_FILE):
+        return {}
+    with open(PIPELINE_STATE_FILE, 'r') as f:
+        return json.load(f)
+
+def save_state(state):
+    with open(PIPELINE_STATE_FILE, 'w') as f:
+        json.dump(state, f, indent=2, sort_keys=True)
+
+class Stage:
+    """
+    One pipeline step. input_hash returns a fingerprint of everything the step
+    reads (None means it always runs); outputs are files that must exist for a
+    cached run to count.
+    """
+
+    def __init__(self, name, run, input_hash=None, outputs=()):
+        self.name = name
+        self.run = run
+        self.input_hash = input_hash
+        self.outputs = outputs
+
+class Pipeline:
+    """
+    Runs stages in order inside this process, passing results in memory.
+    A stage whose input hash matches its last successful run is skipped, and
+    its result is only computed if a later stage that does run asks for it.
+    """
+
+    def __init__(self, stages):
+        self.stages = {stage.name: stage for stage in stages}
+        self.order = [stage.name for stage in stages]
+        self.results = {}
+        self.report = []
+
+    def result(self, name):
+        """Result of an earlier stage, running it now if it was skipped"""
+        if name not in self.results:
+            self._execute(self.stages[name], forced=True)
+        return self.results[name]
+
+    def _execute(self, stage, forced=False):
+        # A forced upstream stage runs inside another stage's measurement
+        nested = tracemalloc.is_tracing()
+        if not nested:
+            tracemalloc.start()
+        elif hasattr(tracemalloc, 'reset_peak'):
+            tracemalloc.reset_peak()
+        started = time.perf_counter()
+        try:
+            self.results[stage.name] = stage.run(self)
+        finally:
+            elapsed = time.perf_counter() - started
+            _, peak = tracemalloc.get_traced_memory()
+            if not nested:
+                tracemalloc.stop()
+        status = 'ran (needed downstream)' if forced else 'ran'
+        self.report.append((stage.name, status, elapsed, peak))
+
+    def run(self):
+        state = load_state()
+        for name in self.order:
+            stage = self.stages[name]
+            fingerprint = stage.input_hash() if stage.input_hash else None
+            cached = (
+                fingerprint is not None
+                and state.get(name) == fingerprint
+                and all(os.path.exists(path) for path in stage.outputs)
+            )
+            if cached:
+                logger.info(f"Stage {name}: inputs unchanged, skipping")
+                self.report.append((name, 'skipped', 0.0, 0))
+                continue
+
+            logger.info(f"Stage {name}: running")
+            self._execute(stage)
+            if fingerprint is not None:
+                state[name] = fingerprint
+                save_state(state)
+        return self.results
+
+    def print_report(self):
+        print("\nPipeline stages:")
+        print(f"{'stage':<12} {'status':<24} {'wall time':>10} {'peak memory':>12}")
+        for name, status, elapsed, peak in self.report:
+            print(f"{name:<12} {status:<24} {elapsed:>9.3f}s {peak / 2**20:>10.1f}MB")
+        total = sum(elapsed for _, _, elapsed, _ in self.report)
+        print(f"{'total':<12} {'':<24} {total:>9.3f}s")
+
+def build_pipeline(backend='selenium', store_url=None, scrape=True, columnar=False, static=False,
+                   export_csv=False):
+    def run_scrape(pipeline):
+        import import_problems
+        return import_problems.main(backend=backend, store_url=store_url)
+
+    def run_export(pipeline):
+        import import_problems
+        import_problems.export_store(store_url)
+
+    def run_normalize(pipeline):
+        import pandas as pd
+        if store_url:
+            # The store is the master table, the CSV may be an older export
+            from problem_store import ProblemStore
+            df = ProblemStore(store_url).read_frame()
+        else:
+            df = pd.read_csv(MASTER_CSV)
+        df['Problem Rating'] = pd.to_numeric(df['Problem Rating'], errors='coerce')
+        return df
+
+    def run_bucket(pipeline):
+        import rating_separator
+        return rating_separator.write_buckets(pipeline.result('normalize'), RATING_DIR, columnar)
+
+    def run_static(pipeline):
+        import generate_static
+        buckets = pipeline.result('bucket') if 'bucket' in pipeline.results else None
+        generate_static.generate_static_files(buckets)
+
+    # With a store there's no cheap fingerprint of the master table, so the
+    # stages reading it always run (bucket files are still only rewritten on change)
+    master_hash = (lambda: hash_files([MASTER_CSV])) if not store_url else None
+    stages = []
+    if scrape:
+        stages.append(Stage('scrape', run_scrape))
+    if store_url and export_csv:
+        stages.append(Stage('export', run_export))
+    stages.append(Stage('normalize', run_normalize, master_hash))
+    stages.append(Stage('bucket', run_bucket, master_hash and (lambda: f"{master_hash()}:columnar={columnar}"),
+                        outputs=[RATING_DIR]))
+    if static:
+        stages.append(Stage('static', run_static,
+                            lambda: hash_files([os.path.join(RATING_DIR, 'bucket_manifest.json')]) + hash_dir(STATIC_ASSETS_DIR),
+                            outputs=['docs']))
+    return Pipeline(stages)
+
+def run_pipeline(backend='selenium', store_url=None, scrape=True, columnar=False, static=False,
+                 export_csv=False):
+    pipeline = build_pipeline(backend, store_url, scrape, columnar, static, export_csv)
+    try:
+        pipeline.run()
+    except Exception as e:
+        logger.error("Pipeline failed: %s", e)
+        pipeline.print_report()
         return False
-    
+
+    pipeline.print_report()
     logger.info("Full pipeline completed successfully.")
     return True
 
 if __name__ == "__main__":
-    run_pipeline()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description='Scrape, bucket and export LeetCode contest problems')
+    parser.add_argument('--backend', choices=['selenium', 'http'], default='selenium',
+                        help='scraper backend passed to import_problems.py')
+    parser.add_argument('--store', metavar='URL', nargs='?', const='sqlite:///leetcode_problems.db',
+                        help='use the SQLite problem store as the master table')
+    parser.add_argument('--export-csv', action='store_true',
+                        help=f'with --store, also rewrite {MASTER_CSV} from the store')
+    parser.add_argument('--no-scrape', action='store_true',
+                        help='skip scraping and only rebuild from the master CSV')
+    parser.add_argument('--columnar', action='store_true',
+                        help='also write the columnar catalog for the app')
+    parser.add_argument('--static', action='store_true',
+                        help='also build the GitHub Pages site in docs/')
+    args = parser.parse_args()
+    success = run_pipeline(args.backend, args.store, not args.no_scrape, args.columnar, args.static,
+                           args.export_csv)
+    if not success:
+        raise SystemExit(1)
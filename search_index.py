@@ -0,0 +1,125 @@
+from collections import defaultdict
+from itertools import chain
+
+import numpy as np
+
+# Fields a global search matches against, in the order they are joined
+SEARCH_FIELDS = ['Problem Name', 'Tags', 'Problem Number']
+
+# Joins fields so a query can never match across two of them
+FIELD_SEPARATOR = '\x00'
+
+# Joins documents in the single text buffer
+DOCUMENT_SEPARATOR = '\x01'
+
+# Index bigrams as well as trigrams so 2-character queries still use postings
+MIN_GRAM = 2
+MAX_GRAM = 3
+
+
+def ngrams(text, n):
+    return {text[i:i + n] for i in range(len(text) - n + 1)}
+
+
+def id_dtype(count):
+    """Narrowest unsigned integer type that holds ids 0..count-1"""
+    return np.uint16 if count <= 2**16 else np.uint32
+
+
+def gram_key(gram):
+    """
+    An n-gram packed into one integer, 21 bits per code point, with the top
+    bit set for bigrams so they never equal a trigram
+    """
+    key = 0
+    for char in gram:
+        key = (key << 21) | ord(char)
+    return key | (1 << 63) if len(gram) == 2 else key
+
+
+class SearchIndex:
+    """
+    Inverted n-gram index over the searchable text of each problem.
+
+    A query is answered by intersecting the posting lists of its n-grams to
+    get candidate rows, then verifying each candidate with a plain substring
+    check. Results are exactly the rows whose lowercased name or tags, or whose
+    problem number, contain the query.
+
+    All posting lists are slices of one array of row ids (16-bit while the
+    catalog has fewer than 65536 rows), found by binary
+    search over the sorted integer keys of the n-grams, and all documents
+    live in one string addressed by offsets. The index is a handful of large
+    objects rather than millions of small ones: compact, and left untouched
+    by refcounting when shared copy-on-write between forked workers.
+    """
+
+    def __init__(self, df):
+        documents = [
+            FIELD_SEPARATOR.join(values)
+            for values in zip(
+                df['Problem Name'].str.lower(),
+                df['Tags'].str.lower(),
+                df['Problem Number'].astype(str),
+            )
+        ]
+        lengths = np.array([len(doc) for doc in documents], dtype=np.int64)
+        self.starts = np.concatenate(([0], np.cumsum(lengths + 1)[:-1])).astype(np.int64)
+        self.ends = self.starts + lengths
+        self.text = DOCUMENT_SEPARATOR.join(documents)
+        self.size = len(documents)
+
+        postings = defaultdict(list)
+        for row_id, doc in enumerate(documents):
+            grams = set()
+            for n in range(MIN_GRAM, MAX_GRAM + 1):
+                grams |= ngrams(doc, n)
+            # Row ids are appended in increasing order, so every list is sorted
+            for gram in grams:
+                postings[gram].append(row_id)
+
+        keys = np.array([gram_key(gram) for gram in postings], dtype=np.uint64)
+        order = np.argsort(keys)
+        lists = list(postings.values())
+        self.keys = keys[order]
+        self.offsets = np.zeros(len(lists) + 1, dtype=np.int64)
+        np.cumsum([len(lists[i]) for i in order], out=self.offsets[1:])
+        self.rows = np.fromiter(chain.from_iterable(lists[i] for i in order), dtype=id_dtype(self.size),
+                                count=self.offsets[-1])
+
+    def posting(self, gram):
+        """Sorted row ids containing the n-gram"""
+        key = np.uint64(gram_key(gram))
+        i = np.searchsorted(self.keys, key)
+        if i == len(self.keys) or self.keys[i] != key:
+            return self.rows[:0]
+        return self.rows[self.offsets[i]:self.offsets[i + 1]]
+
+    def candidates(self, term):
+        """Row ids that contain every n-gram of the term (may include false positives)"""
+        n = min(len(term), MAX_GRAM)
+        if n < MIN_GRAM:
+            return np.arange(self.size, dtype=np.int32)
+
+        grams = ngrams(term, n)
+        posting_lists = sorted((self.posting(gram) for gram in grams), key=len)
+        result = posting_lists[0]
+        for posting in posting_lists[1:]:
+            if not len(result):
+                break
+            result = np.intersect1d(result, posting, assume_unique=True)
+        return result
+
+    def search(self, term):
+        """Return the sorted row ids whose searchable text contains the term"""
+        term = term.lower()
+        text = self.text
+        candidates = self.candidates(term)
+        if MIN_GRAM <= len(term) <= MAX_GRAM:
+            # The term is itself one indexed n-gram, its posting list is exact
+            return candidates.tolist()
+        return [
+            row_id
+            for row_id, start, end in zip(candidates.tolist(), self.starts[candidates].tolist(), self.ends[candidates].tolist())
+            if text.find(term, start, end) != -1
+        ]
@@ -0,0 +1,143 @@
+// Frontend of the static GitHub Pages build (docs/), which has no Flask API.
+// It reads what generate_static.py writes to data/: the manifest, then only
+// the range shard being viewed. The search shard is fetched on first search.
+// Shard names carry a content hash, so only the manifest is revalidated.
+
+const DATA_URL = 'data/';
+
+let manifest = null;
+let searchRows = null;
+const shardCache = {};
+
+function escapeHtml(value) {
+    return String(value).replace(/[&<>"']/g, c => ({
+        '&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#39;'
+    }[c]));
+}
+
+function rangeStart(ratingRange) {
+    return parseInt(ratingRange.split('_to_')[0], 10);
+}
+
+async function fetchJson(file, options = {}) {
+    const response = await fetch(DATA_URL + file, options);
+    if (!response.ok) throw new Error(`HTTP error! status: ${response.status}`);
+    return response.json();
+}
+
+async function loadShard(ratingRange) {
+    if (!shardCache[ratingRange]) {
+        shardCache[ratingRange] = fetchJson(manifest.ranges[ratingRange].file);
+    }
+    return shardCache[ratingRange];
+}
+
+function renderTable(rows) {
+    document.getElementById('problemTable').innerHTML = `
+        <table class="table table-striped">
+            <thead>
+                <tr><th>#</th><th>Problem</th><th>Rating</th><th>Contest</th><th>Tags</th></tr>
+            </thead>
+            <tbody>
+                ${rows.map(row => `
+                    <tr>
+                        <td>${escapeHtml(row.number)}</td>
+                        <td>${row.link
+                            ? `<a href="${escapeHtml(row.link)}" target="_blank">${escapeHtml(row.name)}</a>`
+                            : escapeHtml(row.name)}</td>
+                        <td>${escapeHtml(row.rating)}</td>
+                        <td>${escapeHtml(row.contest)}</td>
+                        <td>${escapeHtml(row.tags)}</td>
+                    </tr>`).join('')}
+            </tbody>
+        </table>
+    `;
+}
+
+async function showRange(ratingRange) {
+    const loading = document.getElementById('loading');
+    const problemStats = document.getElementById('problemStats');
+    loading.classList.remove('d-none');
+    try {
+        const problems = await loadShard(ratingRange);
+        problemStats.textContent = `${problems.length} problems rated ${ratingRange.replace('_to_', '-')}`;
+        renderTable(problems.map(problem => ({
+            number: problem['Problem Number'],
+            name: problem['Problem Name'],
+            link: problem['Problem Link'],
+            rating: problem['Problem Rating'],
+            contest: problem['Contest Name'],
+            tags: problem['Tags']
+        })));
+        history.replaceState(null, '', `#${ratingRange}`);
+    } catch (error) {
+        console.error('Failed to load problems:', error);
+        problemStats.textContent = 'Failed to load problems.';
+    } finally {
+        loading.classList.add('d-none');
+    }
+}
+
+async function search(term) {
+    const words = term.toLowerCase().split(/\s+/).filter(Boolean);
+    if (words.length === 0) {
+        const ratingRange = document.getElementById('ratingSelect').value;
+        if (ratingRange) showRange(ratingRange);
+        return;
+    }
+    if (!searchRows) {
+        const index = await fetchJson(manifest.search.file);
+        searchRows = index.rows;
+    }
+    // Rows are [number, lowercased name, lowercased tags, range], newest first
+    const matches = searchRows.filter(([number, name, tags]) =>
+        words.every(word => name.includes(word) || tags.includes(word) || String(number) === word)
+    ).slice(0, 100);
+    document.getElementById('problemStats').textContent = `${matches.length} matching problems`;
+    renderTable(matches.map(([number, name, tags, ratingRange]) => ({
+        number,
+        name,
+        link: '',
+        rating: ratingRange.replace('_to_', '-'),
+        contest: '',
+        tags
+    })));
+}
+
+document.addEventListener('DOMContentLoaded', async function() {
+    const ratingSelect = document.getElementById('ratingSelect');
+    const searchInput = document.getElementById('searchInput');
+    try {
+        manifest = await fetchJson('manifest.json', { cache: 'no-cache' });
+    } catch (error) {
+        console.error('Failed to load manifest:', error);
+        document.getElementById('problemStats').textContent = 'Failed to load problems.';
+        return;
+    }
+
+    const ranges = Object.keys(manifest.ranges).sort((a, b) => rangeStart(a) - rangeStart(b));
+    ranges.forEach(ratingRange => {
+        const option = document.createElement('option');
+        option.value = ratingRange;
+        option.textContent = `${ratingRange.replace('_to_', '-')} (${manifest.ranges[ratingRange].count})`;
+        ratingSelect.appendChild(option);
+    });
+    ratingSelect.addEventListener('change', () => {
+        searchInput.value = '';
+        if (ratingSelect.value) showRange(ratingSelect.value);
+    });
+
+    let searchTimer = null;
+    searchInput.addEventListener('input', () => {
+        clearTimeout(searchTimer);
+        searchTimer = setTimeout(() => search(searchInput.value), 200);
+    });
+
+    // First paint: the manifest plus the one shard for the linked or first range
+    const linked = location.hash.slice(1);
+    const initial = manifest.ranges[linked] ? linked : ranges[0];
+    if (initial) {
+        ratingSelect.value = initial;
+        showRange(initial);
+    }
+});
@@ -4,6 +4,13 @@ let currentRating = '';
 let currentSort = { field: 'Problem Number', order: 'desc' }; // Changed default sort
 let showTags = localStorage.getItem('showTags') !== 'false';
 let searchTimer = null;
+let globalSearchTimer = null;
+
+// Solved state, parsed from localStorage once per page load and kept in memory
+let solvedProblemsCache = null;
+// Changes not yet sent to the progress API, {problemNumber: solved}
+let pendingProgressChanges = {};
+let progressSyncTimer = null;
 
 // Add this style for solved problems highlighting
 const style = document.createElement('style');
@@ -47,6 +54,63 @@ style.textContent = `
 `;
 document.head.appendChild(style);
 
+function getSolvedProblems() {
+    if (solvedProblemsCache === null) {
+        solvedProblemsCache = JSON.parse(localStorage.getItem('solvedProblems') || '{}');
+    }
+    return solvedProblemsCache;
+}
+
+function saveSolvedProblems() {
+    localStorage.setItem('solvedProblems', JSON.stringify(getSolvedProblems()));
+}
+
+function setProblemSolved(problemId, solved) {
+    const solvedProblems = getSolvedProblems();
+    if (solved) {
+        solvedProblems[problemId] = true;
+    } else {
+        delete solvedProblems[problemId];
+    }
+    saveSolvedProblems();
+    queueProgressChange(problemId, solved);
+}
+
+// Toggles are batched and sent to the server a second after the last one
+function queueProgressChange(problemId, solved) {
+    if (!localStorage.getItem('progressToken')) return;
+    pendingProgressChanges[problemId] = solved;
+    clearTimeout(progressSyncTimer);
+    progressSyncTimer = setTimeout(flushProgressChanges, 1000);
+}
+
+function flushProgressChanges() {
+    const user = localStorage.getItem('progressUser');
+    const token = localStorage.getItem('progressToken');
+    const changes = pendingProgressChanges;
+    pendingProgressChanges = {};
+    if (!user || !token || Object.keys(changes).length === 0) return;
+
+    const ids = Object.keys(changes).map(Number);
+    fetch(`/api/progress/${encodeURIComponent(user)}`, {
+        method: 'POST',
+        headers: progressHeaders(token),
+        body: JSON.stringify({
+            solved: ids.filter(id => changes[id]),
+            unsolved: ids.filter(id => !changes[id])
+        })
+    }).catch(error => {
+        // Keep the changes (unless superseded) for the next attempt
+        console.error('Failed to save progress:', error);
+        pendingProgressChanges = Object.assign(changes, pendingProgressChanges);
+    });
+}
+
+// Writes to the synced progress carry the token the user got when claiming it
+function progressHeaders(token) {
+    return { 'Content-Type': 'application/json', 'X-Progress-Token': token };
+}
+
 // Add this function for the rating badge color class
 function getRatingColorClass(rating) {
     if (rating < 1200) return 'bg-secondary'; // Newbie
@@ -66,8 +130,7 @@ function createTable(data) {
         return `<div class="alert alert-info">No problems found matching your criteria.</div>`;
     }
     
-    // Get solved problems from localStorage
-    const solvedProblems = JSON.parse(localStorage.getItem('solvedProblems') || '{}');
+    const solvedProblems = getSolvedProblems();
     
     let html = `
         <div class="table-responsive">
@@ -153,10 +216,13 @@ function loadProblems() {
     
     // Use the current sort settings
     const params = new URLSearchParams({
-        search: search,
         sort: currentSort.field,
         order: currentSort.order
     });
+    // Only searches skip the server's response cache, so plain loads leave it out
+    if (search.trim()) {
+        params.set('search', search);
+    }
     
     const url = `/problems/${currentRating}?${params}`;
     console.log(`Fetching from: ${url}`);
@@ -221,8 +287,7 @@ function addSolvedCounter(problems) {
     const problemsHeader = document.querySelector('.card-header');
     if (!problemsHeader) return;
     
-    // Get fresh data from localStorage
-    const solvedProblems = JSON.parse(localStorage.getItem('solvedProblems') || '{}');
+    const solvedProblems = getSolvedProblems();
     const totalProblems = problems.length;
     
     // Count only problems from the CURRENT dataset that are marked as solved
@@ -259,10 +324,9 @@ function addSolvedCounter(problems) {
 
 function toggleSolved(e) {
     const problemId = e.target.dataset.problemId;
-    const solvedProblems = JSON.parse(localStorage.getItem('solvedProblems') || '{}');
+    const solvedProblems = getSolvedProblems();
     
-    solvedProblems[problemId] = !solvedProblems[problemId];
-    localStorage.setItem('solvedProblems', JSON.stringify(solvedProblems));
+    setProblemSolved(problemId, !solvedProblems[problemId]);
     
     const row = e.target.closest('tr');
     row.classList.toggle('solved-problem');
@@ -363,6 +427,15 @@ document.addEventListener('DOMContentLoaded', function() {
         }
     });
     
+    // Search as you type: ranked search tolerates partial and misspelled words
+    globalSearchInput.addEventListener('input', function() {
+        clearTimeout(globalSearchTimer);
+        const searchTerm = globalSearchInput.value.trim();
+        if (searchTerm.length >= 2) {
+            globalSearchTimer = setTimeout(() => performGlobalSearch(searchTerm), 150);
+        }
+    });
+    
     // Handle pressing Enter in global search box
     globalSearchInput.addEventListener('keypress', function(e) {
         if (e.key === 'Enter') {
@@ -475,8 +548,19 @@ document.addEventListener('DOMContentLoaded', function() {
 
     function confirmClearSolved() {
         if (confirm('Are you sure you want to reset all your solved problem progress? This cannot be undone.')) {
-            // Clear localStorage
-            localStorage.setItem('solvedProblems', '{}');
+            // Clear localStorage and the synced progress, if any
+            solvedProblemsCache = {};
+            saveSolvedProblems();
+            const progressUser = localStorage.getItem('progressUser');
+            const progressToken = localStorage.getItem('progressToken');
+            if (progressUser && progressToken) {
+                pendingProgressChanges = {};
+                fetch(`/api/progress/${encodeURIComponent(progressUser)}`, {
+                    method: 'POST',
+                    headers: progressHeaders(progressToken),
+                    body: JSON.stringify({ reset: true })
+                }).catch(error => console.error('Failed to reset progress:', error));
+            }
             
             // Update UI - remove solved class from all rows
             document.querySelectorAll('.solved-problem').forEach(row => {
@@ -512,6 +596,12 @@ document.addEventListener('DOMContentLoaded', function() {
 
     // Add this line at the end
     centerNavbarSearchBar();
+
+    // Pull progress saved from other devices for the user this browser claimed
+    const progressUser = localStorage.getItem('progressUser');
+    if (progressUser && localStorage.getItem('progressToken')) {
+        syncSolvedProblems(progressUser);
+    }
 });
 
 // Global search function
@@ -526,7 +616,7 @@ function performGlobalSearch(searchTerm) {
     problemsHeader.textContent = `Search Results`;
     problemStats.textContent = '';
     
-    fetch(`/search?q=${encodeURIComponent(searchTerm)}&sort=Problem Number&order=desc`)
+    fetch(`/search?q=${encodeURIComponent(searchTerm)}&mode=ranked&limit=50`)
         .then(response => {
             if (!response.ok) throw new Error(`HTTP error! status: ${response.status}`);
             return response.json();
@@ -571,8 +661,7 @@ function createGlobalSearchTable(data) {
         return `<div class="alert alert-info">No problems found matching your criteria.</div>`;
     }
     
-    // Get solved problems from localStorage
-    const solvedProblems = JSON.parse(localStorage.getItem('solvedProblems') || '{}');
+    const solvedProblems = getSolvedProblems();
     
     let html = `
         <div class="table-responsive">
@@ -876,6 +965,9 @@ function displayUserProfile(data) {
                 <a href="https://leetcode.com/${user.username}" target="_blank" class="btn btn-sm btn-outline-primary">
                     <i class="bi bi-box-arrow-up-right"></i> View Profile
                 </a>
+                <button type="button" id="claimProgressBtn" class="btn btn-sm btn-outline-success ms-2">
+                    <i class="bi bi-cloud-arrow-up"></i> Sync My Progress As ${user.username}
+                </button>
             </div>
         </div>
     `;
@@ -901,6 +993,9 @@ function displayUserProfile(data) {
     
     // Remove the close button event handler - no longer needed
     
+    // Looking a user up never touches their synced progress, only claiming does
+    document.getElementById('claimProgressBtn').onclick = () => claimProgress(user.username);
+    
     // Add personalized recommendations if rating is available
     if (contestRating) {
         addPersonalizedRecommendations(contestRating, user.username);
@@ -984,15 +1079,76 @@ async function autoLoadRecommendedProblems(ratingRange, username = null, userRat
     }, 500);
 }
 
-// Replace the syncSolvedProblems function with this simplified version
-function syncSolvedProblems(username) {
-    // Instead of fetching data, just show a message about manual tracking
+// Claim a username's synced progress for this browser. The first claim gets
+// a token; to sync another device, paste the token shown here on that device.
+async function claimProgress(username) {
+    try {
+        const response = await fetch(`/api/progress/${encodeURIComponent(username)}/claim`, { method: 'POST' });
+        let token;
+        if (response.status === 201) {
+            token = (await response.json()).token;
+        } else if (response.status === 409) {
+            token = prompt(`${username} is already synced from another device. Paste the sync token shown there:`);
+            if (!token) return;
+        } else {
+            throw new Error(`status ${response.status}`);
+        }
+        localStorage.setItem('progressUser', username);
+        localStorage.setItem('progressToken', token.trim());
+        syncSolvedProblems(username);
+    } catch (error) {
+        console.error('Failed to claim progress:', error);
+    }
+}
+
+// Sync solved problems with the server-side progress store for the claimed
+// user, so marks made on another device show up here and vice versa
+async function syncSolvedProblems(username) {
+    const token = localStorage.getItem('progressToken');
+    const url = `/api/progress/${encodeURIComponent(username)}`;
+    
+    try {
+        const response = await fetch(url);
+        if (!response.ok) throw new Error(`status ${response.status}`);
+        const progress = await response.json();
+        
+        // Union of both sides: take the server's marks, send ours it lacks
+        const solvedProblems = getSolvedProblems();
+        const serverSolved = new Set(progress.solved.map(String));
+        progress.solved.forEach(id => { solvedProblems[id] = true; });
+        saveSolvedProblems();
+        const localOnly = Object.keys(solvedProblems)
+            .filter(id => solvedProblems[id] && !serverSolved.has(id))
+            .map(Number);
+        // Sent even when empty, so a wrong token is found out right away
+        const pushed = await fetch(url, {
+            method: 'POST',
+            headers: progressHeaders(token),
+            body: JSON.stringify({ solved: localOnly })
+        });
+        if (pushed.status === 401) {
+            // Stop writing to this user until it is claimed again
+            localStorage.removeItem('progressUser');
+            localStorage.removeItem('progressToken');
+            throw new Error('progress token rejected');
+        }
+        
+        // Re-render the open table with the merged state
+        if (currentRating) {
+            loadProblems();
+        }
+    } catch (error) {
+        console.error('Failed to sync progress:', error);
+        return;
+    }
+    
     const syncStatusContainer = document.getElementById('syncStatusContainer');
     if (syncStatusContainer) {
         syncStatusContainer.innerHTML = `
             <div class="alert alert-info alert-dismissible fade show" role="alert">
-                <strong>Manual Tracking Enabled</strong>
-                <p>Problems are tracked manually. Mark solved problems using the "Solved" button on each problem.</p>
+                <strong>Progress Synced</strong>
+                <p>Solved problems are saved for ${username}. To sync another device, claim ${username} there with this token:</p>
+                <code class="user-select-all">${token}</code>
                 <button type="button" class="btn-close" data-bs-dismiss="alert" aria-label="Close"></button>
             </div>
         `;
@@ -1064,8 +1220,9 @@ function addRatingDistributionBar() {
         }
     });
     
-    // Fetch the distribution data
-    fetch('/api/problem-distribution')
+    // Fetch the distribution data, bucketed like the rating select
+    const width = new URLSearchParams(window.location.search).get('width');
+    fetch(width ? `/api/problem-distribution?width=${encodeURIComponent(width)}` : '/api/problem-distribution')
         .then(response => {
             if (!response.ok) throw new Error(`HTTP error! status: ${response.status}`);
             return response.json();
@@ -1201,18 +1358,17 @@ function toggleProblemStatus(problemId, button) {
     console.log(`Toggling problem ${problemId}`);
     
     // Get current solved problems
-    const solvedProblems = JSON.parse(localStorage.getItem('solvedProblems') || '{}');
+    const solvedProblems = getSolvedProblems();
     
     // Toggle the problem's solved status
     const isSolved = !solvedProblems[problemId];
+    setProblemSolved(problemId, isSolved);
     
     if (isSolved) {
-        solvedProblems[problemId] = true;
         button.classList.replace('btn-outline-success', 'btn-success');
         button.textContent = 'Solved';
         console.log(`Problem ${problemId} marked as solved`);
     } else {
-        delete solvedProblems[problemId];
         button.classList.replace('btn-success', 'btn-outline-success');
         button.textContent = 'Unsolved';
         console.log(`Problem ${problemId} marked as unsolved`);
@@ -1224,10 +1380,6 @@ function toggleProblemStatus(problemId, button) {
         row.classList.toggle('solved-problem', isSolved);
     }
     
-    // Save to localStorage
-    localStorage.setItem('solvedProblems', JSON.stringify(solvedProblems));
-    console.log('Updated localStorage');
-    
     // Count total solved problems (for debugging)
     const totalSolved = Object.keys(solvedProblems).filter(key => solvedProblems[key]).length;
     console.log(`Total solved problems: ${totalSolved}`);
@@ -1240,8 +1392,7 @@ function updateSolvedCountDisplay() {
     const solvedCountSpan = document.querySelector('.solved-counter .badge');
     if (!solvedCountSpan) return;
     
-    // Get fresh data from localStorage
-    const solvedProblems = JSON.parse(localStorage.getItem('solvedProblems') || '{}');
+    const solvedProblems = getSolvedProblems();
     
     // Get the total from the display
     const displayText = solvedCountSpan.textContent;
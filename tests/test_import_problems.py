@@ -0,0 +1,154 @@
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pandas as pd
+import pytest
+
+import import_problems
+
+FIXTURES = os.path.join(os.path.dirname(__file__), 'fixtures', 'clist')
+
+# Problem numbers on the saved pages, newest first; page 3 and later are 404
+PAGE_1 = [3510, 3509, 3508]
+PAGE_2 = [3507, 3506, 3505]
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    """Serves tests/fixtures/clist/page_<n>.html for /problems/?page=<n>"""
+
+    def do_GET(self):
+        query = parse_qs(urlparse(self.path).query)
+        page = query.get('page', ['1'])[0]
+        self.server.requests.append(int(page))
+        path = os.path.join(FIXTURES, f'page_{page}.html')
+        if query.get('search') != [import_problems.PROBLEMS_SEARCH] or not os.path.exists(path):
+            self.send_error(404)
+            return
+        with open(path, 'rb') as f:
+            body = f.read()
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def fixture_server(monkeypatch):
+    server = ThreadingHTTPServer(('127.0.0.1', 0), FixtureHandler)
+    server.requests = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    monkeypatch.setattr(import_problems, 'PROBLEMS_URL', f'http://127.0.0.1:{server.server_port}/problems/')
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    """Run in an empty directory, where main() keeps its CSV and last_scrape_info.txt"""
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+def numbers(rows):
+    return [int(row['Problem Number']) for row in rows]
+
+
+def test_http_backend_extracts_every_page(fixture_server):
+    rows = list(import_problems.scrape_problems_http())
+    assert numbers(rows) == PAGE_1 + PAGE_2
+    assert rows[0] == {
+        'Date': 'Oct. 12, 2025',
+        'Problem Number': '3510',
+        'Problem Name': 'Maximum Score After Swaps',
+        'Problem Rating': '2315',
+        'Problem Link': 'https://leetcode.com/problems/maximum-score-after-swaps/',
+        'Contest Name': 'Weekly Contest 444',
+        'Tags': 'array, greedy',
+    }
+
+
+def test_http_backend_stops_at_the_page_with_the_mark(fixture_server):
+    rows = list(import_problems.scrape_problems_http(3509, concurrency=1))
+    assert numbers(rows) == PAGE_1
+    assert fixture_server.requests == [1]
+
+
+def test_only_rows_past_the_stored_mark_are_added_and_a_rerun_adds_nothing(fixture_server, workdir):
+    pd.DataFrame([{
+        'Date': 'Oct. 4, 2025', 'Problem Number': 3506, 'Problem Name': 'Minimum Bit Flips to Match',
+        'Problem Rating': 1452, 'Problem Link': 'https://leetcode.com/problems/minimum-bit-flips-to-match/',
+        'Contest Name': 'Biweekly Contest 155', 'Tags': 'bit manipulation',
+    }]).to_csv(import_problems.OUTPUT_FILE, index=False)
+    (workdir / import_problems.LAST_RUN_INFO_FILE).write_text('3506')
+
+    new_df = import_problems.main(backend='http')
+    assert new_df['Problem Number'].tolist() == [3510, 3509, 3508, 3507]
+    assert (workdir / import_problems.LAST_RUN_INFO_FILE).read_text() == '3510'
+    assert pd.read_csv(import_problems.OUTPUT_FILE)['Problem Number'].tolist() == [3510, 3509, 3508, 3507, 3506]
+
+    assert import_problems.main(backend='http') is None
+    assert (workdir / import_problems.LAST_RUN_INFO_FILE).read_text() == '3510'
+    assert len(pd.read_csv(import_problems.OUTPUT_FILE)) == 5
+
+
+def test_store_skips_rows_without_a_problem_number(tmp_path):
+    from problem_store import ProblemStore
+
+    store = ProblemStore(f"sqlite:///{tmp_path / 'problems.db'}")
+    new_df = pd.DataFrame([
+        {'Date': 'Oct. 12, 2025', 'Problem Number': 3510, 'Problem Name': 'Maximum Score After Swaps',
+         'Problem Rating': 2315, 'Problem Link': '', 'Contest Name': 'Weekly Contest 444', 'Tags': ''},
+        # main() keeps rows whose number couldn't be parsed, the store can't key them
+        {'Date': 'Oct. 12, 2025', 'Problem Number': None, 'Problem Name': 'Unnumbered',
+         'Problem Rating': None, 'Problem Link': '', 'Contest Name': 'Weekly Contest 444', 'Tags': ''},
+    ])
+    import_problems.save_to_store(store, new_df, 3510)
+    assert store.read_frame()['Problem Number'].tolist() == [3510]
+    assert store.get_last_problem_number() == 3510
+
+
+class GrowingPageDriver:
+    """Stands in for the browser: each scroll appends the rows of the next saved page"""
+
+    def __init__(self, pages):
+        self.pending = [self.page_rows(page) for page in pages]
+        self.rows = []
+
+    @staticmethod
+    def page_rows(page):
+        with open(os.path.join(FIXTURES, f'page_{page}.html'), 'r', encoding='utf-8') as f:
+            html = f.read()
+        start = html.index('<tr class="show-hidden-activity-on-hover">')
+        return ['<tr' + row for row in html[start:html.index('</tbody>')].split('<tr')[1:]]
+
+    def scroll(self):
+        if self.pending:
+            self.rows.extend(self.pending.pop(0))
+
+    def execute_script(self, script, seen=0):
+        return self.rows[seen:]
+
+
+def test_incremental_extractor_parses_each_loaded_row_once():
+    driver = GrowingPageDriver([1, 2])
+    extractor = import_problems.IncrementalRowExtractor(driver)
+    assert extractor.new_rows() == []
+
+    driver.scroll()
+    assert numbers(extractor.new_rows()) == PAGE_1
+    assert extractor.new_rows() == []
+
+    driver.scroll()
+    assert numbers(extractor.new_rows()) == PAGE_2
+    assert extractor.seen == len(PAGE_1 + PAGE_2)
+
+    driver.scroll()
+    assert extractor.new_rows() == []
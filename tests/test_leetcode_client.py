@@ -0,0 +1,180 @@
+import threading
+
+import pytest
+import requests
+
+import leetcode_client
+from leetcode_client import LeetCodeAPIError
+
+
+class StubResponse:
+    def __init__(self, status_code, body=None):
+        self.status_code = status_code
+        self._body = body
+
+    def json(self):
+        return self._body
+
+
+class StubSession:
+    """
+    Stands in for the pooled requests.Session. handler(variables) returns a
+    StubResponse or raises; every call's variables are recorded.
+    """
+
+    def __init__(self, handler):
+        self.handler = handler
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def post(self, url, json, timeout):
+        with self._lock:
+            self.calls.append(json['variables'])
+        return self.handler(json['variables'])
+
+
+def sequence(*outcomes):
+    """Handler returning (or raising) the given outcomes in order"""
+    outcomes = list(outcomes)
+
+    def handler(variables):
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+    return handler
+
+
+def profile(username):
+    return {'username': username, 'profile': {'ranking': 1}, 'submitStats': {'acSubmissionNum': []}}
+
+
+def batch_handler(missing=(), failing=()):
+    """Answers aliased batch queries; users in missing don't exist, a chunk with a user in failing gets a 500"""
+    def handler(variables):
+        if any(username in failing for username in variables.values()):
+            return StubResponse(500)
+        data, errors = {}, []
+        for alias, username in variables.items():
+            if username in missing:
+                data[alias] = None
+                data[f'{alias}_contest'] = None
+                errors.append({'message': 'That user does not exist.', 'path': [alias]})
+            else:
+                data[alias] = profile(username)
+                data[f'{alias}_contest'] = {'rating': 1500.0}
+        return StubResponse(200, {'data': data, 'errors': errors} if errors else {'data': data})
+    return handler
+
+
+@pytest.fixture
+def stub(monkeypatch):
+    sleeps = []
+    monkeypatch.setattr(leetcode_client.time, 'sleep', sleeps.append)
+    leetcode_client._profile_cache.clear()
+
+    def install(handler):
+        session = StubSession(handler)
+        session.sleeps = sleeps
+        monkeypatch.setattr(leetcode_client, '_session', session)
+        return session
+    yield install
+    leetcode_client._profile_cache.clear()
+
+
+def test_retries_transient_status_with_backoff(stub):
+    session = stub(sequence(StubResponse(503), StubResponse(429), StubResponse(200, {'data': {}})))
+    assert leetcode_client.graphql_request('query', {}) == {'data': {}}
+    assert len(session.calls) == 3
+    assert session.sleeps == [leetcode_client.RETRY_BACKOFF, leetcode_client.RETRY_BACKOFF * 2]
+
+
+def test_retries_connection_errors(stub):
+    session = stub(sequence(requests.exceptions.ConnectionError('reset'), StubResponse(200, {'data': {}})))
+    assert leetcode_client.graphql_request('query', {}) == {'data': {}}
+    assert len(session.calls) == 2
+
+
+def test_gives_up_after_max_retries(stub):
+    session = stub(sequence(*[StubResponse(502)] * (leetcode_client.MAX_RETRIES + 1)))
+    with pytest.raises(LeetCodeAPIError) as error:
+        leetcode_client.graphql_request('query', {})
+    assert error.value.status_code == 502
+    assert len(session.calls) == leetcode_client.MAX_RETRIES + 1
+
+
+@pytest.mark.parametrize('outcome', [
+    StubResponse(400),
+    requests.exceptions.ReadTimeout('slow'),
+    # A ConnectionError subclass, but still a timeout
+    requests.exceptions.ConnectTimeout('unreachable'),
+])
+def test_does_not_retry_other_failures(stub, outcome):
+    session = stub(sequence(outcome))
+    with pytest.raises((LeetCodeAPIError, requests.exceptions.Timeout)):
+        leetcode_client.graphql_request('query', {})
+    assert len(session.calls) == 1
+    assert session.sleeps == []
+
+
+def test_profile_is_cached(stub):
+    session = stub(sequence(StubResponse(200, {'data': {'matchedUser': profile('alice')}})))
+    assert leetcode_client.get_user_profile('alice') == {'matchedUser': profile('alice')}
+    assert leetcode_client.get_user_profile('alice') == {'matchedUser': profile('alice')}
+    assert len(session.calls) == 1
+
+
+def test_profile_graphql_error_maps_to_404(stub):
+    stub(sequence(StubResponse(200, {'errors': [{'message': 'That user does not exist.'}]})))
+    with pytest.raises(LeetCodeAPIError) as error:
+        leetcode_client.get_user_profile('nobody')
+    assert error.value.status_code == 404
+    assert str(error.value) == 'That user does not exist.'
+
+
+def test_batch_splits_into_aliased_chunks(stub):
+    session = stub(batch_handler())
+    usernames = [f'user{i}' for i in range(25)]
+    profiles, errors = leetcode_client.get_user_profiles(usernames + ['user0'])
+
+    assert errors == {}
+    assert list(profiles) == usernames
+    assert profiles['user7']['matchedUser'] == profile('user7')
+    assert profiles['user7']['userContestRanking'] == {'rating': 1500.0}
+    chunk_sizes = sorted(len(variables) for variables in session.calls)
+    assert chunk_sizes == [5, leetcode_client.BATCH_CHUNK_SIZE, leetcode_client.BATCH_CHUNK_SIZE]
+    assert all(list(variables) == [f'u{i}' for i in range(len(variables))] for variables in session.calls)
+
+
+def test_batch_serves_cached_profiles_without_upstream_calls(stub):
+    session = stub(batch_handler())
+    leetcode_client.get_user_profiles(['alice', 'bob'])
+    profiles, _ = leetcode_client.get_user_profiles(['alice', 'bob', 'carol'])
+    assert set(profiles) == {'alice', 'bob', 'carol'}
+    assert session.calls[-1] == {'u0': 'carol'}
+
+
+def test_batch_reports_missing_users_per_alias(stub):
+    stub(batch_handler(missing={'ghost'}))
+    profiles, errors = leetcode_client.get_user_profiles(['alice', 'ghost', 'bob'])
+    assert set(profiles) == {'alice', 'bob'}
+    assert errors == {'ghost': 'That user does not exist.'}
+
+
+def test_batch_failure_only_affects_its_chunk(stub):
+    stub(batch_handler(failing={'user3'}))
+    usernames = [f'user{i}' for i in range(15)]
+    profiles, errors = leetcode_client.get_user_profiles(usernames)
+    assert sorted(errors) == sorted(usernames[:leetcode_client.BATCH_CHUNK_SIZE])
+    assert errors['user3'] == 'LeetCode API returned status 500'
+    assert sorted(profiles) == sorted(usernames[leetcode_client.BATCH_CHUNK_SIZE:])
+
+
+def test_batch_timeout_is_reported_per_user(stub):
+    stub(sequence(requests.exceptions.ReadTimeout('slow')))
+    profiles, errors = leetcode_client.get_user_profiles(['alice', 'bob'])
+    assert profiles == {}
+    assert errors == {
+        'alice': 'Timeout when connecting to LeetCode API',
+        'bob': 'Timeout when connecting to LeetCode API',
+    }
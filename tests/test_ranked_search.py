@@ -0,0 +1,47 @@
+import pandas as pd
+import pytest
+
+from ranked_search import RankedIndex
+
+
+PROBLEMS = [
+    (1, 'Two Sum', 'Array, Hash Table'),
+    (2143, 'Merge Two 2D Arrays by Summing Values', 'Array, Hash Table, Two Pointers'),
+    (1880, 'Check if Word Equals Summation of Two Words', 'String'),
+    (1099, 'Two Sum Less Than K', 'Array, Two Pointers, Binary Search, Sorting'),
+    (322, 'Coin Change', 'Array, Dynamic Programming, Breadth-First Search'),
+    (518, 'Coin Change II', 'Array, Dynamic Programming'),
+    (3592, 'Inverse Coin Change', 'Array, Dynamic Programming'),
+    (3418, 'Maximum Amount of Money Robot Can Earn', 'Array, Dynamic Programming, Matrix'),
+]
+
+
+@pytest.fixture(scope='module')
+def index():
+    df = pd.DataFrame(PROBLEMS, columns=['Problem Number', 'Problem Name', 'Tags'])
+    return RankedIndex(df), df
+
+
+def names(index, query, limit=3):
+    ranked, df = index
+    rows, _, _, _ = ranked.search(query, limit)
+    return df['Problem Name'].iloc[rows].tolist()
+
+
+@pytest.mark.parametrize('query, title', [
+    ('two sum', 'Two Sum'),
+    ('Coin Change', 'Coin Change'),
+    ('coin change ii', 'Coin Change II'),
+])
+def test_exact_title_ranks_first(index, query, title):
+    assert names(index, query)[0] == title
+
+
+def test_complete_last_word_is_not_expanded(index):
+    # "sum" is a word of the index, so "summing" and "summation" don't count as matches
+    ranked, _ = index
+    assert ranked.expand('sum', prefix=True) == {ranked.term_ids['sum']: 1.0}
+
+
+def test_partial_last_word_matches_as_prefix(index):
+    assert 'Merge Two 2D Arrays by Summing Values' in names(index, 'two summ', limit=5)